@@ -3,28 +3,36 @@ Draft API endpoints
 
 Handles saving and managing essay drafts
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import asyncio
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Draft, User
+from app.models.essay import count_chinese_chars
 from app.schemas import (
     DraftCreate,
     DraftUpdate,
+    DraftPatch,
+    DraftPatchResponse,
     DraftResponse,
+    CursorPage,
     MessageResponse
 )
-from app.auth import get_current_active_user
+from app.auth import get_async_current_active_user
+from app.pagination import paginate_desc, page_result
+from app.services.draft_buffer import DraftConflictError, get_draft_buffer
 
 router = APIRouter(prefix="/api/drafts", tags=["Drafts"])
 
 
 @router.post("", response_model=DraftResponse, status_code=status.HTTP_201_CREATED)
-def create_draft(
+async def create_draft(
     draft_data: DraftCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new draft (requires authentication)
@@ -37,48 +45,61 @@ def create_draft(
         content=draft_data.content,
         theme=draft_data.theme,
         hsk_level=draft_data.hsk_level,
-        char_count=draft_data.char_count
+        char_count=count_chinese_chars(draft_data.content)
     )
     
     db.add(draft)
-    db.commit()
-    db.refresh(draft)
+    await db.commit()
     
     return draft
 
 
-@router.get("", response_model=List[DraftResponse])
-def get_user_drafts(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+@router.get("", response_model=CursorPage[DraftResponse])
+async def get_user_drafts(
+    current_user: User = Depends(get_async_current_active_user),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get all drafts for the authenticated user (requires authentication)
+    Get the authenticated user's drafts (requires authentication)
 
-    Returns drafts ordered by most recently updated.
+    Returns a page of drafts ordered by most recently updated. Pass the
+    returned next_cursor as ?cursor= to get the following page.
     """
-    drafts = (
-        db.query(Draft)
-        .filter(Draft.user_id == current_user.id)
-        .order_by(Draft.updated_at.desc())
-        .all()
-    )
+    await asyncio.to_thread(get_draft_buffer().flush, user_id=current_user.id, reason="read")
+
+    statement = select(Draft).where(Draft.user_id == current_user.id)
+    statement = paginate_desc(statement, Draft.updated_at, Draft.id, limit, cursor)
+    result = await db.scalars(statement)
+    drafts, next_cursor = page_result(result.all(), Draft.updated_at, Draft.id, limit)
     
-    return drafts
+    return CursorPage[DraftResponse](
+        items=[DraftResponse.model_validate(draft) for draft in drafts],
+        next_cursor=next_cursor
+    )
 
 
 @router.get("/{draft_id}", response_model=DraftResponse)
-def get_draft(
+async def get_draft(
     draft_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a single draft by ID (requires authentication)
 
     User can only access their own drafts.
+
+    If edits acknowledged by PATCH could not be written because the draft
+    was saved elsewhere, the saved version is returned with
+    X-Draft-Conflict: true; save the full text with PUT to replace it.
     """
-    draft = db.query(Draft).filter(Draft.id == draft_id).first()
+    buffer = get_draft_buffer()
+    await asyncio.to_thread(buffer.flush, [draft_id], reason="read")
+
+    draft = await db.get(Draft, draft_id)
 
     if not draft:
         raise HTTPException(
@@ -93,15 +114,18 @@ def get_draft(
             detail="Not authorized to access this draft"
         )
 
+    if buffer.conflicted(draft_id):
+        response.headers["X-Draft-Conflict"] = "true"
+
     return draft
 
 
 @router.put("/{draft_id}", response_model=DraftResponse)
-def update_draft(
+async def update_draft(
     draft_id: str,
     draft_data: DraftUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a draft (requires authentication)
@@ -109,7 +133,12 @@ def update_draft(
     Updates the draft with new content. updated_at is automatically updated.
     User can only update their own drafts.
     """
-    draft = db.query(Draft).filter(Draft.id == draft_id).first()
+    # Buffered autosaves come first, so they are not lost or left to
+    # overwrite this update later
+    buffer = get_draft_buffer()
+    await asyncio.to_thread(buffer.flush, [draft_id], reason="save")
+
+    draft = await db.get(Draft, draft_id)
 
     if not draft:
         raise HTTPException(
@@ -129,31 +158,84 @@ def update_draft(
         draft.title = draft_data.title
     if draft_data.content is not None:
         draft.content = draft_data.content
+        draft.char_count = count_chinese_chars(draft_data.content)
+        draft.revision = (draft.revision or 0) + 1
     if draft_data.theme is not None:
         draft.theme = draft_data.theme
     if draft_data.hsk_level is not None:
         draft.hsk_level = draft_data.hsk_level
-    if draft_data.char_count is not None:
-        draft.char_count = draft_data.char_count
 
-    db.commit()
-    db.refresh(draft)
+    await db.commit()
+    # This save replaces any edits held back by a conflict
+    if buffer.conflicted(draft_id):
+        buffer.discard(draft_id)
+    await db.refresh(draft)
 
     return draft
 
 
+@router.patch("/{draft_id}", response_model=DraftPatchResponse)
+async def patch_draft(
+    draft_id: str,
+    patch: DraftPatch,
+    current_user: User = Depends(get_async_current_active_user)
+):
+    """
+    Apply text edits to a draft (requires authentication)
+
+    For autosave: send only the edits made since the last save, against
+    the revision that save returned. Returns the new revision without
+    echoing the content back.
+
+    Autosaves are buffered and written to the database once per window;
+    set save=true on explicit saves to write before the response.
+
+    Raises 409 if the draft changed since base_revision (e.g. saved from
+    another tab), or if earlier buffered edits could not be written because
+    of such a save; reload it with GET and retry against the new revision,
+    or save the full text with PUT.
+    """
+    buffer = get_draft_buffer()
+
+    try:
+        # The buffer uses its own (sync) sessions when it has to load or write
+        result = await asyncio.to_thread(buffer.apply_patch, draft_id, current_user.id, patch)
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Draft not found"
+        )
+    except PermissionError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this draft"
+        )
+    except DraftConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    return result
+
+
 @router.delete("/{draft_id}", response_model=MessageResponse)
-def delete_draft(
+async def delete_draft(
     draft_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a draft (requires authentication)
 
     User can only delete their own drafts.
     """
-    draft = db.query(Draft).filter(Draft.id == draft_id).first()
+    draft = await db.get(Draft, draft_id)
 
     if not draft:
         raise HTTPException(
@@ -168,7 +250,8 @@ def delete_draft(
             detail="Not authorized to delete this draft"
         )
 
-    db.delete(draft)
-    db.commit()
+    get_draft_buffer().discard(draft_id)
+    await db.delete(draft)
+    await db.commit()
 
     return MessageResponse(message="Draft deleted successfully")
\ No newline at end of file
@@ -3,35 +3,70 @@ Essay API endpoints
 
 Handles essay submission, retrieval, and analysis
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone, timedelta
+from contextlib import asynccontextmanager
+from typing import Optional, Union
 import asyncio
-
-from app.database import get_db
-from app.models import Essay, EssayAnalysis, User
+import hashlib
+import json
+import logging
+import math
+import uuid
+
+from app.database import get_async_db, AsyncSessionLocal
+from app.config import get_settings
+from app.models import Essay, EssayAnalysis, AnalysisJob, IdempotencyKey, User
 from app.schemas import (
     EssaySubmit,
     EssayResponse,
     EssayListItem,
     AnalysisResponse,
+    AnalysisJobResponse,
+    CursorPage,
     MessageResponse
 )
-from app.services.writing_analyzer import WritingAnalyzer
-from app.auth import get_current_active_user
+from app.services.writing_analyzer import WritingAnalyzer, get_writing_analyzer
+from app.services.analysis_jobs import get_job_queue
+from app.auth import get_async_current_active_user
+from app.pagination import paginate_desc, page_result
+from app.metrics import ANALYSIS_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
 
 # Create router
 router = APIRouter(prefix="/api/essays", tags=["Essays"])
 
-# Initialize analyzer (will be used for analysis)
-analyzer = WritingAnalyzer()
+
+def get_analyzer() -> WritingAnalyzer:
+    """
+    Dependency to get the shared analyzer (created on the first submission)
+
+    Raises:
+        HTTPException 503 if the analyzer cannot be created (e.g. no API key)
+    """
+    try:
+        return get_writing_analyzer()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Analysis service unavailable: {str(e)}"
+        )
 
 
 @router.post("/submit", response_model=AnalysisResponse, status_code=status.HTTP_201_CREATED)
 async def submit_essay(
     essay_data: EssaySubmit,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    analyzer: WritingAnalyzer = Depends(get_analyzer)
 ):
     """
     Submit an essay for analysis (requires authentication)
@@ -42,147 +77,496 @@ async def submit_essay(
     3. Stores analysis results
     4. Returns complete analysis
 
+    Send an `Idempotency-Key` header to make retries safe: a repeated key
+    returns the original analysis with `Idempotent-Replayed: true`, instead
+    of submitting the essay again. If that analysis is still running, the
+    retry waits briefly and then gets 409 with `Retry-After`. Reusing a key
+    with a different essay is rejected with 422.
+
     **Note:** This requires OpenAI API credits to work!
     """
-    # Create essay record for authenticated user
-    essay = Essay(
-        user_id=current_user.id,
-        title=essay_data.title,
-        content=essay_data.content,
-        theme=essay_data.theme,
-        target_hsk_level=essay_data.target_hsk_level
-    )
-    db.add(essay)
-    db.commit()
-    db.refresh(essay)
+    # Read once: rollbacks below expire current_user when it was loaded into
+    # this session, and reloading it lazily is not possible on an AsyncSession
+    user_id = current_user.id
+    request_hash = _request_hash(essay_data) if idempotency_key else None
+    idempotency = None
+
+    while True:
+        if idempotency_key:
+            found = await _idempotent_result(db, user_id, idempotency_key, request_hash)
+            if isinstance(found, EssayAnalysis):
+                response.headers["Idempotent-Replayed"] = "true"
+                return found
+            if found is not None:
+                # Taken over from a request that stopped: analyze its essay
+                essay = await db.get(Essay, found.essay_id)
+                if essay is not None:
+                    idempotency = found
+                    break
+                await db.execute(delete(IdempotencyKey).where(_holds_lease(found)))
+                await db.commit()
+                continue
+
+        # Create essay record for authenticated user
+        essay = Essay(
+            user_id=user_id,
+            title=essay_data.title,
+            content=essay_data.content,
+            theme=essay_data.theme,
+            target_hsk_level=essay_data.target_hsk_level
+        )
+        db.add(essay)
+        if idempotency_key:
+            idempotency = await _claim_idempotency_key(
+                db, user_id, idempotency_key, request_hash, essay
+            )
+        try:
+            with ANALYSIS_STAGE_SECONDS.time(stage="db_commit"):
+                await db.commit()
+            break
+        except IntegrityError:
+            if not idempotency_key:
+                raise
+            # A concurrent request with the same key got there first
+            await db.rollback()
     
-    print(f"\n{'='*60}")
-    print(f"📝 Analyzing essay: {essay.title}")
-    print(f"{'='*60}")
+    essay_id = essay.id
+    # Built now, while the key is loaded (a rollback would expire it)
+    lease = _holds_lease(idempotency) if idempotency is not None else None
+    logger.info("Analyzing essay", extra={'essay_id': essay_id})
     
     try:
         # Analyze essay with AI
-        analysis_result = await analyzer.analyze_essay(
-            text=essay_data.content,
-            target_hsk_level=essay_data.target_hsk_level,
-            language=essay_data.language
-        )
-        
-        # Extract scores from analysis
-        vocab = analysis_result['vocabulary']
-        sentences = analysis_result['sentences']
-        scoring = analysis_result['scoring']
+        with ANALYSIS_STAGE_SECONDS.time(stage="analysis"):
+            async with _lease_heartbeat(lease):
+                analysis_result = await analyzer.analyze_essay(
+                    text=essay_data.content,
+                    target_hsk_level=essay_data.target_hsk_level,
+                    language=essay_data.language
+                )
         
         # Create analysis record
-        essay_analysis = EssayAnalysis(
-            essay_id=essay.id,
-            
-            # Basic stats
-            char_count=analysis_result['basic_stats']['char_count'],
-            word_count=vocab['total_words'],
-            sentence_count=sentences['sentence_count'],
-            paragraph_count=analysis_result['basic_stats']['paragraph_count'],
-            
-            # Vocabulary scores
-            unique_words=vocab['unique_words'],
-            vocabulary_richness=vocab['ttr'],
-            vocabulary_score=vocab['vocabulary_richness_score'],
-            advanced_vocab_ratio=vocab['advanced_vocab_ratio'],
-            
-            # Sentence-level scores
-            sentence_quality_score=sentences['quality_score'],
-            
-            # Essay-level scores (from AI)
-            structure_score=scoring['breakdown'].get('structure', 0) if scoring.get('breakdown') else None,
-            coherence_score=scoring['breakdown'].get('coherence', 0) if scoring.get('breakdown') else None,
-            transition_score=scoring['breakdown'].get('transition', 0) if scoring.get('breakdown') else None,
-            logic_score=scoring['breakdown'].get('logic', 0) if scoring.get('breakdown') else None,
-            
-            # Detailed breakdown
-            grammar_score=scoring['breakdown'].get('grammar', 0) if scoring.get('breakdown') else None,
-            semantic_score=scoring['breakdown'].get('semantics', 0) if scoring.get('breakdown') else None,
-            collocation_score=scoring['breakdown'].get('collocation', 0) if scoring.get('breakdown') else None,
-            
-            # Overall score
-            overall_score=scoring['overall'],
-            
-            # Detailed JSON data
-            vocabulary_details=vocab.get('word_details', {}),
-            sentence_details=sentences['ai_analysis'].get('sentence_analysis', []),
-            essay_analysis=sentences['ai_analysis'].get('essay_analysis', {}),
-            hsk_distribution=vocab.get('hsk_distribution', {}),
-            recommendations=analysis_result.get('recommendations', []),
-            
-            # Metadata
-            analysis_language=essay_data.language
+        essay_analysis = EssayAnalysis.from_analysis_result(
+            essay_id,
+            analysis_result,
+            essay_data.language
         )
         
         db.add(essay_analysis)
-        db.commit()
-        db.refresh(essay_analysis)
+        if lease is not None:
+            # Complete the key in the same commit, if this request still holds it
+            completed = await db.execute(
+                update(IdempotencyKey)
+                .where(lease)
+                .values(status="completed")
+            )
+            if completed.rowcount == 0:
+                raise _LeaseLost()
+        try:
+            with ANALYSIS_STAGE_SECONDS.time(stage="db_commit"):
+                await db.commit()
+        except IntegrityError:
+            if lease is None:
+                raise
+            raise _LeaseLost()  # The other request stored its analysis first
+        await db.refresh(essay_analysis)
         
-        print(f"✅ Analysis complete!")
-        print(f"   Overall score: {essay_analysis.overall_score}/100")
-        print(f"{'='*60}\n")
+        logger.info(
+            "Essay analysis stored",
+            extra={'essay_id': essay_id, 'overall_score': essay_analysis.overall_score}
+        )
         
         return essay_analysis
+    
+    except _LeaseLost:
+        # A retry took the key over (this request looked stalled) and owns
+        # the essay now; answer with its result instead
+        await db.rollback()
+        logger.warning("Idempotency lease lost; replaying the other request", extra={'essay_id': essay_id})
+        found = await _idempotent_result(db, user_id, idempotency_key, request_hash, take_over=False)
+        if isinstance(found, EssayAnalysis):
+            response.headers["Idempotent-Replayed"] = "true"
+            return found
+        raise _still_processing()
         
     except Exception as e:
-        # If analysis fails, delete the essay and raise error
-        db.delete(essay)
-        db.commit()
+        # If analysis fails, delete the essay (and free its idempotency key) and raise error
+        await db.rollback()
+        owned = True
+        if lease is not None:
+            # Only while holding the key: otherwise the essay is another request's
+            freed = await db.execute(delete(IdempotencyKey).where(lease))
+            owned = freed.rowcount > 0
+        if owned:
+            essay = await db.get(Essay, essay_id)
+            if essay is not None:
+                await db.delete(essay)
+        await db.commit()
         
-        print(f"❌ Analysis failed: {e}")
+        logger.exception("Analysis failed", extra={'essay_id': essay_id})
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
         )
 
 
-@router.get("", response_model=List[EssayListItem])
-def get_user_essays(
-    current_user: User = Depends(get_current_active_user),
-    limit: int = 10,
-    offset: int = 0,
-    db: Session = Depends(get_db)
+@router.post("/submit-stream")
+async def submit_essay_stream(
+    essay_data: EssaySubmit,
+    current_user: User = Depends(get_async_current_active_user),
+    analyzer: WritingAnalyzer = Depends(get_analyzer)
 ):
     """
-    Get all essays for the authenticated user (requires authentication)
+    Submit an essay and stream the analysis as Server-Sent Events (requires authentication)
+
+    Events, in order:
+    - basic_stats, vocabulary: computed locally, sent immediately
+    - sentence: one per sentence, as the AI finishes each one
+    - essay: essay-level analysis (structure, coherence, ...)
+    - complete: the stored analysis (same body as POST /submit)
+    - error: analysis failed; the essay is not kept
 
-    Returns a list of essays with basic info and scores.
-    Use offset/limit for pagination.
+    The essay is stored together with its analysis, so nothing is kept if
+    the analysis fails or the client disconnects before it completes.
     """
-    essays = (
-        db.query(Essay)
-        .filter(Essay.user_id == current_user.id)
-        .order_by(Essay.submitted_at.desc())
-        .limit(limit)
-        .offset(offset)
-        .all()
+    # Inserted by _store_analysis, not here
+    essay = Essay(
+        id=str(uuid.uuid4()),
+        user_id=current_user.id,
+        title=essay_data.title,
+        content=essay_data.content,
+        theme=essay_data.theme,
+        target_hsk_level=essay_data.target_hsk_level,
+        submitted_at=datetime.now(timezone.utc)
     )
-    
-    # Convert to response format with scores from analysis
-    result = []
-    for essay in essays:
-        item = EssayListItem(
-            id=essay.id,
-            title=essay.title,
-            theme=essay.theme,
-            target_hsk_level=essay.target_hsk_level,
-            submitted_at=essay.submitted_at,
-            char_count=essay.char_count,
-            overall_score=essay.analysis.overall_score if essay.analysis else None
+    essay_id = essay.id
+
+    logger.info("Streaming analysis of essay", extra={'essay_id': essay_id})
+
+    async def events():
+        try:
+            async for event, data in analyzer.analyze_essay_stream(
+                text=essay_data.content,
+                target_hsk_level=essay_data.target_hsk_level,
+                language=essay_data.language
+            ):
+                if event == 'result':
+                    analysis = await _store_analysis(essay, data, essay_data.language)
+                    yield _sse('complete', analysis)
+                else:
+                    yield _sse(event, data)
+        except Exception as e:
+            logger.exception("Streamed analysis failed", extra={'essay_id': essay_id})
+            yield _sse('error', {'detail': f"Analysis failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _request_hash(essay_data: EssaySubmit) -> str:
+    """Fingerprint of a submission, to detect a key reused for another essay"""
+    return hashlib.sha256(essay_data.model_dump_json().encode('utf-8')).hexdigest()
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Database datetimes come back naive; they are stored in UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class _LeaseLost(Exception):
+    """Another request took over this request's Idempotency-Key"""
+
+
+def _still_processing() -> HTTPException:
+    """409 for a key whose original request is still being processed"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed; retry later",
+        headers={"Retry-After": str(max(1, math.ceil(get_settings().idempotency_heartbeat_seconds)))}
+    )
+
+
+def _holds_lease(record: IdempotencyKey):
+    """WHERE clause matching the key only while it is pending under record's lease"""
+    lease = (
+        IdempotencyKey.lease_token.is_(None) if record.lease_token is None
+        else IdempotencyKey.lease_token == record.lease_token
+    )
+    return (IdempotencyKey.id == record.id) & (IdempotencyKey.status == "pending") & lease
+
+
+async def _idempotent_result(
+    db: AsyncSession,
+    user_id: str,
+    key: str,
+    request_hash: str,
+    take_over: bool = True
+) -> Union[EssayAnalysis, IdempotencyKey, None]:
+    """
+    Outcome of an earlier request with the same Idempotency-Key
+
+    Waits up to settings.idempotency_wait_seconds while that request is
+    still running.
+
+    Returns:
+        Its stored analysis (replay it); or the key itself, taken over
+        under a new lease because the request stopped refreshing it (the
+        caller analyzes the key's essay); or None when the key is unused,
+        expired or freed by a failed request (process the submission)
+
+    Raises:
+        HTTPException 422 if the key was used for a different submission,
+        409 (with Retry-After) if the request is still running after the wait
+    """
+    settings = get_settings()
+    wait_until = datetime.now(timezone.utc) + timedelta(seconds=settings.idempotency_wait_seconds)
+    lease = timedelta(seconds=settings.idempotency_lease_seconds)
+    while True:
+        now = datetime.now(timezone.utc)
+        record = await db.scalar(
+            select(IdempotencyKey)
+            .where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at > now
+            )
+            .execution_options(populate_existing=True)
+        )
+        if record is None:
+            return None
+
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different submission"
+            )
+
+        if record.status == "completed":
+            analysis = await db.scalar(
+                select(EssayAnalysis).where(EssayAnalysis.essay_id == record.essay_id)
+            )
+            if analysis is not None:
+                return analysis
+            # The essay has since been deleted: treat the key as unused
+            await db.delete(record)
+            await db.commit()
+            return None
+
+        heartbeat = _as_utc(record.heartbeat_at or record.created_at)
+        if take_over and heartbeat + lease <= now:
+            # The original request stopped refreshing its lease: take over
+            # the key (and its essay) unless another retry got there first
+            token = str(uuid.uuid4())
+            taken = await db.execute(
+                update(IdempotencyKey)
+                .where(_holds_lease(record))
+                .values(lease_token=token, heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if taken.rowcount:
+                logger.warning("Taking over stalled idempotent submission", extra={'essay_id': record.essay_id})
+                await db.refresh(record)
+                return record
+            continue
+
+        if now >= wait_until:
+            raise _still_processing()
+
+        # Still running (here or in another worker): end the transaction so
+        # the next read sees its commit, then check again
+        await db.rollback()
+        await asyncio.sleep(0.5)
+
+
+@asynccontextmanager
+async def _lease_heartbeat(clause):
+    """Keep refreshing the lease matched by clause (see _holds_lease) while the with block runs"""
+    if clause is None:
+        yield
+        return
+
+    interval = get_settings().idempotency_heartbeat_seconds
+
+    async def beat():
+        while True:
+            await asyncio.sleep(interval)
+            # Own session: the request's session is in use meanwhile
+            async with AsyncSessionLocal() as session:
+                refreshed = await session.execute(
+                    update(IdempotencyKey).where(clause).values(heartbeat_at=datetime.now(timezone.utc))
+                )
+                await session.commit()
+            if refreshed.rowcount == 0:
+                return  # Lost the lease; completion will notice
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+
+async def _claim_idempotency_key(
+    db: AsyncSession,
+    user_id: str,
+    key: str,
+    request_hash: str,
+    essay: Essay
+) -> IdempotencyKey:
+    """
+    Add a pending IdempotencyKey for a new essay (committed with the essay)
+
+    The unique (user_id, key) constraint makes the commit fail if another
+    request claimed the key meanwhile. Expired keys are purged here.
+    """
+    now = datetime.now(timezone.utc)
+    await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now))
+    await db.flush()  # Assigns essay.id
+    record = IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        essay_id=essay.id,
+        status="pending",
+        lease_token=str(uuid.uuid4()),
+        heartbeat_at=now,
+        created_at=now,
+        expires_at=now + timedelta(hours=get_settings().idempotency_key_ttl_hours)
+    )
+    db.add(record)
+    return record
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _store_analysis(essay: Essay, analysis_result: dict, language: str) -> dict:
+    """Store a streamed essay with its analysis; returns it serialized like POST /submit"""
+    # Own session: the request's session is closed once streaming starts
+    async with AsyncSessionLocal() as db:
+        essay_analysis = EssayAnalysis.from_analysis_result(essay.id, analysis_result, language)
+        db.add(essay)
+        db.add(essay_analysis)
+        with ANALYSIS_STAGE_SECONDS.time(stage="db_commit"):
+            await db.commit()
+        await db.refresh(essay_analysis)
+        return AnalysisResponse.model_validate(essay_analysis).model_dump(mode='json')
+
+
+@router.post("/submit-async", response_model=AnalysisJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_essay_async(
+    essay_data: EssaySubmit,
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Submit an essay for background analysis (requires authentication)
+
+    Stores the essay, queues an analysis job and returns immediately.
+    Poll GET /api/essays/jobs/{job_id} (or GET /api/essays/{essay_id}/analysis,
+    which returns 202 until the analysis is ready).
+    """
+    essay = Essay(
+        user_id=current_user.id,
+        title=essay_data.title,
+        content=essay_data.content,
+        theme=essay_data.theme,
+        target_hsk_level=essay_data.target_hsk_level
+    )
+    db.add(essay)
+    await db.flush()
+
+    job = AnalysisJob(
+        essay_id=essay.id,
+        user_id=current_user.id,
+        language=essay_data.language
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    get_job_queue().notify()
+
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the status of an analysis job (requires authentication)
+
+    When status is "completed", fetch the result from
+    GET /api/essays/{essay_id}/analysis.
+    """
+    job = await db.get(AnalysisJob, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Analysis job not found"
         )
-        result.append(item)
+
+    if job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this analysis job"
+        )
+
+    return job
+
+
+@router.get("", response_model=CursorPage[EssayListItem])
+async def get_user_essays(
+    current_user: User = Depends(get_async_current_active_user),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the authenticated user's essays, newest first (requires authentication)
+
+    Returns a page of essays with basic info and scores. Pass the returned
+    next_cursor as ?cursor= to get the following page.
+    """
+    # One query, list columns only (no essay content), score joined in
+    statement = (
+        select(
+            Essay.id,
+            Essay.title,
+            Essay.theme,
+            Essay.target_hsk_level,
+            Essay.submitted_at,
+            Essay.char_count,
+            EssayAnalysis.overall_score
+        )
+        .outerjoin(EssayAnalysis, EssayAnalysis.essay_id == Essay.id)
+        .where(Essay.user_id == current_user.id)
+    )
+    statement = paginate_desc(statement, Essay.submitted_at, Essay.id, limit, cursor)
+    result = await db.execute(statement)
+    rows, next_cursor = page_result(result.all(), Essay.submitted_at, Essay.id, limit)
     
-    return result
+    return CursorPage[EssayListItem](
+        items=[EssayListItem.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
 
 
 @router.get("/{essay_id}", response_model=EssayResponse)
-def get_essay(
+async def get_essay(
     essay_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a single essay by ID (requires authentication)
@@ -190,7 +574,7 @@ def get_essay(
     Returns complete essay content.
     User can only access their own essays.
     """
-    essay = db.query(Essay).filter(Essay.id == essay_id).first()
+    essay = await db.get(Essay, essay_id)
 
     if not essay:
         raise HTTPException(
@@ -209,10 +593,10 @@ def get_essay(
 
 
 @router.get("/{essay_id}/analysis", response_model=AnalysisResponse)
-def get_essay_analysis(
+async def get_essay_analysis(
     essay_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get analysis results for an essay (requires authentication)
@@ -221,7 +605,7 @@ def get_essay_analysis(
     User can only access analysis for their own essays.
     """
     # First check if essay exists and belongs to user
-    essay = db.query(Essay).filter(Essay.id == essay_id).first()
+    essay = await db.get(Essay, essay_id)
 
     if not essay:
         raise HTTPException(
@@ -235,13 +619,33 @@ def get_essay_analysis(
             detail="Not authorized to access this essay's analysis"
         )
 
-    analysis = (
-        db.query(EssayAnalysis)
-        .filter(EssayAnalysis.essay_id == essay_id)
-        .first()
+    analysis = await db.scalar(
+        select(EssayAnalysis).where(EssayAnalysis.essay_id == essay_id)
     )
 
     if not analysis:
+        # Submitted in job mode: report progress instead of a plain 404
+        job = await db.scalar(
+            select(AnalysisJob)
+            .where(AnalysisJob.essay_id == essay_id)
+            .order_by(AnalysisJob.created_at.desc())
+            .limit(1)
+        )
+        if job and job.status in ("queued", "running"):
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "detail": "Analysis in progress",
+                    "job_id": job.id,
+                    "status": job.status
+                }
+            )
+        if job and job.status == "failed":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Analysis failed: {job.error}"
+            )
+
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found for this essay"
@@ -251,10 +655,10 @@ def get_essay_analysis(
 
 
 @router.delete("/{essay_id}", response_model=MessageResponse)
-def delete_essay(
+async def delete_essay(
     essay_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_async_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete an essay and its analysis (requires authentication)
@@ -262,7 +666,7 @@ def delete_essay(
     Cascade delete also removes the associated analysis.
     User can only delete their own essays.
     """
-    essay = db.query(Essay).filter(Essay.id == essay_id).first()
+    essay = await db.get(Essay, essay_id)
 
     if not essay:
         raise HTTPException(
@@ -277,7 +681,7 @@ def delete_essay(
             detail="Not authorized to delete this essay"
         )
 
-    db.delete(essay)
-    db.commit()
+    await db.delete(essay)
+    await db.commit()
 
     return MessageResponse(message="Essay deleted successfully")
\ No newline at end of file
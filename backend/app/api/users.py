@@ -3,12 +3,13 @@ User API endpoints
 
 Handles user authentication, registration, and settings
 """
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User, PasswordResetToken
 from app.schemas import (
     UserRegister,
@@ -19,13 +20,13 @@ from app.schemas import (
     MessageResponse
 )
 from app.auth import (
-    get_password_hash,
+    hash_password,
     authenticate_user,
     create_access_token,
-    get_current_active_user,
-    verify_password
+    get_current_active_user
 )
 from app.config import get_settings
+from app.services.user_cache import get_user_cache
 
 settings = get_settings()
 
@@ -33,15 +34,15 @@ router = APIRouter(prefix="/api/users", tags=["Users"])
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user with hashed password and return JWT token
     """
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User.id).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,7 +50,7 @@ def register_user(
         )
 
     # Check if username already exists
-    existing_username = db.query(User).filter(User.username == user_data.username).first()
+    existing_username = await db.scalar(select(User.id).where(User.username == user_data.username))
     if existing_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -60,14 +61,14 @@ def register_user(
     user = User(
         email=user_data.email,
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password(user_data.password),
         target_hsk_level=user_data.target_hsk_level,
         preferred_language=user_data.preferred_language
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
@@ -76,15 +77,15 @@ def register_user(
 
 
 @router.post("/login", response_model=Token)
-def login_user(
+async def login_user(
     user_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login with email and password, returns JWT token
     """
-    # Authenticate user
-    user = authenticate_user(user_data.email, user_data.password, db)
+    # Authenticate user (also upgrades an outdated password hash)
+    user = await authenticate_user(user_data.email, user_data.password, db)
 
     if not user:
         raise HTTPException(
@@ -95,7 +96,8 @@ def login_user(
 
     # Update last login time
     user.last_login = datetime.now(timezone.utc)
-    db.commit()
+    await db.commit()
+    get_user_cache().invalidate(user.id)
 
     # Create access token
     access_token = create_access_token(data={"sub": user.id})
@@ -139,18 +141,27 @@ def update_user_settings(
     """
     Update current user's settings (requires authentication)
     """
+    # current_user may be a cached copy; change the row itself
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     # Update settings
     if settings.target_hsk_level is not None:
-        current_user.target_hsk_level = settings.target_hsk_level
+        user.target_hsk_level = settings.target_hsk_level
     if settings.preferred_language is not None:
-        current_user.preferred_language = settings.preferred_language
+        user.preferred_language = settings.preferred_language
     if settings.dark_mode is not None:
-        current_user.dark_mode = settings.dark_mode
+        user.dark_mode = settings.dark_mode
 
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user)
+    get_user_cache().invalidate(user.id)
 
-    return current_user
+    return user
 
 # Password Reset Endpoints
 
@@ -205,10 +216,10 @@ def request_password_reset(
 
 
 @router.post("/reset-password", response_model=MessageResponse)
-def reset_password(
+async def reset_password(
     token: str,
     new_password: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Reset password using a valid token
@@ -221,9 +232,9 @@ def reset_password(
         )
     
     # Find the token
-    reset_token = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token == token
-    ).first()
+    reset_token = await db.scalar(
+        select(PasswordResetToken).where(PasswordResetToken.token == token)
+    )
     
     if not reset_token:
         raise HTTPException(
@@ -239,7 +250,7 @@ def reset_password(
         )
     
     # Get the user
-    user = db.query(User).filter(User.id == reset_token.user_id).first()
+    user = await db.get(User, reset_token.user_id)
     
     if not user:
         raise HTTPException(
@@ -248,12 +259,13 @@ def reset_password(
         )
     
     # Update password
-    user.hashed_password = get_password_hash(new_password)
+    user.hashed_password = await hash_password(new_password)
     
     # Mark token as used
     reset_token.used = 'Y'
     
-    db.commit()
+    await db.commit()
+    get_user_cache().invalidate(user.id)
     
     print(f"Password reset successful for user: {user.email}")
     
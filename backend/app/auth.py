@@ -4,19 +4,23 @@ Authentication utilities for user login and JWT tokens
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User
 from app.schemas.user import TokenData
+from app.services.password_hasher import PasswordHasherBusy, get_password_hasher
+from app.services.user_cache import get_user_cache
 
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context (bcrypt at settings.bcrypt_rounds); request
+# handlers use the pooled hash_password/authenticate_user instead
+pwd_context = get_password_hasher().context
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")
@@ -104,26 +108,70 @@ def verify_token(token: str, credentials_exception: HTTPException) -> TokenData:
         raise credentials_exception
 
 
-def authenticate_user(email: str, password: str, db: Session) -> Optional[User]:
+def _hasher_busy() -> HTTPException:
+    """503 for when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please try again in a moment",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password in the password hashing pool
+
+    Args:
+        password: The plain text password to hash
+
+    Returns:
+        The hashed password
+
+    Raises:
+        HTTPException 503 if the pool is saturated
+    """
+    try:
+        return await get_password_hasher().hash(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+
+async def authenticate_user(email: str, password: str, db: AsyncSession) -> Optional[User]:
     """
     Authenticate a user with email and password
 
+    If the stored hash uses an outdated cost factor, the user's
+    hashed_password is replaced with a fresh hash; the caller commits it.
+
     Args:
         email: User's email
         password: User's plain text password
-        db: Database session
+        db: Async database session
 
     Returns:
         User object if authentication succeeds, None otherwise
+
+    Raises:
+        HTTPException 503 if the password hashing pool is saturated
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
 
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    try:
+        matches, new_hash = await get_password_hasher().verify_and_update(
+            password, user.hashed_password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+    if not matches:
         return None
 
+    if new_hash is not None:
+        user.hashed_password = new_hash
+
     return user
 
 
@@ -134,6 +182,10 @@ def get_current_user(
     """
     Dependency to get the current authenticated user from JWT token
 
+    Recently seen users are served from the in-process user cache; the
+    returned User may then be a detached copy, so load it from the session
+    before changing it.
+
     Args:
         token: JWT token from Authorization header
         db: Database session
@@ -152,14 +204,66 @@ def get_current_user(
 
     token_data = verify_token(token, credentials_exception)
 
+    user_cache = get_user_cache()
+    user = user_cache.get(token_data.user_id)
+    if user is not None:
+        return user
+
     user = db.query(User).filter(User.id == token_data.user_id).first()
 
     if user is None:
         raise credentials_exception
 
+    user_cache.set(user)
+    return user
+
+
+async def get_async_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Async version of get_current_user, for routes using an AsyncSession
+
+    Args:
+        token: JWT token from Authorization header
+        db: Async database session
+
+    Returns:
+        The authenticated User object
+
+    Raises:
+        HTTPException 401 if authentication fails
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    token_data = verify_token(token, credentials_exception)
+
+    user_cache = get_user_cache()
+    user = user_cache.get(token_data.user_id)
+    if user is not None:
+        return user
+
+    user = await db.get(User, token_data.user_id)
+
+    if user is None:
+        raise credentials_exception
+
+    user_cache.set(user)
     return user
 
 
+async def get_async_current_active_user(
+    current_user: User = Depends(get_async_current_user)
+) -> User:
+    """Async version of get_current_active_user"""
+    return current_user
+
+
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     Dependency to get current active user (can be extended with user.is_active check)
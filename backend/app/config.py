@@ -1,6 +1,7 @@
 # backend/app/config.py
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -8,12 +9,103 @@ class Settings(BaseSettings):
     # App
     app_name: str = "Chinese Writing Coach"
     debug: bool = True
+    # Server processes (uvicorn --workers / gunicorn read WEB_CONCURRENCY too);
+    # per-process state such as the draft write buffer depends on it
+    web_concurrency: int = 1
 
-    # OpenAI API
-    openai_api_key: str
+    # Model providers, preferred first (e.g. "openai,anthropic"): later ones
+    # take calls that fail on earlier ones, or whose breaker is open. Keys
+    # are optional at startup; analysis endpoints return 503 without any.
+    llm_providers: str = "openai"
+    openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-4o"
+    openai_base_url: Optional[str] = None  # e.g. a local OpenAI-compatible server
+    anthropic_api_key: Optional[str] = None
+    anthropic_model: str = "claude-3-5-sonnet-latest"
+    anthropic_base_url: str = "https://api.anthropic.com"
+    llm_stats_window: int = 200  # Recent calls behind each provider's p50/p95/error rate
+    # Hedging: a call still running after max(llm_hedge_min_seconds, the
+    # primary's p95 latency) is also sent to the next provider (costs tokens)
+    llm_hedge_enabled: bool = False
+    llm_hedge_min_seconds: float = 5.0
+    llm_max_concurrency: int = 32  # In-flight model calls per worker
+    # Structured output: "json_schema" (replies must match the analysis
+    # schema), "json_object" (any JSON; for models without schema support)
+    # or "none" (rely on the prompt alone)
+    llm_response_format: str = "json_schema"
+    # Follow-up calls for sentences missing from a truncated or partial reply
+    analysis_repair_attempts: int = 1
+
+    # Model call policy (see app/services/llm_policy.py): deadlines, retries
+    # with jittered exponential backoff (or the provider's Retry-After), and
+    # a circuit breaker that switches essays to vocabulary-only analysis
+    llm_timeout_seconds: float = 60.0  # Per attempt; for streams, per chunk
+    llm_call_deadline_seconds: float = 120.0  # All attempts and waits together
+    llm_max_retries: int = 2
+    llm_retry_base_seconds: float = 1.0  # Backoff ceiling doubles per retry
+    llm_retry_max_seconds: float = 20.0  # Longest wait, including Retry-After
+    llm_breaker_window: int = 20  # Recent attempts considered
+    llm_breaker_min_calls: int = 10  # Never open on fewer attempts than this
+    llm_breaker_error_rate: float = 0.5  # Failed share that opens the breaker
+    llm_breaker_cooldown_seconds: float = 30.0  # Then one trial call
+
+    # Chunked analysis of long essays: sentence-level analysis is split by
+    # paragraph into concurrent calls, essay-level runs over an outline
+    analysis_chunk_min_chars: int = 1200  # Shorter essays use a single call
+    analysis_chunk_max_sentences: int = 15  # Sentences per chunk
+    analysis_chunk_concurrency: int = 4  # Concurrent chunk calls per essay
+
+    # Analysis result cache
+    analysis_cache_enabled: bool = True
+    analysis_cache_max_entries: int = 5000  # Per kind (essay, sentence)
+    analysis_cache_max_age_hours: int = 720  # 30 days
+
+    # Analysis job queue (0 workers = jobs are run by run_analysis_worker.py)
+    analysis_workers: int = 4  # In-process asyncio workers
+    analysis_job_poll_seconds: float = 2.0  # Check for jobs from other processes
+    analysis_job_max_attempts: int = 2
+    analysis_job_timeout_seconds: int = 600  # Running longer = worker died, retry
+
+    # Idempotency-Key on POST /api/essays/submit: retries with the same key
+    # get the original analysis (waiting briefly if it is still running)
+    idempotency_key_ttl_hours: int = 24
+    idempotency_wait_seconds: float = 10.0  # Then 409 with Retry-After; the client retries later
+    idempotency_heartbeat_seconds: float = 10.0  # The request processing a key refreshes its lease this often
+    idempotency_lease_seconds: float = 60.0  # A key not refreshed for this long is taken over by a retry
+
+    # Draft autosave write buffer: patches to the same draft within the
+    # window are coalesced into one database write. The buffer is per
+    # process, so it is only used with a single server process
+    # (web_concurrency <= 1); with more, patches are written through.
+    draft_write_buffer_enabled: bool = True
+    draft_write_window_seconds: float = 2.0
+
+    # jieba prefix-dict cache, loaded in the background at startup
+    # (relative paths are resolved against backend/)
+    jieba_cache_file: str = "data/jieba.cache"
+
+    # Logging: JSON lines on stdout, written by a background thread
+    log_level: str = "INFO"  # WARNING in production skips per-request detail
+    log_format: str = "json"  # or "text"
 
     # Database
     database_url: str = "sqlite:///./chinese_writing.db"
+    database_echo: bool = False  # Log every SQL statement
+
+    # SQLite connection profile: "performance" (WAL journal, relaxed fsync,
+    # lock waits, memory-mapped reads) or "default" (SQLite's own settings)
+    sqlite_profile: str = "performance"
+    sqlite_synchronous: str = "NORMAL"  # NORMAL is durable in WAL mode except on power loss
+    sqlite_busy_timeout_ms: int = 5000  # Wait this long for a lock instead of failing
+    sqlite_mmap_size: int = 268435456  # 256 MB
+    sqlite_cache_size_kib: int = 65536  # 64 MB page cache per connection
+
+    # Connection pool (server databases such as PostgreSQL; ignored for SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Reconnect connections older than this (seconds)
+    db_pool_pre_ping: bool = True
 
     # JWT Authentication
     # IMPORTANT: Generate a secure secret key for production!
@@ -22,7 +114,19 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 24 hours
-    
+
+    # Password hashing: bcrypt runs in its own thread pool; once
+    # password_hash_max_pending operations are running or queued, further
+    # logins/registrations get a 503 instead of waiting
+    bcrypt_rounds: int = 12  # Changing this rehashes passwords at next login
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 32
+
+    # Authenticated-user cache (per process; 0 disables). Changes made
+    # through another worker show up here after at most the TTL.
+    user_cache_ttl_seconds: float = 30.0
+    user_cache_max_entries: int = 10000
+
     class Config:
         env_file = ".env"
 
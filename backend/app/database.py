@@ -2,39 +2,143 @@
 """
 Database connection and session management
 
-Sets up SQLite database connection and provides:
-- Database engine
-- Session factory
+Sets up the database connection and provides:
+- Database engine (SQLite tuned on connect, or a pooled server database)
+- Session factories: sync (services, scripts, sync routes) and async
+  (aiosqlite / asyncpg, for async routes)
 - Base class for all models
 - Database initialization function
 """
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event, inspect, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
 from dotenv import load_dotenv
 
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables
 load_dotenv()
 
-# Get database URL from environment (.env file)
-# Default to SQLite if not specified
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chinese_writing.db")
 
-print(f"Database URL: {DATABASE_URL}")
+def sqlite_pragmas(settings) -> dict:
+    """PRAGMAs applied to every new SQLite connection for the configured profile"""
+    if settings.sqlite_profile != "performance":
+        return {}
+    return {
+        # Readers no longer block the writer (and vice versa)
+        "journal_mode": "WAL",
+        # fsync at checkpoints instead of on every commit
+        "synchronous": settings.sqlite_synchronous,
+        # Wait for the write lock instead of raising "database is locked"
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        # Negative = size in KiB rather than pages
+        "cache_size": -settings.sqlite_cache_size_kib,
+    }
+
+
+def build_engine(database_url: str, settings=None):
+    """
+    Create an engine for database_url using the configured profile
+
+    SQLite: PRAGMAs from sqlite_pragmas() are set on each connection.
+    Other databases: a QueuePool sized from the db_pool_* settings.
+    """
+    settings = settings or get_settings()
+
+    if database_url.startswith("sqlite"):
+        # check_same_thread=False: sessions are used from the threadpool
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            echo=settings.database_echo
+        )
+        _apply_sqlite_pragmas(engine, settings)
+        return engine
+
+    return create_engine(database_url, echo=settings.database_echo, **_pool_options(settings))
+
+
+def build_async_engine(database_url: str, settings=None):
+    """
+    Async counterpart of build_engine() for the same database
+
+    The URL's driver is swapped for its asyncio driver (aiosqlite for
+    SQLite, asyncpg for PostgreSQL); the same profile/pool settings apply.
+    """
+    settings = settings or get_settings()
+    async_url = async_database_url(database_url)
+
+    if async_url.startswith("sqlite"):
+        engine = create_async_engine(async_url, echo=settings.database_echo)
+        _apply_sqlite_pragmas(engine.sync_engine, settings)
+        return engine
+
+    return create_async_engine(async_url, echo=settings.database_echo, **_pool_options(settings))
+
+
+def async_database_url(database_url: str) -> str:
+    """Database URL with the asyncio driver for its backend"""
+    scheme, separator, rest = database_url.partition("://")
+    backend = scheme.split("+")[0]
+    driver = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "postgres": "asyncpg"}.get(backend)
+    if driver is None:
+        return database_url
+    if backend == "postgres":
+        backend = "postgresql"
+    return f"{backend}+{driver}{separator}{rest}"
+
+
+def _apply_sqlite_pragmas(engine, settings) -> None:
+    """Set the profile's PRAGMAs on every new connection of a (sync) engine"""
+    pragmas = sqlite_pragmas(settings)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _pool_options(settings) -> dict:
+    """QueuePool sizing for server databases"""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+DATABASE_URL = get_settings().database_url
 
 # Create database engine
-# For SQLite, we need check_same_thread=False to allow multiple threads
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False  # Set to True to see SQL queries (useful for debugging)
-)
+engine = build_engine(DATABASE_URL)
 
 # Create session factory
 # Sessions are used to interact with the database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and session factory for async routes
+# (expire_on_commit=False: attributes stay loaded after commit, since
+# lazy refreshes are not possible on an AsyncSession)
+async_engine = build_async_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for all models
 # All your models inherit from this
 Base = declarative_base()
@@ -49,6 +153,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency providing an AsyncSession for the request"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
 
     # Import all models here so SQLAlchemy knows about them
@@ -57,12 +167,109 @@ def init_db():
     from app.models.essay import Essay, Draft
     from app.models.analysis import EssayAnalysis, SampleEssay
     from app.models.password_reset import PasswordResetToken
+    from app.models.analysis_cache import AnalysisCacheEntry
+    from app.models.analysis_job import AnalysisJob
+    from app.models.idempotency_key import IdempotencyKey
 
-    print("Creating database tables")
-    print(f"   Models to create: User, Essay, Draft, EssayAnalysis, SampleEssay, PasswordResetToken")
+    database = engine.url.render_as_string(hide_password=True)
+    logger.info("Creating database tables in %s", database)
 
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
-    print("Database initialized successfully!")
-    print(f"   Tables created in: {DATABASE_URL}")
\ No newline at end of file
+    # Bring tables created by older versions up to date
+    added = _add_missing_columns()
+    for table, column in added:
+        logger.info("Added column %s.%s", table, column)
+    if ("essays", "char_count") in added:
+        _backfill_essay_char_counts()
+    for index in _add_missing_indexes():
+        logger.info("Added index %s", index)
+
+    logger.info("Database initialized (%s tables)", len(Base.metadata.tables))
+
+
+def _add_missing_columns():
+    """
+    Add model columns that are missing from existing tables
+
+    create_all() only creates missing tables, so columns added to a model
+    later are added here: with the column's scalar default (NOT NULL if
+    the model says so), otherwise as a nullable column.
+
+    Returns:
+        List of (table, column) pairs that were added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                default = column.default
+                if default is not None and default.is_scalar:
+                    ddl += f" DEFAULT {default.arg!r}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                added.append((table.name, column.name))
+
+    return added
+
+
+def _add_missing_indexes():
+    """
+    Create model indexes that are missing from existing tables
+
+    Returns:
+        Names of the indexes that were created
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+
+    return created
+
+
+def _backfill_essay_char_counts(batch_size: int = 500):
+    """Fill Essay.char_count for essays stored before the column existed"""
+    from app.models.essay import Essay, count_chinese_chars
+
+    db = SessionLocal()
+    try:
+        last_id = ""
+        while True:
+            rows = (
+                db.query(Essay.id, Essay.content)
+                .filter(Essay.id > last_id)
+                .order_by(Essay.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            db.execute(update(Essay), [
+                {'id': row.id, 'char_count': count_chinese_chars(row.content)}
+                for row in rows
+            ])
+            db.commit()
+            last_id = rows[-1].id
+    finally:
+        db.close()
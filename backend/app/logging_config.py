@@ -0,0 +1,177 @@
+"""
+Structured logging
+
+Log records are written as JSON lines (or plain text, for local work) by a
+background thread: handlers on the request path only put the record on a
+queue, so a slow or contended stdout never stalls a request. Each record
+carries the id of the request (or job) it was logged from.
+
+Settings:
+    log_level: DEBUG, INFO, WARNING, ... for the app's own loggers (records
+        below it cost one level check); other libraries log WARNING and up
+    log_format: "json" or "text"
+
+Usage:
+    import logging
+    logger = logging.getLogger(__name__)
+
+    logger.info("Essay analyzed", extra={'essay_id': essay.id, 'score': 87})
+
+Extra fields are added to the JSON object. Pass values as arguments
+("%s") rather than f-strings so disabled levels skip the formatting.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import get_settings
+
+# Id of the request (or job) being handled; set by RequestIdMiddleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            entry['request_id'] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = "-"
+        return super().format(record)
+
+
+class _ContextQueueHandler(QueueHandler):
+    """
+    Queue handler that captures request context on the calling thread
+
+    The message and traceback are rendered here (arguments may change after
+    the call returns); JSON encoding and the write happen on the listener.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return record
+
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None) -> None:
+    """
+    Route all logging through a queue to a JSON (or text) stdout handler
+
+    Safe to call more than once; later calls only change the level.
+    """
+    global _listener
+    settings = get_settings()
+    level = (level or settings.log_level).upper()
+    log_format = log_format or settings.log_format
+
+    # log_level applies to this app; libraries only report warnings and up
+    root = logging.getLogger()
+    logging.getLogger("app").setLevel(level)
+    root.setLevel(max(logging.WARNING, logging.getLevelName(level)))
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)  # Write out what is still queued
+
+    root.handlers = [_ContextQueueHandler(log_queue)]
+
+
+def new_request_id() -> str:
+    """Short random id for a request or job"""
+    return uuid.uuid4().hex[:16]
+
+
+class RequestIdMiddleware:
+    """
+    Give each HTTP request a correlation id
+
+    Uses the caller's X-Request-ID when it looks sane, otherwise makes one;
+    the id is set for everything logged while handling the request
+    (including streamed responses) and echoed in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = REQUEST_ID_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self._header:
+                value = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(value):
+                    request_id = value
+                break
+        request_id = request_id or new_request_id()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((self._header, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
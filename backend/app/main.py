@@ -1,17 +1,49 @@
 """
 FastAPI main application
 """
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import routers
 from app.api import essays, drafts, users
+from app.services.vocabulary_analyzer import initialize_jieba
+from app.services.analysis_jobs import get_job_queue
+from app.services.draft_buffer import get_draft_buffer
+from app.metrics import render_prometheus
+from app.logging_config import setup_logging, RequestIdMiddleware
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup/shutdown hooks
+
+    Analyzers are created lazily on first use; here we only start loading
+    jieba's dictionary in the background so startup is not blocked by it,
+    and start the analysis job workers and the draft write buffer.
+    """
+    threading.Thread(target=initialize_jieba, name="jieba-warmup", daemon=True).start()
+    job_queue = get_job_queue()
+    draft_buffer = get_draft_buffer()
+    await job_queue.start()
+    await draft_buffer.start()
+    yield
+    await draft_buffer.stop()
+    await job_queue.stop()
+
 
 # Create app
 app = FastAPI(
     title="Chinese Writing Coach API",
     description="AI-powered Chinese writing analysis system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware (allows frontend to call backend)
@@ -23,6 +55,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Correlation id for every request (X-Request-ID), attached to its log records
+app.add_middleware(RequestIdMiddleware)
+
 # Register routers
 app.include_router(essays.router)
 app.include_router(drafts.router)
@@ -41,4 +76,9 @@ def read_root():
 # Health check
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+# Metrics (Prometheus text format)
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return render_prometheus()
\ No newline at end of file
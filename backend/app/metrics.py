@@ -0,0 +1,223 @@
+"""
+In-process metrics
+
+A small registry of counters, gauges and histograms, exposed in the Prometheus
+text format at GET /metrics. Metrics are per process: with several
+workers, scrape each one (or aggregate in Prometheus).
+
+Usage:
+    from app.metrics import counter, gauge, histogram
+
+    DRAFT_COMMITS = counter("draft_writes_committed_total", "Draft writes committed")
+    DRAFT_COMMITS.inc()
+    REQUESTS = counter("llm_calls_total", "Model calls", labels=("outcome",))
+    REQUESTS.inc(outcome="success")
+
+    ERROR_RATE = gauge("llm_provider_error_rate", "Recent error rate", labels=("provider",))
+    ERROR_RATE.set(0.02, provider="openai")
+
+    FLUSH_TIME = histogram("draft_flush_seconds", "Draft buffer flush latency")
+    with FLUSH_TIME.time():
+        ...
+
+Metrics shared by several modules are defined at the bottom of this file.
+"""
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterable, List, Tuple
+
+_lock = threading.Lock()
+_metrics: Dict[str, "_Metric"] = {}
+
+# Seconds; covers in-process stages (milliseconds) up to model calls (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class _Metric:
+    """Named metric with optional labels"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally split by label values"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Add amount (default 1) for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current value for the given label values"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """(metric name, label pairs, value) for every series"""
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labels:
+            values[()] = 0
+        return [
+            (self.name, tuple(zip(self.labels, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally split by label values"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Set the value for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels) -> float:
+        """Current value for the given label values"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """(metric name, label pairs, value) for every series"""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            (self.name, tuple(zip(self.labels, key)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies) in fixed buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one value for the given label values"""
+        key = self._key(labels)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the seconds spent in the with block (also when it raises)"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """Cumulative _bucket series plus _sum and _count, per label set"""
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            pairs = tuple(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                samples.append((f"{self.name}_bucket", pairs + (("le", le),), cumulative))
+            samples.append((f"{self.name}_sum", pairs, total))
+            samples.append((f"{self.name}_count", pairs, cumulative))
+        return samples
+
+
+def _register(metric_class, name: str, *args, **kwargs):
+    """Get the metric registered under name, creating it on first use"""
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = metric_class(name, *args, **kwargs)
+        elif not isinstance(metric, metric_class):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+        return metric
+
+
+def counter(name: str, description: str, labels: Iterable[str] = ()) -> Counter:
+    """Get or create a counter"""
+    return _register(Counter, name, description, labels)
+
+
+def gauge(name: str, description: str, labels: Iterable[str] = ()) -> Gauge:
+    """Get or create a gauge"""
+    return _register(Gauge, name, description, labels)
+
+
+def histogram(
+    name: str,
+    description: str,
+    labels: Iterable[str] = (),
+    buckets: Iterable[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Get or create a histogram"""
+    return _register(Histogram, name, description, labels, buckets)
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        metrics = sorted(_metrics.values(), key=lambda m: m.name)
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        for name, pairs, value in metric.samples():
+            lines.append(f"{name}{_format_labels(pairs)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+# SHARED METRICS
+
+# Recorded by the analyzers and the essay endpoints
+ANALYSIS_STAGE_SECONDS = histogram(
+    "analysis_stage_seconds", "Time spent in each stage of an essay analysis", labels=("stage",)
+)
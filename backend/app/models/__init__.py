@@ -6,6 +6,9 @@ from app.models.user import User
 from app.models.essay import Essay, Draft
 from app.models.analysis import EssayAnalysis, SampleEssay
 from app.models.password_reset import PasswordResetToken
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.analysis_job import AnalysisJob
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -13,5 +16,8 @@ __all__ = [
     "Draft",
     "EssayAnalysis",
     "SampleEssay",
-    "PasswordResetToken"
+    "PasswordResetToken",
+    "AnalysisCacheEntry",
+    "AnalysisJob",
+    "IdempotencyKey"
 ]
\ No newline at end of file
@@ -105,6 +105,57 @@ class EssayAnalysis(Base):
     # RELATIONSHIPS
     essay = relationship("Essay", back_populates="analysis")
     
+    @classmethod
+    def from_analysis_result(cls, essay_id: str, analysis_result: dict, language: str) -> "EssayAnalysis":
+        """Build an analysis record from WritingAnalyzer.analyze_essay() output"""
+        vocab = analysis_result['vocabulary']
+        sentences = analysis_result['sentences']
+        scoring = analysis_result['scoring']
+        breakdown = scoring.get('breakdown')
+        
+        return cls(
+            essay_id=essay_id,
+            
+            # Basic stats
+            char_count=analysis_result['basic_stats']['char_count'],
+            word_count=vocab['total_words'],
+            sentence_count=sentences['sentence_count'],
+            paragraph_count=analysis_result['basic_stats']['paragraph_count'],
+            
+            # Vocabulary scores
+            unique_words=vocab['unique_words'],
+            vocabulary_richness=vocab['ttr'],
+            vocabulary_score=vocab['vocabulary_richness_score'],
+            advanced_vocab_ratio=vocab['advanced_vocab_ratio'],
+            
+            # Sentence-level scores
+            sentence_quality_score=sentences['quality_score'],
+            
+            # Essay-level scores (from AI)
+            structure_score=breakdown.get('structure', 0) if breakdown else None,
+            coherence_score=breakdown.get('coherence', 0) if breakdown else None,
+            transition_score=breakdown.get('transition', 0) if breakdown else None,
+            logic_score=breakdown.get('logic', 0) if breakdown else None,
+            
+            # Detailed breakdown
+            grammar_score=breakdown.get('grammar', 0) if breakdown else None,
+            semantic_score=breakdown.get('semantics', 0) if breakdown else None,
+            collocation_score=breakdown.get('collocation', 0) if breakdown else None,
+            
+            # Overall score
+            overall_score=scoring['overall'],
+            
+            # Detailed JSON data
+            vocabulary_details=vocab.get('word_details', {}),
+            sentence_details=sentences['ai_analysis'].get('sentence_analysis', []),
+            essay_analysis=sentences['ai_analysis'].get('essay_analysis', {}),
+            hsk_distribution=vocab.get('hsk_distribution', {}),
+            recommendations=analysis_result.get('recommendations', []),
+            
+            # Metadata
+            analysis_language=language
+        )
+    
     def __repr__(self):
         return f"<EssayAnalysis essay_id={self.essay_id} score={self.overall_score}>"
 
@@ -0,0 +1,33 @@
+# backend/app/models/analysis_cache.py
+"""
+Analysis cache model
+"""
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from datetime import datetime, timezone
+
+from app.database import Base
+
+
+class AnalysisCacheEntry(Base):
+    """
+    Cached analysis result
+
+    Content-addressed: the key is a hash of the normalized input text plus
+    everything else that changes the output (HSK level, language, model,
+    prompt version), so identical resubmissions skip the AI call.
+    """
+    __tablename__ = "analysis_cache"
+
+    # sha256 hex digest of the normalized inputs
+    key = Column(String(64), primary_key=True)
+    kind = Column(String(20), nullable=False, index=True)  # "essay" or "sentence"
+
+    payload = Column(JSON, nullable=False)  # Cached analysis result
+
+    # Metadata (used for age- and size-based eviction)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    last_used_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    hit_count = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<AnalysisCacheEntry {self.kind} {self.key[:12]} hits={self.hit_count}>"
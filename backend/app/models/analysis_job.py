@@ -0,0 +1,43 @@
+# backend/app/models/analysis_job.py
+"""
+Analysis job model (database-backed job queue)
+"""
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+import uuid
+
+from app.database import Base
+
+
+class AnalysisJob(Base):
+    """
+    Queued essay analysis
+
+    Created when an essay is submitted in job mode. Workers claim queued
+    jobs (status queued -> running), run the analysis and store the result
+    as the essay's EssayAnalysis (status completed), or record the error
+    (status failed) once max attempts are used up.
+    """
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    essay_id = Column(String(36), ForeignKey("essays.id"), nullable=False, index=True)
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+
+    # Job state
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    language = Column(String(10), default="en")  # Analysis output language
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+
+    # Metadata
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    # Relationships
+    essay = relationship("Essay", back_populates="analysis_jobs")
+
+    def __repr__(self):
+        return f"<AnalysisJob {self.id[:8]} essay={self.essay_id[:8]} {self.status}>"
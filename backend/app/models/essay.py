@@ -2,16 +2,34 @@
 """
 Essay and Draft models
 """
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
+import re
 import uuid
 
 from app.database import Base
 
+CHINESE_CHAR_PATTERN = re.compile(r'[\u4e00-\u9fa5]')
+
+
+def count_chinese_chars(text: str) -> int:
+    """Number of Chinese characters in text (punctuation and Latin excluded)"""
+    return len(CHINESE_CHAR_PATTERN.findall(text or ""))
+
+
+def _content_char_count(context) -> int:
+    """Column default: count the characters of the row's content on insert"""
+    return count_chinese_chars(context.get_current_parameters().get('content'))
+
+
 class Essay(Base):
     """Submitted essay model"""
     __tablename__ = "essays"
+    __table_args__ = (
+        # Per-user list, newest first (cursor pagination)
+        Index("ix_essays_user_id_submitted_at", "user_id", "submitted_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
@@ -21,6 +39,7 @@ class Essay(Base):
     content = Column(Text, nullable=False)
     theme = Column(String(100))
     target_hsk_level = Column(Integer, nullable=False)
+    char_count = Column(Integer, nullable=False, default=_content_char_count)  # Chinese characters, set on insert
     
     # Metadata
     submitted_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
@@ -28,13 +47,7 @@ class Essay(Base):
     # Relationships
     user = relationship("User", back_populates="essays")
     analysis = relationship("EssayAnalysis", back_populates="essay", uselist=False, cascade="all, delete-orphan")
-    
-    # Computed property
-    @property
-    def char_count(self) -> int:
-        import re
-        chinese_chars = re.findall(r'[\u4e00-\u9fa5]', self.content)
-        return len(chinese_chars)
+    analysis_jobs = relationship("AnalysisJob", back_populates="essay", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Essay {self.title[:30]} ({self.char_count} chars)>"
@@ -44,6 +57,10 @@ class Essay(Base):
 class Draft(Base):
     """Draft essay model"""
     __tablename__ = "drafts"
+    __table_args__ = (
+        # Per-user list, most recently updated first (cursor pagination)
+        Index("ix_drafts_user_id_updated_at", "user_id", "updated_at"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
@@ -53,7 +70,8 @@ class Draft(Base):
     content = Column(Text)
     theme = Column(String(100))
     hsk_level = Column(Integer)
-    char_count = Column(Integer, default=0)
+    char_count = Column(Integer, default=0)  # Chinese characters, computed server-side
+    revision = Column(Integer, nullable=False, default=0)  # Bumped on every content change (edit conflicts)
     
     # Metadata
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,50 @@
+# backend/app/models/idempotency_key.py
+"""
+Idempotency key model (safe retries of essay submissions)
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime, timezone
+import uuid
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key sent with an essay submission
+
+    Maps a client-chosen key to the essay it created, so a retried request
+    returns that essay's analysis instead of submitting it again. The row
+    is pending while the analysis runs, completed once it is stored, and
+    deleted if the analysis fails (the client may then retry for real).
+    Keys are per user and expire after settings.idempotency_key_ttl_hours.
+
+    The request processing a pending key holds its lease (lease_token) and
+    refreshes heartbeat_at while it works. Only a key whose heartbeat has
+    stopped for settings.idempotency_lease_seconds is taken over by a retry,
+    which then analyzes the same essay under a new lease.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+
+    # Hash of the request body; the same key with a different body is rejected
+    request_hash = Column(String(64), nullable=False)
+    essay_id = Column(String(36), ForeignKey("essays.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, completed
+
+    # Lease of the request processing a pending key
+    lease_token = Column(String(36))
+    heartbeat_at = Column(DateTime)
+
+    # Metadata
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key[:16]} essay={self.essay_id[:8]} {self.status}>"
@@ -0,0 +1,78 @@
+"""
+Cursor (keyset) pagination helpers
+
+List endpoints page through rows ordered newest first by (timestamp, id)
+and hand out an opaque continuation token for the last row of each page.
+The next page continues strictly after that row, so the cost of a page
+does not grow with how deep the client has scrolled (unlike OFFSET) and
+rows inserted meanwhile never shift or duplicate items.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Opaque token for the position (timestamp, id)"""
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Position encoded in a token
+
+    Raises:
+        HTTPException 400 if the token is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate_desc(statement, timestamp_column, id_column, limit: int, cursor: Optional[str]):
+    """
+    Restrict a select() to one page, newest first, continuing after cursor
+
+    Fetches one row more than limit; pass the rows to page_result().
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        statement = statement.where(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id)
+        ))
+
+    # The extra row tells whether there is a next page
+    return (
+        statement
+        .order_by(timestamp_column.desc(), id_column.desc())
+        .limit(limit + 1)
+    )
+
+
+def page_result(rows, timestamp_column, id_column, limit: int):
+    """
+    Split fetched rows into the page and the token for the next one
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
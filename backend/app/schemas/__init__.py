@@ -15,18 +15,23 @@ from app.schemas.essay import (
     EssayListItem,
     DraftCreate,
     DraftUpdate,
+    DraftTextOp,
+    DraftPatch,
+    DraftPatchResponse,
     DraftResponse
 )
 from app.schemas.analysis import (
     AnalysisResponse,
     AnalysisSummary,
+    AnalysisJobResponse,
     SampleEssayResponse,
     SampleEssayListItem
 )
 from app.schemas.common import (
     MessageResponse,
     ErrorResponse,
-    PaginatedResponse
+    PaginatedResponse,
+    CursorPage
 )
 
 __all__ = [
@@ -43,14 +48,19 @@ __all__ = [
     "EssayListItem",
     "DraftCreate",
     "DraftUpdate",
+    "DraftTextOp",
+    "DraftPatch",
+    "DraftPatchResponse",
     "DraftResponse",
     # Analysis
     "AnalysisResponse",
     "AnalysisSummary",
+    "AnalysisJobResponse",
     "SampleEssayResponse",
     "SampleEssayListItem",
     # Common
     "MessageResponse",
     "ErrorResponse",
     "PaginatedResponse",
+    "CursorPage",
 ]
\ No newline at end of file
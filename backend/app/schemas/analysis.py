@@ -67,6 +67,22 @@ class AnalysisSummary(BaseModel):
     class Config:
         from_attributes = True
 
+# ANALYSIS JOB SCHEMAS
+
+class AnalysisJobResponse(BaseModel):
+    """Schema for a queued essay analysis (poll until status is completed)"""
+    id: str
+    essay_id: str
+    status: str  # queued, running, completed, failed
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
 # SAMPLE ESSAY SCHEMAS
 
 class SampleEssayResponse(BaseModel):
@@ -2,7 +2,9 @@
 Common schemas used across the API
 """
 from pydantic import BaseModel
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Generic, TypeVar
+
+T = TypeVar("T")
 
 
 class MessageResponse(BaseModel):
@@ -48,4 +50,18 @@ class PaginatedResponse(BaseModel):
                 "page_size": 10,
                 "total_pages": 10
             }
-        }
\ No newline at end of file
+        }
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """One page of a cursor-paginated list"""
+    items: List[T]
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page; null on the last page
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [],
+                "next_cursor": "WyIyMDI1LTAxLTAxVDEyOjAwOjAwIiwiYWJjIl0"
+            }
+        }
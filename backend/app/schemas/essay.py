@@ -3,7 +3,7 @@ Pydantic schemas for Essay and Draft
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # ESSAY SUBMISSION
 
@@ -37,7 +37,7 @@ class EssayResponse(BaseModel):
     theme: Optional[str]
     target_hsk_level: int
     submitted_at: datetime
-    char_count: int  # From @property
+    char_count: int  # Stored at submit time
     
     class Config:
         from_attributes = True
@@ -64,7 +64,7 @@ class DraftCreate(BaseModel):
     content: Optional[str] = None
     theme: Optional[str] = None
     hsk_level: Optional[int] = Field(None, ge=1, le=6)
-    char_count: int = Field(default=0, ge=0)
+    char_count: int = Field(default=0, ge=0)  # Ignored: computed from content
 
 
 class DraftUpdate(BaseModel):
@@ -73,7 +73,35 @@ class DraftUpdate(BaseModel):
     content: Optional[str] = None
     theme: Optional[str] = None
     hsk_level: Optional[int] = None
-    char_count: Optional[int] = None
+    char_count: Optional[int] = None  # Ignored: computed from content
+
+
+class DraftTextOp(BaseModel):
+    """One text edit: delete `delete` characters at `offset`, then insert `insert` there"""
+    offset: int = Field(..., ge=0)  # In Unicode code points
+    delete: int = Field(default=0, ge=0)
+    insert: str = ""
+
+
+class DraftPatch(BaseModel):
+    """Schema for an incremental draft update (autosave)"""
+    base_revision: int = Field(..., ge=0)  # Revision the ops were made against
+    ops: List[DraftTextOp] = Field(default_factory=list)  # Applied in order
+    title: Optional[str] = Field(None, max_length=255)
+    theme: Optional[str] = None
+    hsk_level: Optional[int] = Field(None, ge=1, le=6)
+    save: bool = False  # Explicit save: write now instead of after the autosave window
+
+
+class DraftPatchResponse(BaseModel):
+    """Schema for the result of a draft patch (content not echoed back)"""
+    id: str
+    revision: int
+    char_count: int
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
 
 
 class DraftResponse(BaseModel):
@@ -85,6 +113,7 @@ class DraftResponse(BaseModel):
     theme: Optional[str]
     hsk_level: Optional[int]
     char_count: int
+    revision: int
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,176 @@
+"""
+Persistent Analysis Cache
+
+Stores analysis results in the database, keyed on a hash of the normalized
+essay text and every setting that affects the result. Repeat submissions of
+the same essay are answered from here instead of calling the AI again.
+
+Eviction:
+- Age: entries older than max_age_hours are ignored and deleted
+- Size: only the max_entries most recently used entries per kind are kept
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.analysis_cache import AnalysisCacheEntry
+
+
+class AnalysisCache:
+    """Database-backed, content-addressed cache for analysis results"""
+
+    # Keys per IN (...) query, well below SQLite's bound-parameter limit
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_age_hours: Optional[int] = None,
+        session_factory=SessionLocal
+    ):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.analysis_cache_max_entries
+        self.max_age = timedelta(
+            hours=max_age_hours if max_age_hours is not None else settings.analysis_cache_max_age_hours
+        )
+        self.session_factory = session_factory
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        Normalize text so trivially different submissions share a key
+
+        Applies NFKC (full-width/half-width forms), collapses runs of
+        whitespace, drops spaces next to Chinese characters and punctuation,
+        and drops blank lines. Paragraph breaks are kept because they change
+        the analysis.
+        """
+        text = unicodedata.normalize("NFKC", text)
+        lines = []
+        for line in text.split('\n'):
+            line = re.sub(r'\s+', ' ', line)
+            line = re.sub(r' ?([^\x00-\x7f]) ?', r'\1', line)
+            lines.append(line.strip())
+        return '\n'.join(line for line in lines if line)
+
+    @classmethod
+    def make_key(cls, kind: str, text: str, *parts) -> str:
+        """Build a cache key from the kind, the text and any other inputs (level, language, ...)"""
+        h = hashlib.sha256()
+        h.update(kind.encode('utf-8'))
+        h.update(b'\x1f')
+        h.update(cls.normalize_text(text).encode('utf-8'))
+        for part in parts:
+            h.update(b'\x1f')
+            h.update(str(part).encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, kind: str, key: str) -> Optional[Dict]:
+        """Return the cached payload, or None on a miss or expired entry"""
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            entry = (
+                db.query(AnalysisCacheEntry)
+                .filter(
+                    AnalysisCacheEntry.key == key,
+                    AnalysisCacheEntry.kind == kind,
+                    AnalysisCacheEntry.created_at >= now - self.max_age
+                )
+                .first()
+            )
+            if entry is None:
+                return None
+
+            entry.last_used_at = now
+            entry.hit_count = (entry.hit_count or 0) + 1
+            payload = entry.payload
+            db.commit()
+            return payload
+        finally:
+            db.close()
+
+    def get_many(self, kind: str, keys: List[str]) -> Dict[str, Dict]:
+        """Return {key: payload} for every key that is cached and not expired"""
+        now = datetime.now(timezone.utc)
+        found = {}
+        db = self.session_factory()
+        try:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), self.BATCH_SIZE):
+                batch = unique_keys[start:start + self.BATCH_SIZE]
+                entries = (
+                    db.query(AnalysisCacheEntry)
+                    .filter(
+                        AnalysisCacheEntry.key.in_(batch),
+                        AnalysisCacheEntry.kind == kind,
+                        AnalysisCacheEntry.created_at >= now - self.max_age
+                    )
+                    .all()
+                )
+                for entry in entries:
+                    entry.last_used_at = now
+                    entry.hit_count = (entry.hit_count or 0) + 1
+                    found[entry.key] = entry.payload
+
+            if found:
+                db.commit()
+            return found
+        finally:
+            db.close()
+
+    def set(self, kind: str, key: str, payload: Dict) -> None:
+        """Store (or replace) a payload, then apply eviction"""
+        self.set_many(kind, {key: payload})
+
+    def set_many(self, kind: str, items: Dict[str, Dict]) -> None:
+        """Store (or replace) several payloads in one transaction, then apply eviction"""
+        if not items:
+            return
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            keys = list(items)
+            existing = {}
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[start:start + self.BATCH_SIZE]
+                for entry in db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.key.in_(batch)):
+                    existing[entry.key] = entry
+
+            for key, payload in items.items():
+                entry = existing.get(key)
+                if entry is None:
+                    entry = AnalysisCacheEntry(key=key, kind=kind)
+                    db.add(entry)
+                entry.payload = payload
+                entry.created_at = now
+                entry.last_used_at = now
+            db.commit()
+
+            self._evict(db, kind, now)
+        finally:
+            db.close()
+
+    def _evict(self, db, kind: str, now: datetime) -> None:
+        """Delete expired entries and trim the least recently used overflow"""
+        db.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.created_at < now - self.max_age
+        ).delete(synchronize_session=False)
+
+        overflow = (
+            db.query(AnalysisCacheEntry.key)
+            .filter(AnalysisCacheEntry.kind == kind)
+            .order_by(AnalysisCacheEntry.last_used_at.desc())
+            .offset(self.max_entries)
+            .all()
+        )
+        if overflow:
+            db.query(AnalysisCacheEntry).filter(
+                AnalysisCacheEntry.key.in_([row.key for row in overflow])
+            ).delete(synchronize_session=False)
+
+        db.commit()
@@ -0,0 +1,293 @@
+"""
+Analysis Job Queue
+
+Runs essay analyses outside the HTTP request. The database is the queue:
+submit endpoints insert an AnalysisJob row, and asyncio workers claim jobs
+with a conditional UPDATE (queued -> running), so several processes can
+drain the same table safely.
+
+Workers run inside the API process (started from the app lifespan) or in a
+separate process via run_analysis_worker.py; set analysis_workers=0 on the
+API side to size model concurrency independently of the web workers.
+
+A job that outlives the job timeout can be claimed again while its first
+run is still going, so outcomes are only recorded by the run holding the
+current claim (status running, same started_at); a late run's result is
+dropped. Results the model could not produce (analysis_unavailable) are
+treated as failures, so the job is retried instead of completing with an
+empty analysis.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_, and_
+from sqlalchemy.exc import IntegrityError
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.logging_config import request_id_var
+from app.models import Essay, EssayAnalysis, AnalysisJob
+from app.services.writing_analyzer import get_writing_analyzer
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisJobQueue:
+    """Database-backed analysis job queue with in-process asyncio workers"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        job_timeout: Optional[int] = None,
+        session_factory=SessionLocal
+    ):
+        settings = get_settings()
+        self.workers = workers if workers is not None else settings.analysis_workers
+        self.poll_interval = poll_interval if poll_interval is not None else settings.analysis_job_poll_seconds
+        self.max_attempts = max_attempts if max_attempts is not None else settings.analysis_job_max_attempts
+        self.job_timeout = timedelta(
+            seconds=job_timeout if job_timeout is not None else settings.analysis_job_timeout_seconds
+        )
+        self.session_factory = session_factory
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running_jobs = set()  # Job ids claimed by this process
+
+    # WORKER LIFECYCLE
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"analysis-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info("Analysis job queue started (%s worker(s))", self.workers)
+
+    async def stop(self) -> None:
+        """Stop the workers and put their unfinished jobs back in the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._running_jobs:
+            await asyncio.to_thread(self._requeue, list(self._running_jobs))
+            self._running_jobs.clear()
+
+    def notify(self) -> None:
+        """Wake idle workers (call after enqueueing a job)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, number: int) -> None:
+        """Claim and run jobs until cancelled"""
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await asyncio.to_thread(self._claim_next)
+            except Exception as e:
+                logger.error("Analysis worker %s could not claim a job: %s", number, e)
+                job = None
+
+            if job is None:
+                # Nothing queued: sleep until notified or the next poll
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._running_jobs.add(job['id'])
+            try:
+                await self.run_job(job)
+            finally:
+                self._running_jobs.discard(job['id'])
+
+    # QUEUE OPERATIONS
+
+    def _claim_next(self) -> Optional[Dict]:
+        """
+        Claim the oldest runnable job
+
+        Runnable means queued, or running for longer than the job timeout
+        (its worker died). The conditional UPDATE makes the claim atomic
+        across workers and processes.
+        """
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            runnable = or_(
+                AnalysisJob.status == "queued",
+                and_(
+                    AnalysisJob.status == "running",
+                    AnalysisJob.started_at < now - self.job_timeout
+                )
+            )
+            candidates = (
+                db.query(AnalysisJob.id, AnalysisJob.status, AnalysisJob.started_at)
+                .filter(runnable)
+                .order_by(AnalysisJob.created_at)
+                .limit(5)
+                .all()
+            )
+            for candidate in candidates:
+                # Only succeeds if nobody claimed the job since we read it
+                unchanged = (
+                    AnalysisJob.started_at.is_(None)
+                    if candidate.started_at is None
+                    else AnalysisJob.started_at == candidate.started_at
+                )
+                claimed = (
+                    db.query(AnalysisJob)
+                    .filter(
+                        AnalysisJob.id == candidate.id,
+                        AnalysisJob.status == candidate.status,
+                        unchanged
+                    )
+                    .update(
+                        {
+                            AnalysisJob.status: "running",
+                            AnalysisJob.started_at: now,
+                            AnalysisJob.attempts: AnalysisJob.attempts + 1
+                        },
+                        synchronize_session=False
+                    )
+                )
+                db.commit()
+                if claimed:
+                    job = db.query(AnalysisJob).filter(AnalysisJob.id == candidate.id).first()
+                    essay = db.query(Essay).filter(Essay.id == job.essay_id).first()
+                    if essay is None:
+                        job.status = "failed"
+                        job.error = "Essay not found"
+                        db.commit()
+                        continue
+                    return {
+                        'id': job.id,
+                        'essay_id': job.essay_id,
+                        'started_at': job.started_at,
+                        'attempts': job.attempts,
+                        'language': job.language or "en",
+                        'content': essay.content,
+                        'target_hsk_level': essay.target_hsk_level
+                    }
+            return None
+        finally:
+            db.close()
+
+    async def run_job(self, job: Dict) -> None:
+        """Analyze one claimed job and record the outcome"""
+        # Everything logged while running the job carries its id
+        request_id_var.set(f"job-{job['id'][:8]}")
+        logger.info("Running analysis job (attempt %s)", job['attempts'], extra={'essay_id': job['essay_id']})
+        try:
+            analyzer = get_writing_analyzer()
+            analysis_result = await analyzer.analyze_essay(
+                text=job['content'],
+                target_hsk_level=job['target_hsk_level'],
+                language=job['language']
+            )
+        except Exception as e:
+            logger.exception("Analysis job failed", extra={'essay_id': job['essay_id']})
+            await asyncio.to_thread(self._record_failure, job, str(e))
+            return
+
+        if analysis_result['sentences']['ai_analysis'].get('analysis_unavailable'):
+            # Fallback result (model failing or breaker open): retry later
+            # rather than completing the job with an empty analysis
+            logger.warning("Analysis job got no model analysis", extra={'essay_id': job['essay_id']})
+            await asyncio.to_thread(self._record_failure, job, "Model analysis unavailable")
+            return
+
+        if await asyncio.to_thread(self._record_success, job, analysis_result):
+            logger.info("Analysis job complete", extra={'essay_id': job['essay_id']})
+
+    def _owned(self, db, job: Dict):
+        """Query for the job row, if this run still holds its claim"""
+        return db.query(AnalysisJob).filter(
+            AnalysisJob.id == job['id'],
+            AnalysisJob.status == "running",
+            AnalysisJob.started_at == job['started_at']
+        )
+
+    def _record_success(self, job: Dict, analysis_result: Dict) -> bool:
+        """
+        Store the analysis and mark the job completed, in one transaction
+
+        Returns:
+            False if the job was claimed again meanwhile (nothing stored)
+        """
+        completed = {
+            AnalysisJob.status: "completed",
+            AnalysisJob.error: None,
+            AnalysisJob.finished_at: datetime.now(timezone.utc)
+        }
+        db = self.session_factory()
+        try:
+            if not self._owned(db, job).update(completed, synchronize_session=False):
+                db.rollback()
+                logger.warning("Analysis job was claimed again; result dropped", extra={'essay_id': job['essay_id']})
+                return False
+
+            if db.query(Essay.id).filter(Essay.id == job['essay_id']).first():
+                db.add(EssayAnalysis.from_analysis_result(job['essay_id'], analysis_result, job['language']))
+            try:
+                db.commit()
+            except IntegrityError:
+                # The essay already has an analysis (one per essay): done
+                db.rollback()
+                self._owned(db, job).update(completed, synchronize_session=False)
+                db.commit()
+            return True
+        finally:
+            db.close()
+
+    def _record_failure(self, job: Dict, error: str) -> None:
+        """Requeue the job, or mark it failed once max attempts are used"""
+        final = job['attempts'] >= self.max_attempts
+        db = self.session_factory()
+        try:
+            self._owned(db, job).update(
+                {
+                    AnalysisJob.status: "failed" if final else "queued",
+                    AnalysisJob.error: error,
+                    AnalysisJob.finished_at: datetime.now(timezone.utc) if final else None
+                },
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _requeue(self, job_ids: List[str]) -> None:
+        """Put running jobs back in the queue (used on shutdown)"""
+        db = self.session_factory()
+        try:
+            db.query(AnalysisJob).filter(
+                AnalysisJob.id.in_(job_ids),
+                AnalysisJob.status == "running"
+            ).update(
+                {
+                    AnalysisJob.status: "queued",
+                    AnalysisJob.attempts: AnalysisJob.attempts - 1
+                },
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+@lru_cache()
+def get_job_queue() -> AnalysisJobQueue:
+    """Get the process-wide job queue"""
+    return AnalysisJobQueue()
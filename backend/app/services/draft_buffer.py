@@ -0,0 +1,326 @@
+"""
+Draft Write Buffer
+
+Autosave patches (PATCH /api/drafts/{id}) land here instead of going
+straight to the database. The buffer keeps the latest state of each draft
+being edited and writes it back once per window, so a burst of saves of
+the same draft costs one UPDATE, and all drafts that are due are written
+in a single commit.
+
+The buffered state is the source of truth while a draft is pending:
+revision checks run against it, and reads of a pending draft flush it
+first. Pending drafts are flushed when their window expires, on explicit
+saves, and on shutdown.
+
+Patches with save=true are written before they are acknowledged.
+
+The flush is conditional on the revision last written, so a save made
+elsewhere (a PUT, or another process) is never overwritten. The buffered
+copy is then kept, marked as conflicting and no longer written: the next
+PATCH of the draft gets a 409 and a GET reports it (X-Draft-Conflict), so
+the client re-saves its full text with PUT, which replaces it.
+
+The buffer is per process, so it assumes a single server process: with
+several workers, a patch landing on a worker other than the one holding the
+draft would be checked against the stale database revision. When
+web_concurrency is above 1 the buffer is disabled and every patch is
+written through.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import update
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.metrics import counter
+from app.models import Draft
+from app.models.essay import count_chinese_chars
+from app.services.draft_edits import apply_text_ops
+
+logger = logging.getLogger(__name__)
+
+DRAFT_WRITES_RECEIVED = counter(
+    "draft_writes_received_total", "Draft patches accepted by the write buffer"
+)
+DRAFT_WRITES_COALESCED = counter(
+    "draft_writes_coalesced_total", "Draft patches merged into an already pending write"
+)
+DRAFT_WRITES_COMMITTED = counter(
+    "draft_writes_committed_total", "Draft rows written by the write buffer"
+)
+DRAFT_FLUSHES = counter(
+    "draft_buffer_flushes_total", "Write buffer commits", labels=("reason",)
+)
+DRAFT_WRITE_CONFLICTS = counter(
+    "draft_write_conflicts_total", "Buffered drafts not written because they were saved elsewhere"
+)
+
+# Draft columns held in the buffer
+FIELDS = ('content', 'char_count', 'title', 'theme', 'hsk_level', 'revision', 'updated_at')
+
+
+class DraftConflictError(Exception):
+    """The patch was made against an outdated revision"""
+
+
+class DraftWriteBuffer:
+    """Coalesces draft patches in memory and writes them back in batches"""
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        session_factory=SessionLocal
+    ):
+        settings = get_settings()
+        self.window = window_seconds if window_seconds is not None else settings.draft_write_window_seconds
+        if enabled is None:
+            enabled = settings.draft_write_buffer_enabled and settings.web_concurrency <= 1
+        self.enabled = enabled and self.window > 0
+        self.session_factory = session_factory
+
+        # draft id -> {'user_id', 'written_revision', 'since', 'conflict', <FIELDS>}
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # PATCHING
+
+    def apply_patch(self, draft_id: str, user_id: str, patch) -> Dict:
+        """
+        Apply a DraftPatch to the draft's latest state
+
+        Returns:
+            Dict with id, revision, char_count and updated_at
+
+        Raises:
+            LookupError: draft does not exist
+            PermissionError: draft belongs to another user
+            DraftConflictError: patch.base_revision is not the current revision,
+                or the draft was saved elsewhere before these edits were written
+            ValueError: an edit falls outside the text
+        """
+        loaded = self._entry(draft_id)
+
+        with self._lock:
+            # Prefer the pending copy if another patch got there first
+            entry = self._pending.get(draft_id, loaded)
+            if entry['user_id'] != user_id:
+                raise PermissionError(draft_id)
+            if entry['conflict']:
+                raise DraftConflictError(
+                    "Draft was saved elsewhere before your last edits were written; "
+                    "reload it or save your full text again"
+                )
+            if entry['revision'] != patch.base_revision:
+                raise DraftConflictError(
+                    f"Draft is at revision {entry['revision']}, not {patch.base_revision}"
+                )
+
+            changes = {}
+            if patch.ops:
+                content = apply_text_ops(entry['content'], patch.ops)
+                changes['content'] = content
+                changes['char_count'] = count_chinese_chars(content)
+            for field in ('title', 'theme', 'hsk_level'):
+                value = getattr(patch, field)
+                if value is not None:
+                    changes[field] = value
+
+            if changes:
+                DRAFT_WRITES_RECEIVED.inc()
+                if draft_id in self._pending:
+                    DRAFT_WRITES_COALESCED.inc()
+                else:
+                    entry['since'] = time.monotonic()
+                    self._pending[draft_id] = entry
+                entry.update(changes)
+                entry['revision'] += 1
+                entry['updated_at'] = datetime.now(timezone.utc)
+
+            result = {
+                'id': draft_id,
+                'revision': entry['revision'],
+                'char_count': entry['char_count'],
+                'updated_at': entry['updated_at']
+            }
+
+        if changes and (patch.save or not self.enabled):
+            # Written before acknowledging
+            self.flush([draft_id], reason="save" if self.enabled else "write_through")
+            if self.conflicted(draft_id):
+                if not self.enabled:
+                    # Nothing of it was acknowledged, so nothing to keep
+                    self.discard(draft_id)
+                raise DraftConflictError("Draft was saved elsewhere; reload it and retry")
+        return result
+
+    def _entry(self, draft_id: str) -> Dict:
+        """
+        Pending state of a draft, or a fresh copy loaded from the database
+
+        The pending dict itself is returned, so if a flush writes and drops
+        it meanwhile it still matches the database (see flush).
+        """
+        with self._lock:
+            entry = self._pending.get(draft_id)
+            if entry is not None:
+                return entry
+
+        db = self.session_factory()
+        try:
+            draft = db.query(Draft).filter(Draft.id == draft_id).first()
+            if draft is None:
+                raise LookupError(draft_id)
+            loaded = {field: getattr(draft, field) for field in FIELDS}
+        finally:
+            db.close()
+
+        loaded['revision'] = loaded['revision'] or 0
+        loaded['user_id'] = draft.user_id
+        loaded['written_revision'] = loaded['revision']
+        loaded['conflict'] = False
+
+        return loaded
+
+    def discard(self, draft_id: str) -> None:
+        """Forget pending changes (the draft is being deleted or overwritten)"""
+        with self._lock:
+            self._pending.pop(draft_id, None)
+
+    def conflicted(self, draft_id: str) -> bool:
+        """Whether acknowledged edits of the draft could not be written"""
+        with self._lock:
+            entry = self._pending.get(draft_id)
+            return entry is not None and entry['conflict']
+
+    # FLUSHING
+
+    def flush(
+        self,
+        draft_ids: Optional[Iterable[str]] = None,
+        user_id: Optional[str] = None,
+        due_only: bool = False,
+        reason: str = "explicit"
+    ) -> int:
+        """
+        Write pending drafts to the database in one commit
+
+        Args:
+            draft_ids: Only these drafts (default: all pending)
+            user_id: Only drafts of this user
+            due_only: Only drafts whose window has expired
+            reason: Label for the flush counter
+
+        Returns:
+            Number of drafts written
+        """
+        # One flush at a time, so two flushes never write the same revision
+        with self._flush_lock:
+            now = time.monotonic()
+            with self._lock:
+                ids = self._pending.keys() if draft_ids is None else draft_ids
+                snapshots = []
+                for draft_id in list(ids):
+                    entry = self._pending.get(draft_id)
+                    if entry is None or entry['conflict']:
+                        continue
+                    if user_id is not None and entry['user_id'] != user_id:
+                        continue
+                    if due_only and now - entry['since'] < self.window:
+                        continue
+                    snapshots.append((draft_id, dict(entry)))
+
+            if not snapshots:
+                return 0
+
+            written, conflicts = self._write(snapshots)
+
+            with self._lock:
+                for draft_id, snapshot in snapshots:
+                    entry = self._pending.get(draft_id)
+                    if entry is None:
+                        continue
+                    if draft_id in conflicts:
+                        # Kept until the client re-saves (PUT) or deletes it
+                        entry['conflict'] = True
+                        continue
+                    # Also on entries being dropped: apply_patch may hold one
+                    # (from _entry) and put it back as the draft's state
+                    entry['written_revision'] = snapshot['revision']
+                    if entry['revision'] == snapshot['revision']:
+                        # Nothing newer arrived while writing
+                        del self._pending[draft_id]
+
+            DRAFT_FLUSHES.inc(reason=reason)
+            DRAFT_WRITES_COMMITTED.inc(written)
+            return written
+
+    def _write(self, snapshots: List) -> tuple:
+        """UPDATE each draft if nobody else wrote it since our last write; one commit"""
+        written = 0
+        conflicts = set()
+        db = self.session_factory()
+        try:
+            for draft_id, snapshot in snapshots:
+                result = db.execute(
+                    update(Draft)
+                    .where(
+                        Draft.id == draft_id,
+                        Draft.revision == snapshot['written_revision']
+                    )
+                    .values({field: snapshot[field] for field in FIELDS})
+                )
+                if result.rowcount:
+                    written += 1
+                else:
+                    conflicts.add(draft_id)
+                    DRAFT_WRITE_CONFLICTS.inc()
+                    logger.warning(
+                        "Draft was saved elsewhere; buffered edits held back",
+                        extra={'draft_id': draft_id, 'revision': snapshot['revision']}
+                    )
+            db.commit()
+        finally:
+            db.close()
+        return written, conflicts
+
+    # BACKGROUND FLUSHER
+
+    async def start(self) -> None:
+        """Start flushing expired windows in the background"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="draft-write-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        written = await asyncio.to_thread(self.flush, reason="shutdown")
+        if written:
+            logger.info("Flushed %s buffered draft(s)", written)
+
+    async def _run(self) -> None:
+        """Check for expired windows a few times per window"""
+        interval = max(0.05, self.window / 4)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.flush, due_only=True, reason="window")
+            except Exception:
+                logger.exception("Draft write buffer flush failed")
+
+
+@lru_cache()
+def get_draft_buffer() -> DraftWriteBuffer:
+    """Get the process-wide draft write buffer"""
+    return DraftWriteBuffer()
@@ -0,0 +1,40 @@
+"""
+Draft Text Edits
+
+Autosave sends edits instead of the whole draft: a list of operations,
+each deleting `delete` characters at `offset` and inserting `insert` there.
+Offsets count Unicode code points and refer to the text as left by the
+previous operation, so a client can send ops in the order it made them.
+"""
+from typing import Iterable
+
+
+def apply_text_ops(text: str, ops: Iterable) -> str:
+    """
+    Apply edit operations to text
+
+    Args:
+        text: Current draft content
+        ops: Objects (or dicts) with offset, delete and insert
+
+    Returns:
+        The edited text
+
+    Raises:
+        ValueError if an operation falls outside the text
+    """
+    parts = text or ""
+    for number, op in enumerate(ops, start=1):
+        if isinstance(op, dict):
+            offset, delete, insert = op.get('offset', 0), op.get('delete', 0), op.get('insert', '')
+        else:
+            offset, delete, insert = op.offset, op.delete, op.insert
+
+        if offset < 0 or delete < 0 or offset + delete > len(parts):
+            raise ValueError(
+                f"Operation {number} (offset {offset}, delete {delete}) is outside "
+                f"the text ({len(parts)} characters)"
+            )
+        parts = parts[:offset] + (insert or "") + parts[offset + delete:]
+
+    return parts
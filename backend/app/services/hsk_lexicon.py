@@ -0,0 +1,202 @@
+"""
+Compiled HSK Lexicon
+
+data/hsk_vocabulary.json stays the source of truth. This module compiles it
+into a compact binary file that is memory-mapped read-only, so every worker
+process shares one copy of the lexicon through the OS page cache instead of
+each parsing the JSON into its own dict of dicts.
+
+Build (from backend/, after every change to the JSON):
+    python build_lexicon.py
+
+File layout (little-endian):
+    header   magic, entry count, sha256 of the source JSON
+    index    one fixed-size record per word, sorted by UTF-8 bytes:
+             word offset/length, HSK level, pinyin offset/length,
+             translation offset/length
+    strings  UTF-8 blob the records point into
+
+Lookups binary-search the index directly in the mapped file.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"HSKLEX01"
+HEADER = struct.Struct("<8sI32s")
+RECORD = struct.Struct("<IHBIHIH")
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../data')
+DEFAULT_JSON_PATH = os.path.join(DATA_DIR, 'hsk_vocabulary.json')
+DEFAULT_BIN_PATH = os.path.join(DATA_DIR, 'hsk_vocabulary.bin')
+
+
+def file_digest(path: str) -> bytes:
+    """sha256 of a file's bytes"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def compile_lexicon(json_path: str = DEFAULT_JSON_PATH, out_path: str = DEFAULT_BIN_PATH) -> int:
+    """
+    Compile the JSON vocabulary into the binary format
+
+    The file is written next to the target and renamed into place, so
+    running workers keep their existing mapping until they restart.
+
+    Returns:
+        Number of words written
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        vocab = json.load(f)
+    digest = file_digest(json_path)
+
+    blob = bytearray()
+
+    def add_string(value: str) -> Tuple[int, int]:
+        data = value.encode('utf-8')
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+
+    records = []
+    for word in sorted(vocab, key=lambda w: w.encode('utf-8')):
+        entry = vocab[word]
+        word_ref = add_string(word)
+        pinyin_ref = add_string(entry.get('pinyin', ''))
+        translation_ref = add_string(entry.get('translation', ''))
+        records.append(RECORD.pack(
+            word_ref[0], word_ref[1],
+            int(entry['level']),
+            pinyin_ref[0], pinyin_ref[1],
+            translation_ref[0], translation_ref[1]
+        ))
+
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(records), digest))
+        f.write(b''.join(records))
+        f.write(bytes(blob))
+    os.replace(tmp_path, out_path)
+
+    return len(records)
+
+
+class HSKLexicon:
+    """
+    Read-only, memory-mapped HSK lexicon
+
+    Behaves like the JSON dict for the operations the analyzers use
+    (len, in, iteration, get/[] returning {'level', 'pinyin',
+    'translation'}), plus lookup() returning a tuple for the hot path.
+    """
+
+    def __init__(self, path: str = DEFAULT_BIN_PATH, cache_size: int = 20000):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self.source_digest = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a compiled HSK lexicon: {path}")
+
+        self._index_start = HEADER.size
+        self._strings_start = self._index_start + self._count * RECORD.size
+
+        # Small per-process cache of hot words on top of the shared mapping
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, word: str) -> bool:
+        return self.lookup(word) is not None
+
+    def __getitem__(self, word: str) -> Dict:
+        entry = self.get(word)
+        if entry is None:
+            raise KeyError(word)
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            offset, length = RECORD.unpack_from(self._mm, self._index_start + i * RECORD.size)[:2]
+            yield self._string(offset, length)
+
+    def get(self, word: str, default=None) -> Optional[Dict]:
+        """Entry as a dict like the JSON source, or default"""
+        entry = self.lookup(word)
+        if entry is None:
+            return default
+        return {'level': entry[1], 'pinyin': entry[2], 'translation': entry[3]}
+
+    def _lookup(self, word: str) -> Optional[Tuple[str, int, str, str]]:
+        """
+        Binary search for a word
+
+        Returns:
+            (distribution key, level, pinyin, translation) or None
+        """
+        target = word.encode('utf-8')
+        mm = self._mm
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = RECORD.unpack_from(mm, self._index_start + mid * RECORD.size)
+            start = self._strings_start + record[0]
+            candidate = mm[start:start + record[1]]
+            if candidate < target:
+                lo = mid + 1
+            elif candidate > target:
+                hi = mid
+            else:
+                _, _, level, p_off, p_len, t_off, t_len = record
+                return (
+                    str(level),
+                    level,
+                    self._string(p_off, p_len),
+                    self._string(t_off, t_len)
+                )
+        return None
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_start + offset
+        return self._mm[start:start + length].decode('utf-8')
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def load_hsk_vocabulary(
+    json_path: str = DEFAULT_JSON_PATH,
+    bin_path: str = DEFAULT_BIN_PATH
+) -> Union[HSKLexicon, Dict]:
+    """
+    Load the HSK vocabulary
+
+    Uses the compiled lexicon when it exists and was built from the current
+    JSON; otherwise falls back to parsing the JSON.
+    """
+    if not os.path.exists(json_path):
+        logger.warning("HSK vocabulary file not found at %s", json_path)
+        return {}
+
+    if os.path.exists(bin_path):
+        try:
+            lexicon = HSKLexicon(bin_path)
+            if lexicon.source_digest == file_digest(json_path):
+                return lexicon
+            lexicon.close()
+            logger.warning("Compiled HSK lexicon is out of date, run: python build_lexicon.py")
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Could not open compiled HSK lexicon: %s", e)
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
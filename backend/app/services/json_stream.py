@@ -0,0 +1,140 @@
+"""
+Incremental JSON Parsing
+
+The model returns analyses as one JSON object holding an array of items
+(e.g. {"sentence_analysis": [{...}, {...}]}). ArrayItemParser reads that
+text chunk by chunk as it streams in and hands back each array item as soon
+as its closing brace arrives, without waiting for (or requiring) the rest
+of the document. Markdown fences and text around the object are ignored.
+"""
+import json
+from typing import Dict, List
+
+
+class ArrayItemParser:
+    """
+    Extract the objects of one array, keyed by name, from streamed JSON text
+
+    Usage:
+        parser = ArrayItemParser('sentence_analysis')
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...
+
+    Each character is scanned once, so feeding a whole response costs the
+    same as parsing it in one go.
+    """
+
+    def __init__(self, key: str):
+        self._token = json.dumps(key)
+        self._buffer = ""
+        self._pos = 0
+        self._state = "key"  # key -> array -> items -> done
+        self._item_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.items_found = 0
+
+    @property
+    def done(self) -> bool:
+        """True once the array's closing bracket has been read"""
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Add text and return the array items completed by it
+
+        Items that are not objects, or are not valid JSON, are skipped.
+        """
+        self._buffer += chunk
+        items = []
+
+        while self._state != "done":
+            if self._state == "key":
+                found = self._buffer.find(self._token, self._pos)
+                if found < 0:
+                    # Keep the tail in case the key is split across chunks
+                    self._pos = max(self._pos, len(self._buffer) - len(self._token) + 1)
+                    break
+                self._pos = found + len(self._token)
+                self._state = "array"
+
+            elif self._state == "array":
+                found = self._buffer.find("[", self._pos)
+                if found < 0:
+                    self._pos = len(self._buffer)
+                    break
+                self._pos = found + 1
+                self._state = "items"
+
+            else:
+                item = self._scan_items()
+                if item is None:
+                    break
+                items.append(item)
+
+        # Drop text that can no longer be part of an item
+        if self._item_start is None and self._pos > 4096:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        return items
+
+    def _scan_items(self):
+        """Advance through the array; return the next complete item or None"""
+        buffer = self._buffer
+        i = self._pos
+        end = len(buffer)
+
+        while i < end:
+            char = buffer[i]
+
+            if self._item_start is None:
+                if char == "{":
+                    self._item_start = i
+                    self._depth = 1
+                elif char == "]":
+                    self._state = "done"
+                    self._pos = i + 1
+                    return None
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = buffer[self._item_start:i + 1]
+                    self._item_start = None
+                    self._pos = i + 1
+                    try:
+                        item = json.loads(text)
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        self.items_found += 1
+                        return item
+            i += 1
+
+        self._pos = i
+        return None
+
+
+def parse_array_items(text: str, key: str) -> List[Dict]:
+    """
+    All complete items of the named array in text
+
+    Salvages what it can from truncated or partly malformed responses.
+    """
+    return ArrayItemParser(key).feed(text)
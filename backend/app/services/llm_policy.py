@@ -0,0 +1,336 @@
+"""
+Model Call Policy
+
+Wraps every model call in the same failure handling:
+
+- Deadlines: each attempt has llm_timeout_seconds, and the call as a whole
+  (attempts plus waits between them) llm_call_deadline_seconds.
+- Retries: timeouts, connection errors, rate limits (429) and server
+  errors (5xx) are retried up to llm_max_retries times, waiting a random
+  ("full jitter") share of an exponentially growing backoff, or as long as
+  the provider's Retry-After header asks. Other errors (bad request,
+  authentication) fail at once.
+- Circuit breaker: once enough of the recent attempts have failed
+  transiently, calls are rejected without contacting the provider
+  (CircuitOpenError) for llm_breaker_cooldown_seconds. Then a single trial
+  call is let through; its outcome closes the breaker or re-opens it.
+  Each provider has its own breaker (see llm_providers); while every
+  provider's breaker is open, SentenceAnalyzer skips the model entirely
+  and essays get a vocabulary-only analysis.
+
+Outcomes are counted in llm_calls_total, llm_retries_total and
+llm_breaker_transitions_total.
+"""
+import asyncio
+import importlib
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from app.config import get_settings
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_CALLS = counter(
+    "llm_calls_total", "Model calls by final outcome", labels=("call", "outcome")
+)
+LLM_RETRIES = counter(
+    "llm_retries_total", "Model call attempts retried, by reason", labels=("call", "reason")
+)
+LLM_BREAKER_TRANSITIONS = counter(
+    "llm_breaker_transitions_total", "Circuit breaker state changes", labels=("state",)
+)
+
+
+class CircuitOpenError(Exception):
+    """Recent model calls have been failing; the call was not attempted"""
+
+
+@lru_cache()
+def _connection_error_types() -> tuple:
+    """Exception types meaning the provider could not be reached"""
+    types = [ConnectionError]
+    for module, name in (("openai", "APIConnectionError"), ("httpx", "TransportError")):
+        try:
+            types.append(getattr(importlib.import_module(module), name))
+        except (ImportError, AttributeError):
+            pass
+    return tuple(types)
+
+
+def failure_reason(exc: BaseException) -> Optional[str]:
+    """
+    Why a call failed, if it is worth retrying
+
+    Returns:
+        "timeout", "connection_error", "rate_limited" or "server_error";
+        None for errors a retry would not fix (bad request, auth, ...)
+    """
+    if isinstance(exc, TimeoutError):
+        return "timeout"
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        if status == 429:
+            return "rate_limited"
+        if status in (408, 409) or status >= 500:
+            return "server_error"
+        return None
+    if isinstance(exc, _connection_error_types()):
+        return "connection_error"
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Wait requested by the provider's Retry-After(-ms) header, if any"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over the most recent attempts
+
+    closed: calls go through; opens when at least min_calls of the last
+        window attempts are recorded and error_rate of them failed
+    open: calls are rejected until cooldown_seconds have passed
+    half_open: one trial call goes through; success closes, failure re-opens
+    """
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        error_rate: Optional[float] = None,
+        cooldown_seconds: Optional[float] = None
+    ):
+        settings = get_settings()
+        self.window = max(1, window if window is not None else settings.llm_breaker_window)
+        self.min_calls = max(1, min_calls if min_calls is not None else settings.llm_breaker_min_calls)
+        self.error_rate = error_rate if error_rate is not None else settings.llm_breaker_error_rate
+        self.cooldown_seconds = (
+            cooldown_seconds if cooldown_seconds is not None else settings.llm_breaker_cooldown_seconds
+        )
+
+        self.state = "closed"
+        self._outcomes: deque = deque(maxlen=self.window)  # True = failed
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would be let through right now"""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return time.monotonic() - self._opened_at >= self.cooldown_seconds
+        return not self._trial_running
+
+    def acquire(self) -> None:
+        """
+        Claim permission for one attempt
+
+        Raises:
+            CircuitOpenError: the breaker is open (or its trial call is running)
+        """
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._transition("half_open")
+        if self.state == "open" or (self.state == "half_open" and self._trial_running):
+            raise CircuitOpenError("Model calls are failing; try again shortly")
+        if self.state == "half_open":
+            self._trial_running = True
+
+    def record(self, failed: bool) -> None:
+        """Report the outcome of an attempt let through by acquire()"""
+        if self.state == "half_open":
+            self._trial_running = False
+            if failed:
+                self._open()
+            else:
+                self._outcomes.clear()
+                self._transition("closed")
+            return
+
+        self._outcomes.append(failed)
+        if (
+            failed
+            and self.state == "closed"
+            and len(self._outcomes) >= self.min_calls
+            and sum(self._outcomes) >= self.error_rate * len(self._outcomes)
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Give back a claimed attempt whose outcome says nothing about the provider"""
+        if self.state == "half_open":
+            self._trial_running = False
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._transition("open")
+        logger.warning(
+            "Model circuit breaker opened for %ss", self.cooldown_seconds,
+            extra={'recent_failures': sum(self._outcomes), 'recent_calls': len(self._outcomes)}
+        )
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            LLM_BREAKER_TRANSITIONS.inc(state=state)
+            if state == "closed":
+                logger.info("Model circuit breaker closed")
+
+
+class LLMCallPolicy:
+    """Deadlines, retries and circuit breaking for model calls"""
+
+    def __init__(
+        self,
+        timeout_seconds: Optional[float] = None,
+        deadline_seconds: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        settings = get_settings()
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else settings.llm_timeout_seconds
+        self.deadline_seconds = (
+            deadline_seconds if deadline_seconds is not None else settings.llm_call_deadline_seconds
+        )
+        self.max_retries = max(0, max_retries if max_retries is not None else settings.llm_max_retries)
+        self.retry_base_seconds = (
+            retry_base_seconds if retry_base_seconds is not None else settings.llm_retry_base_seconds
+        )
+        self.retry_max_seconds = (
+            retry_max_seconds if retry_max_seconds is not None else settings.llm_retry_max_seconds
+        )
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit breaker is rejecting calls"""
+        return self.breaker.available
+
+    async def call(self, fn: Callable[[], Awaitable[T]], call: str) -> T:
+        """
+        Run fn() (one model request) under the policy
+
+        Args:
+            fn: Makes the request; called again for each attempt
+            call: Label for metrics and logs ("sentences", "essay")
+
+        Raises:
+            CircuitOpenError: the breaker is open
+            TimeoutError: the attempt or overall deadline passed
+            The last error from fn() if it is not retryable or retries ran out
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            try:
+                self.breaker.acquire()
+            except CircuitOpenError:
+                LLM_CALLS.inc(call=call, outcome="rejected")
+                raise
+
+            remaining = deadline - time.monotonic()
+            try:
+                async with asyncio.timeout(min(self.timeout_seconds, remaining)):
+                    result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                reason = failure_reason(e)
+                if reason is None:
+                    # Our request was at fault, not the provider
+                    self.breaker.release()
+                    LLM_CALLS.inc(call=call, outcome="error")
+                    raise
+                self.breaker.record(failed=True)
+
+                delay = self._backoff(attempt, e)
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    LLM_CALLS.inc(call=call, outcome="timeout" if reason == "timeout" else "error")
+                    raise
+
+                attempt += 1
+                LLM_RETRIES.inc(call=call, reason=reason)
+                logger.warning(
+                    "Model call failed (%s); retry %s in %.1fs", reason, attempt, delay,
+                    extra={'call': call}
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record(failed=False)
+            LLM_CALLS.inc(call=call, outcome="success")
+            return result
+
+    async def iterate(self, stream: AsyncIterator[T], call: str) -> AsyncIterator[T]:
+        """
+        Iterate a streamed response, failing if it stalls
+
+        Each chunk must arrive within timeout_seconds of the previous one.
+        A stream that fails part-way is not retried (what has arrived is
+        already used); the failure still counts towards the breaker.
+        """
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(self.timeout_seconds):
+                        item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    if failure_reason(e) is not None:
+                        self.breaker.record(failed=True)
+                    LLM_CALLS.inc(call=call, outcome="interrupted")
+                    raise
+                yield item
+        finally:
+            # Release the connection even if the caller stops early
+            close = getattr(iterator, "aclose", None)
+            if close is not None:
+                await close()
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Seconds to wait before the next attempt"""
+        requested = retry_after_seconds(exc)
+        if requested is not None:
+            return min(requested, self.retry_max_seconds)
+        ceiling = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt)
+        return random.uniform(0, ceiling)
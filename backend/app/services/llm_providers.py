@@ -0,0 +1,588 @@
+"""
+Model Providers
+
+SentenceAnalyzer sends its model calls through an LLMRouter, which decides
+which provider answers:
+
+- OpenAIProvider: the Chat Completions API, or any OpenAI-compatible server
+  (settings.openai_base_url)
+- AnthropicProvider: the Messages API over plain httpx (the pinned
+  anthropic SDK predates the Messages API), or a compatible server
+  (settings.anthropic_base_url)
+
+Providers are listed in settings.llm_providers, preferred first. Each has
+its own call policy (deadlines, retries, circuit breaker; see llm_policy)
+and rolling latency and error statistics. A call goes to the first
+provider whose breaker is closed and fails over to the next one if it
+errors. With llm_hedge_enabled, a call still running after the primary's
+recent p95 latency is also sent to the next provider, and whichever
+answers first is used (the other call is cancelled).
+
+Rolling p50/p95 latency and error rate are exported per provider as
+llm_provider_latency_seconds{provider,quantile} and
+llm_provider_error_rate{provider}.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+
+from app.config import get_settings
+from app.metrics import counter, gauge
+from app.services.llm_policy import CircuitOpenError, LLMCallPolicy
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER_LATENCY = gauge(
+    "llm_provider_latency_seconds", "Recent model call latency per provider",
+    labels=("provider", "quantile")
+)
+LLM_PROVIDER_ERROR_RATE = gauge(
+    "llm_provider_error_rate", "Share of recent model calls per provider that failed",
+    labels=("provider",)
+)
+LLM_FAILOVERS = counter(
+    "llm_failovers_total", "Model calls passed to the next provider after failing", labels=("provider",)
+)
+LLM_HEDGES = counter(
+    "llm_hedged_calls_total", "Slow model calls also sent to another provider", labels=("provider",)
+)
+
+
+class LLMReply(NamedTuple):
+    """A model reply or, when streaming, one piece of it"""
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    truncated: bool = False  # Stopped at max_tokens
+
+
+class ProviderError(Exception):
+    """
+    Error response from a provider's HTTP API
+
+    Has status_code and response like the openai SDK's errors, so the call
+    policy classifies and backs off from both alike.
+    """
+
+    def __init__(self, message: str, status_code: int, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class ProviderStats:
+    """Rolling latency and error rate over a provider's most recent calls"""
+
+    def __init__(self, provider: str, window: Optional[int] = None):
+        self.provider = provider
+        window = window if window is not None else get_settings().llm_stats_window
+        self._samples: deque = deque(maxlen=max(1, window))  # (seconds, failed)
+
+    def record(self, seconds: float, failed: bool) -> None:
+        """Add one call and refresh the exported gauges"""
+        self._samples.append((seconds, failed))
+        for quantile in (0.5, 0.95):
+            value = self.latency(quantile)
+            if value is not None:
+                LLM_PROVIDER_LATENCY.set(value, provider=self.provider, quantile=f"{quantile:g}")
+        LLM_PROVIDER_ERROR_RATE.set(self.error_rate, provider=self.provider)
+
+    def latency(self, quantile: float) -> Optional[float]:
+        """Latency quantile of recent successful calls (None before any)"""
+        latencies = sorted(seconds for seconds, failed in self._samples if not failed)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+    @property
+    def error_rate(self) -> float:
+        """Share of recent calls that failed"""
+        if not self._samples:
+            return 0.0
+        return sum(failed for _, failed in self._samples) / len(self._samples)
+
+    def snapshot(self) -> Dict:
+        """Current statistics, for logs and diagnostics"""
+        return {
+            'calls': len(self._samples),
+            'p50_seconds': self.latency(0.5),
+            'p95_seconds': self.latency(0.95),
+            'error_rate': self.error_rate
+        }
+
+
+class LLMProvider:
+    """
+    One model provider
+
+    Subclasses implement complete() and open_stream(); retries and
+    timeouts are applied around them by the router, using self.policy.
+    """
+
+    name = "provider"
+
+    def __init__(self, model: str, policy: Optional[LLMCallPolicy] = None):
+        self.model = model
+        self.policy = policy if policy is not None else LLMCallPolicy()
+        self.stats = ProviderStats(self.name)
+
+    async def complete(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        response_format: Optional[Dict] = None
+    ) -> LLMReply:
+        """
+        Send one request and return the whole reply
+
+        Args:
+            response_format: OpenAI-style response_format; providers without
+                an equivalent use it as a hint that the reply is JSON
+        """
+        raise NotImplementedError
+
+    async def open_stream(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        response_format: Optional[Dict] = None
+    ) -> AsyncIterator[LLMReply]:
+        """
+        Send one streaming request
+
+        Returns once the provider has accepted it (so errors surface here,
+        where they can be retried); the returned iterator yields the reply
+        in pieces, the last carrying token usage.
+        """
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI Chat Completions (or an OpenAI-compatible server)"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        policy: Optional[LLMCallPolicy] = None
+    ):
+        super().__init__(model, policy)
+        # Imported here: the openai package is slow to import, and the app
+        # should start without paying for it. Retries and timeouts are
+        # handled by the call policy, not the client.
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=timeout if timeout is not None else get_settings().llm_timeout_seconds
+        )
+
+    def _request(self, system_instruction: str, prompt: str, max_tokens: int, response_format: Optional[Dict]) -> Dict:
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_instruction},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            request["response_format"] = response_format
+        return request
+
+    async def complete(self, system_instruction, prompt, max_tokens, response_format=None) -> LLMReply:
+        response = await self.client.chat.completions.create(
+            **self._request(system_instruction, prompt, max_tokens, response_format)
+        )
+        choice = response.choices[0]
+        usage = response.usage
+        return LLMReply(
+            choice.message.content or "",
+            usage.prompt_tokens if usage else 0,
+            usage.completion_tokens if usage else 0,
+            choice.finish_reason == "length"
+        )
+
+    async def open_stream(self, system_instruction, prompt, max_tokens, response_format=None) -> AsyncIterator[LLMReply]:
+        stream = await self.client.chat.completions.create(
+            **self._request(system_instruction, prompt, max_tokens, response_format),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        return self._pieces(stream)
+
+    async def _pieces(self, stream) -> AsyncIterator[LLMReply]:
+        async for chunk in stream:
+            text = ""
+            truncated = False
+            if chunk.choices:
+                text = chunk.choices[0].delta.content or ""
+                truncated = chunk.choices[0].finish_reason == "length"
+            # Usage arrives in the final chunk (which has no choices)
+            usage = getattr(chunk, 'usage', None)
+            if text or truncated or usage:
+                yield LLMReply(
+                    text,
+                    usage.prompt_tokens if usage else 0,
+                    usage.completion_tokens if usage else 0,
+                    truncated
+                )
+
+
+class AnthropicProvider(LLMProvider):
+    """
+    Anthropic Messages API (or a compatible server)
+
+    There is no response_format; when one is requested the reply is
+    prefilled with "{" so the model continues a JSON object.
+    """
+
+    name = "anthropic"
+    API_VERSION = "2023-06-01"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        policy: Optional[LLMCallPolicy] = None
+    ):
+        super().__init__(model, policy)
+        import httpx
+        settings = get_settings()
+        self.client = httpx.AsyncClient(
+            base_url=base_url or settings.anthropic_base_url,
+            timeout=timeout if timeout is not None else settings.llm_timeout_seconds,
+            headers={"x-api-key": api_key, "anthropic-version": self.API_VERSION}
+        )
+
+    def _request(self, system_instruction: str, prompt: str, max_tokens: int, prefill: str) -> Dict:
+        messages = [{"role": "user", "content": prompt}]
+        if prefill:
+            messages.append({"role": "assistant", "content": prefill})
+        return {
+            "model": self.model,
+            "system": system_instruction,
+            "messages": messages,
+            "temperature": 0,
+            "max_tokens": max_tokens
+        }
+
+    async def complete(self, system_instruction, prompt, max_tokens, response_format=None) -> LLMReply:
+        prefill = "{" if response_format else ""
+        response = await self.client.post(
+            "/v1/messages", json=self._request(system_instruction, prompt, max_tokens, prefill)
+        )
+        _raise_for_status(response)
+        data = response.json()
+        text = "".join(
+            block.get("text", "") for block in data.get("content", []) if block.get("type") == "text"
+        )
+        usage = data.get("usage") or {}
+        return LLMReply(
+            prefill + text,
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+            data.get("stop_reason") == "max_tokens"
+        )
+
+    async def open_stream(self, system_instruction, prompt, max_tokens, response_format=None) -> AsyncIterator[LLMReply]:
+        prefill = "{" if response_format else ""
+        request = self.client.build_request(
+            "POST", "/v1/messages",
+            json={**self._request(system_instruction, prompt, max_tokens, prefill), "stream": True}
+        )
+        response = await self.client.send(request, stream=True)
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            _raise_for_status(response)
+        return self._pieces(response, prefill)
+
+    async def _pieces(self, response, prefill: str) -> AsyncIterator[LLMReply]:
+        """Parse the server-sent events of a streamed reply"""
+        try:
+            if prefill:
+                yield LLMReply(prefill)
+            prompt_tokens = 0
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                kind = event.get("type")
+                if kind == "message_start":
+                    prompt_tokens = event.get("message", {}).get("usage", {}).get("input_tokens", 0)
+                elif kind == "content_block_delta":
+                    text = event.get("delta", {}).get("text")
+                    if text:
+                        yield LLMReply(text)
+                elif kind == "message_delta":
+                    yield LLMReply(
+                        "",
+                        prompt_tokens,
+                        event.get("usage", {}).get("output_tokens", 0),
+                        event.get("delta", {}).get("stop_reason") == "max_tokens"
+                    )
+                elif kind == "error":
+                    error = event.get("error", {})
+                    status = 529 if error.get("type") == "overloaded_error" else 500
+                    raise ProviderError(error.get("message", "Stream failed"), status, response)
+        finally:
+            await response.aclose()
+
+
+def _raise_for_status(response) -> None:
+    """Raise ProviderError for an HTTP error response"""
+    if not response.is_error:
+        return
+    try:
+        message = response.json().get("error", {}).get("message")
+    except ValueError:
+        message = None
+    raise ProviderError(
+        f"{response.status_code}: {message or response.text[:200]}", response.status_code, response
+    )
+
+
+class LLMRouter:
+    """Routes model calls across providers with failover and optional hedging"""
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge: Optional[bool] = None,
+        hedge_min_seconds: Optional[float] = None
+    ):
+        if not providers:
+            raise ValueError("At least one model provider is required")
+        settings = get_settings()
+        self.providers = providers
+        self.hedge = hedge if hedge is not None else settings.llm_hedge_enabled
+        self.hedge_min_seconds = (
+            hedge_min_seconds if hedge_min_seconds is not None else settings.llm_hedge_min_seconds
+        )
+
+    @classmethod
+    def from_settings(cls) -> "LLMRouter":
+        """
+        Router over the providers in settings.llm_providers
+
+        Providers without an API key are skipped.
+
+        Raises:
+            ValueError: no usable provider, or an unknown provider name
+        """
+        settings = get_settings()
+        providers = []
+        for name in (n.strip().lower() for n in settings.llm_providers.split(",")):
+            if not name:
+                continue
+            if name == "openai":
+                if settings.openai_api_key:
+                    providers.append(OpenAIProvider(
+                        settings.openai_api_key, settings.openai_model, base_url=settings.openai_base_url
+                    ))
+                    continue
+            elif name == "anthropic":
+                if settings.anthropic_api_key:
+                    providers.append(AnthropicProvider(
+                        settings.anthropic_api_key, settings.anthropic_model
+                    ))
+                    continue
+            else:
+                raise ValueError(f"Unknown model provider {name!r} in LLM_PROVIDERS")
+            logger.warning("No API key for model provider %s; skipping it", name)
+
+        if not providers:
+            raise ValueError(
+                "❌ No model provider configured (set OPENAI_API_KEY or ANTHROPIC_API_KEY)"
+            )
+        return cls(providers)
+
+    @property
+    def model(self) -> str:
+        """The preferred provider's model"""
+        return self.providers[0].model
+
+    @property
+    def available(self) -> bool:
+        """False while every provider's circuit breaker is rejecting calls"""
+        return any(p.policy.available for p in self.providers)
+
+    def describe(self) -> str:
+        """Providers and models, preferred first"""
+        return ", ".join(f"{p.name}:{p.model}" for p in self.providers)
+
+    def _candidates(self) -> List[LLMProvider]:
+        """Providers to try, in order; those with an open breaker are left out"""
+        candidates = [p for p in self.providers if p.policy.available]
+        if not candidates:
+            raise CircuitOpenError("Model calls are failing on every provider; try again shortly")
+        return candidates
+
+    async def complete(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict] = None
+    ) -> LLMReply:
+        """
+        Send a request to the best available provider
+
+        Raises:
+            CircuitOpenError, TimeoutError or the last provider's error when
+            every provider failed
+        """
+        candidates = self._candidates()
+        if self.hedge and len(candidates) > 1:
+            return await self._complete_hedged(
+                candidates, system_instruction, prompt, max_tokens, call, response_format
+            )
+
+        for n, provider in enumerate(candidates):
+            try:
+                return await self._complete_with(
+                    provider, system_instruction, prompt, max_tokens, call, response_format
+                )
+            except Exception as e:
+                if n == len(candidates) - 1:
+                    raise
+                self._failed_over(provider, e, call)
+
+    async def _complete_hedged(
+        self,
+        candidates: List[LLMProvider],
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict]
+    ) -> LLMReply:
+        """complete() that also asks the next provider when a call is slow or fails"""
+        waiting = list(candidates)
+
+        def start():
+            provider = waiting.pop(0)
+            return asyncio.ensure_future(self._complete_with(
+                provider, system_instruction, prompt, max_tokens, call, response_format
+            ))
+
+        primary = candidates[0]
+        hedge_after = max(self.hedge_min_seconds, primary.stats.latency(0.95) or 0)
+        running = {start(): primary}
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    running, timeout=hedge_after if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    failed = running.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+                if not running and not waiting:
+                    raise error
+                if not running:
+                    # Everything asked so far failed
+                    self._failed_over(failed, error, call)
+                elif waiting and not done:
+                    # Still no answer: ask the next provider as well
+                    LLM_HEDGES.inc(provider=waiting[0].name)
+                    logger.info(
+                        "Model call slower than %.1fs; also asking %s", hedge_after, waiting[0].name,
+                        extra={'call': call}
+                    )
+                else:
+                    continue
+                running[start()] = waiting[0]
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _complete_with(
+        self,
+        provider: LLMProvider,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict]
+    ) -> LLMReply:
+        """One provider's call under its policy, recorded in its statistics"""
+        start = time.monotonic()
+        try:
+            reply = await provider.policy.call(
+                lambda: provider.complete(system_instruction, prompt, max_tokens, response_format),
+                call
+            )
+        except CircuitOpenError:
+            raise
+        except Exception:
+            provider.stats.record(time.monotonic() - start, failed=True)
+            raise
+        provider.stats.record(time.monotonic() - start, failed=False)
+        return reply
+
+    async def stream(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict] = None
+    ) -> AsyncIterator[LLMReply]:
+        """
+        Stream a reply from the best available provider
+
+        Fails over only while opening the stream; once content has arrived,
+        a failure is raised to the caller (which re-requests what is
+        missing). Streams are never hedged.
+        """
+        candidates = self._candidates()
+        for n, provider in enumerate(candidates):
+            start = time.monotonic()
+            try:
+                pieces = await provider.policy.call(
+                    lambda: provider.open_stream(system_instruction, prompt, max_tokens, response_format),
+                    call
+                )
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError):
+                    provider.stats.record(time.monotonic() - start, failed=True)
+                if n == len(candidates) - 1:
+                    raise
+                self._failed_over(provider, e, call)
+                continue
+
+            try:
+                async for piece in provider.policy.iterate(pieces, call):
+                    yield piece
+            except Exception:
+                provider.stats.record(time.monotonic() - start, failed=True)
+                raise
+            provider.stats.record(time.monotonic() - start, failed=False)
+            return
+
+    def _failed_over(self, provider: LLMProvider, error: Exception, call: str) -> None:
+        """Count and log a call moving on from a failed provider"""
+        LLM_FAILOVERS.inc(provider=provider.name)
+        logger.warning(
+            "Model provider %s failed (%s); trying the next one", provider.name, error,
+            extra={'call': call, 'provider_stats': provider.stats.snapshot()}
+        )
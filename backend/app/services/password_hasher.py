@@ -0,0 +1,122 @@
+"""
+Password Hashing Pool
+
+bcrypt costs a few hundred milliseconds of CPU per hash or check. Running
+it on the request path lets a burst of logins (a whole class signing in at
+once) occupy every worker thread and stall unrelated requests.
+
+PasswordHasher runs bcrypt in its own small thread pool (bcrypt releases
+the GIL, so the event loop and other threads keep running). Operations
+running or queued are capped; beyond that, new ones fail immediately with
+PasswordHasherBusy so the API can answer 503 instead of piling up work.
+
+The cost factor comes from settings.bcrypt_rounds. Hashes made with any
+other cost are reported by verify_and_update, which returns a fresh hash
+to store, so changing the setting upgrades passwords as users log in.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import get_settings
+from app.metrics import counter
+
+PASSWORD_HASH_OPERATIONS = counter(
+    "password_hash_operations_total", "bcrypt operations run", labels=("operation",)
+)
+PASSWORD_HASH_REJECTED = counter(
+    "password_hash_rejected_total", "bcrypt operations rejected because the pool was full"
+)
+PASSWORD_REHASHES = counter(
+    "password_rehashes_total", "Passwords rehashed at login with the current cost factor"
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are running or queued"""
+
+
+def build_context(rounds: int) -> CryptContext:
+    """bcrypt context that hashes with, and only accepts as current, the given cost"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread pool"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        rounds: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.workers = workers if workers is not None else settings.password_hash_workers
+        self.max_pending = max_pending if max_pending is not None else settings.password_hash_max_pending
+        self.context = build_context(rounds if rounds is not None else settings.bcrypt_rounds)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="password-hash"
+        )
+        # One slot per operation running or waiting for a thread
+        self._slots = threading.BoundedSemaphore(max(self.max_pending, self.workers))
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password
+
+        Raises:
+            PasswordHasherBusy: the pool is saturated
+        """
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password, and rehash it if its hash uses an outdated cost
+
+        Returns:
+            (matches, new hash to store or None)
+
+        Raises:
+            PasswordHasherBusy: the pool is saturated
+        """
+        matches, new_hash = await self._run(
+            "verify", self.context.verify_and_update, password, hashed_password
+        )
+        if new_hash is not None:
+            PASSWORD_REHASHES.inc()
+        return matches, new_hash
+
+    async def _run(self, operation: str, fn, *args):
+        """Run fn in the pool, or fail fast if no slot is free"""
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHasherBusy()
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Released when the work finishes (or is cancelled before starting),
+        # not when the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+
+        PASSWORD_HASH_OPERATIONS.inc(operation=operation)
+        return await asyncio.wrap_future(future)
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    """Get the process-wide password hasher"""
+    return PasswordHasher()
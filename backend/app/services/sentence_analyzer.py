@@ -9,11 +9,95 @@ Supports output in 50+ languages automatically.
 """
 
 import re
-import os
-from typing import Dict, List, Optional
-from openai import OpenAI
+import asyncio
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import json
 
+from app.config import get_settings
+from app.services.analysis_cache import AnalysisCache
+from app.services.json_stream import ArrayItemParser, parse_array_items
+from app.services.llm_providers import LLMReply, LLMRouter
+from app.metrics import ANALYSIS_STAGE_SECONDS, counter
+
+logger = logging.getLogger(__name__)
+
+LLM_TOKENS = counter(
+    "llm_tokens_total", "Tokens used by model calls", labels=("call", "kind")
+)
+LLM_TRUNCATED_REPLIES = counter(
+    "llm_truncated_replies_total", "Model replies cut off at max_tokens", labels=("call",)
+)
+SENTENCES_REREQUESTED = counter(
+    "llm_sentences_rerequested_total",
+    "Sentences sent to the model again because an earlier reply left them out"
+)
+
+
+def _object_schema(properties: Dict) -> Dict:
+    """Strict JSON schema object: every property required, nothing else allowed"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+_SEVERITY = {"type": "string", "enum": ["minor", "major", "critical"]}
+
+# Output schemas for structured-output mode (settings.llm_response_format);
+# they describe the same JSON the prompts ask for
+SENTENCE_ANALYSIS_SCHEMA = _object_schema({
+    "sentence_analysis": {
+        "type": "array",
+        "items": _object_schema({
+            "index": {"type": "integer"},
+            "original": {"type": "string"},
+            "grammar_score": {"type": "integer"},
+            "semantic_score": {"type": "integer"},
+            "collocation_score": {"type": "integer"},
+            "overall_quality": {"type": "integer"},
+            "issues": {
+                "type": "array",
+                "items": _object_schema({
+                    "type": {"type": "string"},
+                    "description": {"type": "string"},
+                    "correction": {"type": "string"},
+                    "severity": _SEVERITY
+                })
+            },
+            "improvement_suggestion": {"type": "string"}
+        })
+    }
+})
+
+ESSAY_ANALYSIS_SCHEMA = _object_schema({
+    "essay_analysis": _object_schema({
+        "structure_score": {"type": "integer"},
+        "coherence_score": {"type": "integer"},
+        "transition_score": {"type": "integer"},
+        "topic_consistency_score": {"type": "integer"},
+        "logic_score": {"type": "integer"},
+        "structure_feedback": {"type": "string"},
+        "coherence_feedback": {"type": "string"},
+        "transition_feedback": {"type": "string"},
+        "essay_issues": {
+            "type": "array",
+            "items": _object_schema({
+                "type": {"type": "string"},
+                "location": {"type": "string"},
+                "description": {"type": "string"},
+                "suggestion": {"type": "string"},
+                "severity": _SEVERITY
+            })
+        },
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "areas_for_improvement": {"type": "array", "items": {"type": "string"}}
+    }),
+    "overall_coherence": {"type": "integer"}
+})
+
 
 class SentenceAnalyzer:
     """
@@ -47,20 +131,60 @@ class SentenceAnalyzer:
         'no': 'Norwegian (Norsk)',
     }
     
-    def __init__(self):
-        """Initialize OpenAI client"""
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("❌ OPENAI_API_KEY not found in environment variables")
+    # Bump whenever the prompts or expected JSON format change, so cached
+    # results produced by the old prompt are no longer reused
+    PROMPT_VERSION = "3"
+    
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        cache: Optional[AnalysisCache] = None,
+        router: Optional[LLMRouter] = None
+    ):
+        """
+        Initialize the model providers
+
+        Args:
+            max_concurrency: Maximum number of in-flight model calls for this
+                analyzer (defaults to settings.llm_max_concurrency)
+            cache: Optional cache for per-sentence analysis results
+            router: Model providers to use, each with its own timeouts,
+                retries and circuit breaker (defaults to settings.llm_providers)
+
+        Raises:
+            ValueError: no model provider is configured
+        """
+        # Model providers (async clients, so calls never block the event loop)
+        settings = get_settings()
+        self.router = router if router is not None else LLMRouter.from_settings()
+        
+        # Cache keys use the preferred model (results from a fallback
+        # provider are stored under it too)
+        self.model = self.router.model
+        
+        # Bound concurrent model calls; extra analyses wait here instead of
+        # piling up on the provider (and hitting rate limits)
+        if max_concurrency is None:
+            max_concurrency = get_settings().llm_max_concurrency
+        self.max_concurrency = max(1, max_concurrency)
+        self._llm_semaphore = asyncio.Semaphore(self.max_concurrency)
         
-        self.client = OpenAI(api_key=api_key)
+        # Per-sentence result cache (only changed sentences are re-analyzed)
+        self.cache = cache
         
-        # Get model from environment or use default
-        self.model = os.getenv("OPENAI_MODEL", "gpt-4o")
+        # Chunked mode for long essays
+        self.chunk_min_chars = settings.analysis_chunk_min_chars
+        self.chunk_max_sentences = max(1, settings.analysis_chunk_max_sentences)
+        self.chunk_concurrency = max(1, settings.analysis_chunk_concurrency)
         
-        print(f"✓ Sentence & Essay Analyzer initialized")
-        print(f"  Model: {self.model}")
-        print(f"  Supported languages: {len(self.SUPPORTED_LANGUAGES)}")
+        # Structured output, and follow-up calls for sentences a reply missed
+        self.response_format = settings.llm_response_format
+        self.repair_attempts = max(0, settings.analysis_repair_attempts)
+        
+        logger.info(
+            "Sentence & essay analyzer ready (models %s, max %s concurrent calls)",
+            self.router.describe(), self.max_concurrency
+        )
     
     async def analyze(
         self, 
@@ -81,38 +205,131 @@ class SentenceAnalyzer:
             - Sentence-level analysis (grammar, word choice)
             - Essay-level analysis (structure, coherence, transitions)
         """
-        # Validate language
-        if language not in self.SUPPORTED_LANGUAGES:
-            print(f"Warning: Language '{language}' not in supported list. Using English.")
-            language = 'en'
-        
+        language = self._validate_language(language)
         language_name = self.SUPPORTED_LANGUAGES[language]
-        print(f"\nAnalyzing text with GPT-4")
-        print(f"   Target HSK Level: {target_hsk_level}")
-        print(f"   Output Language: {language_name}")
-        
         # Split into sentences and paragraphs
         sentences = self._split_sentences(text)
         paragraphs = self._split_paragraphs(text)
         
         if not sentences:
-            print("No sentences found")
+            logger.info("No sentences found")
             return self._empty_result()
         
-        print(f"Found {len(sentences)} sentence(s) in {len(paragraphs)} paragraph(s)")
+        if not self.router.available:
+            logger.warning("Model calls are failing; returning a vocabulary-only analysis")
+            return self._vocabulary_only_result(sentences, paragraphs, language)
+        
+        logger.debug(
+            "Analyzing %s sentence(s) in %s paragraph(s) (HSK %s, %s)",
+            len(sentences), len(paragraphs), target_hsk_level, language_name
+        )
         
         # Analyze with GPT-4 (both sentence and essay level)
-        ai_analysis = await self._ai_analyze_complete(
-            text,
-            sentences,
-            paragraphs,
-            target_hsk_level,
-            language
+        with ANALYSIS_STAGE_SECONDS.time(stage="ai_analysis"):
+            ai_analysis = await self._ai_analyze_complete(
+                text,
+                sentences,
+                paragraphs,
+                target_hsk_level,
+                language
+            )
+        
+        return self._build_result(sentences, paragraphs, ai_analysis, language)
+    
+    async def analyze_stream(
+        self,
+        text: str,
+        target_hsk_level: int = 3,
+        language: str = "en"
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Analyze text like analyze(), reporting results as they arrive
+        
+        Yields (event, data) pairs:
+        - ('sentence', item): one sentence's analysis; cached sentences
+          first, then the rest as the model streams them
+        - ('essay', essay_analysis): essay-level analysis, once available
+        - ('analysis', result): the complete result, same as analyze()
+        """
+        language = self._validate_language(language)
+        sentences = self._split_sentences(text)
+        paragraphs = self._split_paragraphs(text)
+        
+        if not sentences:
+            yield 'analysis', self._empty_result()
+            return
+        
+        if not self.router.available:
+            logger.warning("Model calls are failing; returning a vocabulary-only analysis")
+            yield 'analysis', self._vocabulary_only_result(sentences, paragraphs, language)
+            return
+        
+        logger.debug("Streaming analysis of %s sentence(s) in %s paragraph(s)", len(sentences), len(paragraphs))
+        
+        keys = [self._sentence_cache_key(s, target_hsk_level, language) for s in sentences]
+        cached = await self._cache_get_many(keys)
+        missing = [
+            (i + 1, sent)
+            for i, (sent, key) in enumerate(zip(sentences, keys))
+            if key not in cached
+        ]
+        logger.debug("Sentences: %s cached, %s to analyze", len(sentences) - len(missing), len(missing))
+        
+        # Essay-level call runs alongside the streamed sentence-level call(s)
+        chunked = self._use_chunks(text)
+        essay_task = asyncio.create_task(
+            self._ai_analyze_essay(text, paragraphs, target_hsk_level, language, outline_only=chunked)
         )
+        essay_sent = False
         
+        try:
+            for i, (sent, key) in enumerate(zip(sentences, keys)):
+                if key in cached:
+                    yield 'sentence', {**cached[key], 'index': i + 1, 'original': sent}
+            
+            new_results = {}
+            if missing:
+                chunks = self._chunk_sentences(missing, paragraphs) if chunked else [missing]
+                async for index, item in self._ai_stream_chunks(chunks, target_hsk_level, language):
+                    new_results[index] = item
+                    yield 'sentence', {**item, 'index': index, 'original': sentences[index - 1]}
+                    
+                    if not essay_sent and essay_task.done():
+                        essay_sent = True
+                        if essay_task.result() is not None:
+                            yield 'essay', essay_task.result().get('essay_analysis', {})
+            
+            essay_result = await essay_task
+        finally:
+            if not essay_task.done():
+                essay_task.cancel()
+        
+        if not essay_sent and essay_result is not None:
+            yield 'essay', essay_result.get('essay_analysis', {})
+        
+        ai_analysis, fresh = self._merge_results(sentences, keys, cached, new_results, essay_result)
+        if fresh:
+            await self._cache_set_many(fresh)
+        
+        yield 'analysis', self._build_result(sentences, paragraphs, ai_analysis, language)
+    
+    def _validate_language(self, language: str) -> str:
+        """Return the language code, falling back to English if unsupported"""
+        if language not in self.SUPPORTED_LANGUAGES:
+            logger.warning("Language %r not in supported list; using English", language)
+            return 'en'
+        return language
+    
+    def _build_result(
+        self,
+        sentences: List[str],
+        paragraphs: List[str],
+        ai_analysis: Dict,
+        language: str
+    ) -> Dict:
+        """Score the AI analysis and assemble the analyzer's result"""
         # Calculate overall quality score
         quality_score = self._calculate_quality_score(ai_analysis)
-        print(f"✓ Quality score: {quality_score}/100")
         
         # Generate recommendations
         recommendations = self._generate_recommendations(ai_analysis, language)
@@ -149,40 +366,352 @@ class SentenceAnalyzer:
         """
         Use GPT-4 to analyze at BOTH sentence and essay levels
         
-        This is the key function that does comprehensive analysis!
+        Sentence-level results are cached per sentence, so after an edit only
+        new or changed sentences are sent to the model. Essay-level analysis
+        is always requested (in its own, lighter call) because it depends on
+        the whole text. Both calls run concurrently.
         """
-        language_name = self.SUPPORTED_LANGUAGES.get(language, 'English')
+        # 1. Reuse cached analysis for sentences we have already seen
+        keys = [self._sentence_cache_key(s, target_hsk_level, language) for s in sentences]
+        cached = await self._cache_get_many(keys)
+        missing = [
+            (i + 1, sent)
+            for i, (sent, key) in enumerate(zip(sentences, keys))
+            if key not in cached
+        ]
+        logger.debug("Sentences: %s cached, %s to analyze", len(sentences) - len(missing), len(missing))
+        
+        # 2. Sentence-level (missing only) and essay-level calls in parallel;
+        # long essays are split into paragraph chunks analyzed concurrently
+        chunked = self._use_chunks(full_text)
+        if not missing:
+            sentence_call = self._no_sentences()
+        elif chunked:
+            chunks = self._chunk_sentences(missing, paragraphs)
+            logger.debug("Chunked mode: %s chunk(s)", len(chunks))
+            sentence_call = self._ai_analyze_chunks(chunks, target_hsk_level, language)
+        else:
+            sentence_call = self._ai_analyze_sentences(missing, target_hsk_level, language)
+        essay_call = self._ai_analyze_essay(
+            full_text, paragraphs, target_hsk_level, language, outline_only=chunked
+        )
+        new_results, essay_result = await asyncio.gather(sentence_call, essay_call)
+        
+        # 3. Merge in original sentence order
+        analysis_result, fresh = self._merge_results(sentences, keys, cached, new_results, essay_result)
+        if fresh:
+            await self._cache_set_many(fresh)
         
-        # Format for display
-        sentences_text = "\n".join([f"{i+1}. {s}" for i, s in enumerate(sentences)])
-        paragraphs_text = "\n\n".join([f"[Paragraph {i+1}]\n{p}" for i, p in enumerate(paragraphs)])
+        return analysis_result
+    
+    def _merge_results(
+        self,
+        sentences: List[str],
+        keys: List[str],
+        cached: Dict[str, Dict],
+        new_results: Dict[int, Dict],
+        essay_result: Optional[Dict]
+    ) -> Tuple[Dict, Dict[str, Dict]]:
+        """
+        Combine cached and new sentence results with the essay-level result
+        
+        Returns:
+            (ai_analysis, fresh sentence results to cache by key)
+        """
+        sentence_analysis = []
+        fresh = {}
+        unavailable = essay_result is None
+        for i, (sent, key) in enumerate(zip(sentences, keys)):
+            index = i + 1
+            if key in cached:
+                item = dict(cached[key])
+            elif index in new_results:
+                item = new_results[index]
+                fresh[key] = item
+            else:
+                item = self._empty_sentence_result(sent)
+                unavailable = True
+            item['index'] = index
+            item['original'] = sent
+            sentence_analysis.append(item)
+        
+        if essay_result is None:
+            essay_result = self._empty_ai_result(sentences)
+        
+        analysis_result = {
+            'sentence_analysis': sentence_analysis,
+            'essay_analysis': essay_result.get('essay_analysis', {}),
+            'overall_coherence': essay_result.get('overall_coherence', 0)
+        }
+        if unavailable:
+            analysis_result['analysis_unavailable'] = True
+        
+        return analysis_result, fresh
+    
+    async def _no_sentences(self) -> Dict[int, Dict]:
+        """Placeholder for the sentence-level call when every sentence is cached"""
+        return {}
+    
+    def _use_chunks(self, text: str) -> bool:
+        """Whether an essay is long enough for chunked analysis"""
+        return len(text) >= self.chunk_min_chars
+    
+    def _chunk_sentences(
+        self,
+        numbered_sentences: List[Tuple[int, str]],
+        paragraphs: List[str]
+    ) -> List[List[Tuple[int, str]]]:
+        """
+        Group (index, sentence) pairs into chunks along paragraph boundaries
+        
+        Consecutive paragraphs are packed together up to chunk_max_sentences;
+        longer paragraphs are split. Sentence numbering follows
+        _split_sentences, which never crosses a paragraph.
+        """
+        paragraph_of = {}
+        index = 0
+        for p, paragraph in enumerate(paragraphs):
+            for _ in self._split_sentences(paragraph):
+                index += 1
+                paragraph_of[index] = p
         
-        # System instruction
-        system_instruction = f"""You are a professional Chinese language teacher analyzing student writing.
+        by_paragraph: Dict[int, List[Tuple[int, str]]] = {}
+        for i, sent in numbered_sentences:
+            by_paragraph.setdefault(paragraph_of.get(i, -1), []).append((i, sent))
+        
+        chunks = []
+        current: List[Tuple[int, str]] = []
+        for p in sorted(by_paragraph):
+            group = by_paragraph[p]
+            if current and len(current) + len(group) > self.chunk_max_sentences:
+                chunks.append(current)
+                current = []
+            for start in range(0, len(group), self.chunk_max_sentences):
+                part = group[start:start + self.chunk_max_sentences]
+                if len(part) == self.chunk_max_sentences:
+                    chunks.append(part)
+                else:
+                    current.extend(part)
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    async def _ai_analyze_chunks(
+        self,
+        chunks: List[List[Tuple[int, str]]],
+        target_hsk_level: int,
+        language: str
+    ) -> Dict[int, Dict]:
+        """Sentence-level analysis of several chunks, at most chunk_concurrency at a time"""
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        
+        async def analyze_chunk(chunk):
+            async with semaphore:
+                return await self._ai_analyze_sentences(chunk, target_hsk_level, language)
+        
+        results = {}
+        for chunk_results in await asyncio.gather(*(analyze_chunk(c) for c in chunks)):
+            results.update(chunk_results)
+        return results
+    
+    def _system_instruction(self, language_name: str) -> str:
+        """System instruction shared by the sentence- and essay-level prompts"""
+        return f"""You are a professional Chinese language teacher analyzing student writing.
 
 CRITICAL INSTRUCTIONS:
 1. Provide ALL feedback in {language_name}
 2. ALL descriptions and suggestions MUST be in {language_name}
 3. The ONLY Chinese text should be in "correction" fields
-4. Analyze at TWO levels: sentence-level AND essay-level
-5. Be specific, clear, and constructive"""
-
-        # Comprehensive prompt
-        prompt = f"""Analyze this Chinese essay. Student's target: HSK {target_hsk_level}.
-
-FULL ESSAY:
-{full_text}
+4. Be specific, clear, and constructive"""
+    
+    async def _ai_analyze_sentences(
+        self,
+        numbered_sentences: List[Tuple[int, str]],
+        target_hsk_level: int,
+        language: str
+    ) -> Dict[int, Dict]:
+        """
+        Sentence-level analysis for the given (index, sentence) pairs
+        
+        Every complete sentence object is kept from each reply, even a
+        truncated one; sentences still missing are sent again on their own
+        (up to repair_attempts more calls, stopping early if a call adds
+        nothing).
+        
+        Returns:
+            Analysis per sentence index; sentences the model never returned
+            (or all of them, if the call fails) are absent
+        """
+        results: Dict[int, Dict] = {}
+        pending = list(numbered_sentences)
+        
+        for attempt in range(1 + self.repair_attempts):
+            if attempt:
+                SENTENCES_REREQUESTED.inc(len(pending))
+                logger.info("Re-requesting %s sentence(s) missing from the reply", len(pending))
+            
+            found = await self._request_sentences(pending, target_hsk_level, language)
+            results.update(found)
+            pending = [(i, sent) for i, sent in pending if i not in results]
+            if not pending or not found:
+                break
+        
+        if pending:
+            logger.warning("%s sentence(s) missing from the response", len(pending))
+        return results
+    
+    async def _request_sentences(
+        self,
+        numbered_sentences: List[Tuple[int, str]],
+        target_hsk_level: int,
+        language: str
+    ) -> Dict[int, Dict]:
+        """One sentence-level model call; returns the usable sentence objects in its reply"""
+        language_name = self.SUPPORTED_LANGUAGES.get(language, 'English')
+        prompt = self._sentence_prompt(numbered_sentences, target_hsk_level, language_name)
+        
+        try:
+            # Call GPT-4 (awaited, so other requests keep being served)
+            reply = await self._chat_completion(
+                self._system_instruction(language_name),
+                prompt,
+                max_tokens=4000,
+                call="sentences",
+                response_format=self._response_format("sentence_analysis", SENTENCE_ANALYSIS_SCHEMA)
+            )
+        except Exception as e:
+            logger.error("Sentence-level model call failed: %s", e)
+            return {}
+        
+        response_text = reply.text
+        
+        # Salvage every complete sentence object, even from a cut-off reply
+        with ANALYSIS_STAGE_SECONDS.time(stage="json_extraction"):
+            items = parse_array_items(response_text, 'sentence_analysis')
+        
+        wanted = {i for i, _ in numbered_sentences}
+        results = {
+            item['index']: item
+            for item in items
+            if self._is_sentence_item(item) and item['index'] in wanted
+        }
+        if not results:
+            logger.error(
+                "Sentence-level response contains no usable sentence analysis",
+                extra={'response_preview': response_text[:500]}
+            )
+        return results
+    
+    def _is_sentence_item(self, item: Dict) -> bool:
+        """Whether a sentence object has the fields merging and scoring rely on"""
+        index = item.get('index')
+        quality = item.get('overall_quality')
+        return (
+            isinstance(index, int)
+            and isinstance(quality, (int, float))
+            and not isinstance(quality, bool)
+            and isinstance(item.get('issues', []), list)
+        )
+    
+    async def _ai_stream_sentences(
+        self,
+        numbered_sentences: List[Tuple[int, str]],
+        target_hsk_level: int,
+        language: str
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Streaming version of _ai_analyze_sentences
+        
+        Yields (index, analysis) for each sentence as soon as the model has
+        finished writing its JSON object. If the stream ends (or fails)
+        part-way, the sentences received so far have already been yielded
+        and the rest are requested again, like _ai_analyze_sentences.
+        """
+        language_name = self.SUPPORTED_LANGUAGES.get(language, 'English')
+        pending = list(numbered_sentences)
+        
+        for attempt in range(1 + self.repair_attempts):
+            if attempt:
+                SENTENCES_REREQUESTED.inc(len(pending))
+                logger.info("Re-requesting %s sentence(s) missing from the streamed reply", len(pending))
+            
+            prompt = self._sentence_prompt(pending, target_hsk_level, language_name)
+            parser = ArrayItemParser('sentence_analysis')
+            wanted = {i for i, _ in pending}
+            
+            try:
+                async for delta in self._chat_completion_stream(
+                    self._system_instruction(language_name),
+                    prompt,
+                    max_tokens=4000,
+                    call="sentences",
+                    response_format=self._response_format("sentence_analysis", SENTENCE_ANALYSIS_SCHEMA)
+                ):
+                    for item in parser.feed(delta):
+                        if self._is_sentence_item(item) and item['index'] in wanted:
+                            wanted.discard(item['index'])
+                            yield item['index'], item
+            except Exception as e:
+                logger.error("Sentence-level model call failed: %s", e)
+            
+            received = len(pending) - len(wanted)
+            pending = [(i, sent) for i, sent in pending if i in wanted]
+            if not pending or not received:
+                break
+        
+        if pending:
+            logger.warning("%s sentence(s) missing from the streamed response", len(pending))
+    
+    async def _ai_stream_chunks(
+        self,
+        chunks: List[List[Tuple[int, str]]],
+        target_hsk_level: int,
+        language: str
+    ) -> AsyncIterator[Tuple[int, Dict]]:
+        """Stream several chunks concurrently, yielding results in arrival order"""
+        if len(chunks) == 1:
+            async for result in self._ai_stream_sentences(chunks[0], target_hsk_level, language):
+                yield result
+            return
+        
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def stream_chunk(chunk):
+            try:
+                async with semaphore:
+                    async for result in self._ai_stream_sentences(chunk, target_hsk_level, language):
+                        await queue.put(result)
+            finally:
+                await queue.put(None)  # One end marker per chunk
+        
+        tasks = [asyncio.create_task(stream_chunk(c)) for c in chunks]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                result = await queue.get()
+                if result is None:
+                    remaining -= 1
+                else:
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _sentence_prompt(
+        self,
+        numbered_sentences: List[Tuple[int, str]],
+        target_hsk_level: int,
+        language_name: str
+    ) -> str:
+        """Sentence-level prompt for the given (index, sentence) pairs"""
+        sentences_text = "\n".join([f"{i}. {s}" for i, s in numbered_sentences])
+        
+        return f"""Analyze these sentences from a Chinese essay. Student's target: HSK {target_hsk_level}.
 
-SENTENCES (for sentence-level analysis):
+SENTENCES:
 {sentences_text}
 
-PARAGRAPHS (for essay-level analysis):
-{paragraphs_text}
-
-Perform TWO types of analysis:
-
-PART 1: SENTENCE-LEVEL ANALYSIS
-
 For EACH sentence, analyze:
 
 1. **Grammar Correctness** (0-100)
@@ -205,7 +734,71 @@ For EACH sentence, analyze:
    - Collocation problems
    - Logic issues
 
-PART 2: ESSAY-LEVEL ANALYSIS
+Return JSON in this EXACT format, with one entry per sentence using the
+sentence's number as "index":
+
+{{
+  "sentence_analysis": [
+    {{
+      "index": 1,
+      "original": "sentence text",
+      "grammar_score": 85,
+      "semantic_score": 90,
+      "collocation_score": 80,
+      "overall_quality": 85,
+      "issues": [
+        {{
+          "type": "Error type in {language_name}",
+          "description": "Explanation in {language_name}",
+          "correction": "正确的中文",
+          "severity": "minor|major|critical"
+        }}
+      ],
+      "improvement_suggestion": "Specific advice in {language_name}"
+    }}
+  ]
+}}
+
+IMPORTANT:
+- Focus on individual sentence quality
+- ALL text in {language_name} except corrections"""
+    
+    async def _ai_analyze_essay(
+        self,
+        full_text: str,
+        paragraphs: List[str],
+        target_hsk_level: int,
+        language: str,
+        outline_only: bool = False
+    ) -> Optional[Dict]:
+        """
+        Essay-level analysis (structure, coherence, transitions, logic)
+        
+        Args:
+            outline_only: Send an outline of each paragraph (its opening and
+                closing sentences) instead of the full text; used for long
+                essays, whose sentences are analyzed separately in chunks
+        
+        Returns:
+            Dict with 'essay_analysis' and 'overall_coherence', or None if
+            the call fails
+        """
+        language_name = self.SUPPORTED_LANGUAGES.get(language, 'English')
+        
+        if outline_only:
+            essay_text = f"""ESSAY OUTLINE (each paragraph's opening and closing sentences; {len(full_text)} characters in total):
+{self._essay_outline(paragraphs)}"""
+        else:
+            paragraphs_text = "\n\n".join([f"[Paragraph {i+1}]\n{p}" for i, p in enumerate(paragraphs)])
+            essay_text = f"""FULL ESSAY:
+{full_text}
+
+PARAGRAPHS:
+{paragraphs_text}"""
+        
+        prompt = f"""Analyze the overall structure of this Chinese essay. Student's target: HSK {target_hsk_level}.
+
+{essay_text}
 
 Analyze the ENTIRE essay for:
 
@@ -251,26 +844,6 @@ IDENTIFY SPECIFIC ISSUES:
 Return JSON in this EXACT format:
 
 {{
-  "sentence_analysis": [
-    {{
-      "index": 1,
-      "original": "sentence text",
-      "grammar_score": 85,
-      "semantic_score": 90,
-      "collocation_score": 80,
-      "overall_quality": 85,
-      "issues": [
-        {{
-          "type": "Error type in {language_name}",
-          "description": "Explanation in {language_name}",
-          "correction": "正确的中文",
-          "severity": "minor|major|critical"
-        }}
-      ],
-      "improvement_suggestion": "Specific advice in {language_name}"
-    }}
-  ],
-  
   "essay_analysis": {{
     "structure_score": 85,
     "coherence_score": 80,
@@ -307,47 +880,176 @@ Return JSON in this EXACT format:
 }}
 
 IMPORTANT:
-- Sentence-level focuses on individual sentence quality
-- Essay-level focuses on how everything fits together
+- Focus on how everything fits together, not on individual sentences
 - Be specific about WHERE issues occur (which paragraph, between which sentences)
 - Provide actionable suggestions for improving flow and logic
-- ALL text in {language_name} except corrections"""
+- ALL text in {language_name}"""
 
+        response_text = ""
         try:
-            print(f"   Calling GPT-4 for comprehensive analysis...")
-            
-            # Call GPT-4
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_instruction},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=4000  # Increased for essay-level analysis
+            reply = await self._chat_completion(
+                self._system_instruction(language_name),
+                prompt,
+                max_tokens=1500,
+                call="essay",
+                response_format=self._response_format("essay_analysis", ESSAY_ANALYSIS_SCHEMA)
             )
             
-            response_text = response.choices[0].message.content
-            
-            # Log usage
-            usage = response.usage
-            print(f"Tokens: {usage.total_tokens} (in: {usage.prompt_tokens}, out: {usage.completion_tokens})")
-            
-            # Parse JSON
-            json_str = self._extract_json(response_text)
-            analysis_result = json.loads(json_str)
+            response_text = reply.text
             
-            print(f"Complete analysis finished")
-            return analysis_result
+            # Parse JSON (a bare object in structured-output mode)
+            with ANALYSIS_STAGE_SECONDS.time(stage="json_extraction"):
+                try:
+                    result = json.loads(response_text)
+                except json.JSONDecodeError:
+                    result = json.loads(self._extract_json(response_text))
+            if not isinstance(result, dict):
+                raise json.JSONDecodeError("Expected a JSON object", response_text, 0)
+            return result
             
         except json.JSONDecodeError as e:
-            print(f"JSON parse error: {e}")
-            print(f"   Response preview: {response_text[:500]}...")
-            return self._empty_ai_result(sentences)
+            logger.error(
+                "Essay-level response is not valid JSON: %s", e,
+                extra={'response_preview': response_text[:500]}
+            )
+            return None
             
         except Exception as e:
-            print(f"GPT-4 API error: {e}")
-            return self._empty_ai_result(sentences)
+            logger.error("Essay-level model call failed: %s", e)
+            return None
+    
+    def _essay_outline(self, paragraphs: List[str]) -> str:
+        """Outline for essay-level analysis: opening and closing sentence of each paragraph"""
+        lines = []
+        for i, paragraph in enumerate(paragraphs):
+            sentences = self._split_sentences(paragraph)
+            if len(sentences) <= 2:
+                outline = paragraph
+            else:
+                outline = f"{sentences[0]}。……（{len(sentences) - 2}句）……{sentences[-1]}。"
+            lines.append(f"[Paragraph {i+1}]\n{outline}")
+        return "\n\n".join(lines)
+    
+    def _sentence_cache_key(self, sentence: str, target_hsk_level: int, language: str) -> str:
+        """Cache key for one sentence's analysis"""
+        return AnalysisCache.make_key(
+            'sentence',
+            sentence,
+            target_hsk_level,
+            language,
+            self.model,
+            self.PROMPT_VERSION
+        )
+    
+    async def _cache_get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        """Look up cached sentence analyses (cache errors are treated as misses)"""
+        if self.cache is None or not keys:
+            return {}
+        try:
+            return await asyncio.to_thread(self.cache.get_many, 'sentence', keys)
+        except Exception as e:
+            logger.warning("Sentence cache lookup failed: %s", e)
+            return {}
+    
+    async def _cache_set_many(self, items: Dict[str, Dict]) -> None:
+        """Store fresh sentence analyses (cache errors never fail the analysis)"""
+        if self.cache is None:
+            return
+        try:
+            await asyncio.to_thread(self.cache.set_many, 'sentence', items)
+        except Exception as e:
+            logger.warning("Sentence cache write failed: %s", e)
+    
+    async def _chat_completion(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict] = None
+    ) -> LLMReply:
+        """
+        Send one model request without blocking the event loop
+        
+        Waits for a free slot when max_concurrency calls are already in flight.
+        The router picks the provider and applies its call policy (deadline,
+        retries, circuit breaker) and failover; the slot is kept while
+        waiting to retry, so a rate-limited provider is not sent more work
+        meanwhile. The call's latency (including retries, excluding the wait
+        for a slot) is recorded as stage llm_<call>, and its token usage
+        under call.
+        
+        Args:
+            response_format: OpenAI response_format (see _response_format);
+                None leaves the reply format to the prompt
+        
+        Raises:
+            CircuitOpenError, TimeoutError or the provider's error; see
+            LLMRouter.complete
+        """
+        async with self._llm_semaphore:
+            with ANALYSIS_STAGE_SECONDS.time(stage=f"llm_{call}"):
+                reply = await self.router.complete(
+                    system_instruction, prompt, max_tokens, call, response_format
+                )
+        self._record_usage(call, reply)
+        if reply.truncated:
+            self._record_truncation(call, max_tokens)
+        return reply
+    
+    async def _chat_completion_stream(
+        self,
+        system_instruction: str,
+        prompt: str,
+        max_tokens: int,
+        call: str,
+        response_format: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streaming model request: yields content deltas as they arrive
+        
+        Holds a concurrency slot until the stream is finished. Opening the
+        stream is retried (and failed over) by the router; once content has
+        arrived a failure is not retried, and a stream that stalls for
+        longer than the policy's timeout fails. Latency (to the end of the
+        stream) and usage are recorded like _chat_completion.
+        """
+        async with self._llm_semaphore:
+            with ANALYSIS_STAGE_SECONDS.time(stage=f"llm_{call}"):
+                async for piece in self.router.stream(
+                    system_instruction, prompt, max_tokens, call, response_format
+                ):
+                    if piece.text:
+                        yield piece.text
+                    if piece.truncated:
+                        self._record_truncation(call, max_tokens)
+                    if piece.prompt_tokens or piece.completion_tokens:
+                        self._record_usage(call, piece)
+    
+    def _response_format(self, name: str, schema: Dict) -> Optional[Dict]:
+        """response_format for a call, according to settings.llm_response_format"""
+        if self.response_format == "json_schema":
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": name, "strict": True, "schema": schema}
+            }
+        if self.response_format == "json_object":
+            return {"type": "json_object"}
+        return None
+    
+    def _record_truncation(self, call: str, max_tokens: int) -> None:
+        """Count a reply that was cut off at max_tokens"""
+        LLM_TRUNCATED_REPLIES.inc(call=call)
+        logger.warning("Model reply truncated at %s tokens", max_tokens, extra={'call': call})
+    
+    def _record_usage(self, call: str, reply: LLMReply) -> None:
+        """Count a model call's prompt and completion tokens"""
+        LLM_TOKENS.inc(reply.prompt_tokens, call=call, kind="prompt")
+        LLM_TOKENS.inc(reply.completion_tokens, call=call, kind="completion")
+        logger.debug(
+            "Model call used %s tokens", reply.prompt_tokens + reply.completion_tokens,
+            extra={'call': call, 'prompt_tokens': reply.prompt_tokens, 'completion_tokens': reply.completion_tokens}
+        )
     
     def _calculate_quality_score(self, ai_analysis: Dict) -> int:
         """
@@ -458,7 +1160,8 @@ IMPORTANT:
                 'specific_issues_label': 'Specific Issues to Address',
                 'sentence_errors_label': 'Sentence-Level Errors',
                 'common_error': 'Found {count} instances of "{error_type}"',
-                'excellent': 'Excellent work overall - both sentence quality and essay structure are strong!'
+                'excellent': 'Excellent work overall - both sentence quality and essay structure are strong!',
+                'vocabulary_only': 'Grammar and structure feedback is temporarily unavailable; this score reflects vocabulary only. Please try again later.'
             },
             'zh': {
                 'essay_structure_label': '文章结构',
@@ -467,7 +1170,8 @@ IMPORTANT:
                 'specific_issues_label': '需要注意的具体问题',
                 'sentence_errors_label': '句子层面的错误',
                 'common_error': '发现 {count} 处「{error_type}」',
-                'excellent': '整体写作优秀 - 句子质量和文章结构都很好！'
+                'excellent': '整体写作优秀 - 句子质量和文章结构都很好！',
+                'vocabulary_only': '语法和结构分析暂时不可用，本次分数仅基于词汇。请稍后再试。'
             },
             'es': {
                 'essay_structure_label': 'Estructura del Ensayo',
@@ -476,7 +1180,8 @@ IMPORTANT:
                 'specific_issues_label': 'Problemas Específicos a Abordar',
                 'sentence_errors_label': 'Errores a Nivel de Oración',
                 'common_error': 'Se encontraron {count} casos de "{error_type}"',
-                'excellent': '¡Excelente trabajo en general - tanto la calidad de las oraciones como la estructura del ensayo son sólidas!'
+                'excellent': '¡Excelente trabajo en general - tanto la calidad de las oraciones como la estructura del ensayo son sólidas!',
+                'vocabulary_only': 'Los comentarios de gramática y estructura no están disponibles temporalmente; esta puntuación solo refleja el vocabulario. Inténtalo de nuevo más tarde.'
             },
             'fr': {
                 'essay_structure_label': 'Structure de l\'Essai',
@@ -485,7 +1190,8 @@ IMPORTANT:
                 'specific_issues_label': 'Problèmes Spécifiques à Traiter',
                 'sentence_errors_label': 'Erreurs au Niveau de la Phrase',
                 'common_error': '{count} instances de "{error_type}" trouvées',
-                'excellent': 'Excellent travail dans l\'ensemble - la qualité des phrases et la structure de l\'essai sont solides!'
+                'excellent': 'Excellent travail dans l\'ensemble - la qualité des phrases et la structure de l\'essai sont solides!',
+                'vocabulary_only': 'L\'analyse de la grammaire et de la structure est temporairement indisponible ; ce score ne reflète que le vocabulaire. Réessayez plus tard.'
             },
             'ja': {
                 'essay_structure_label': 'エッセイの構造',
@@ -494,7 +1200,8 @@ IMPORTANT:
                 'specific_issues_label': '対処すべき具体的な問題',
                 'sentence_errors_label': '文レベルのエラー',
                 'common_error': '「{error_type}」が{count}箇所見つかりました',
-                'excellent': '全体的に優れた作品です - 文の品質とエッセイ構造の両方が優れています！'
+                'excellent': '全体的に優れた作品です - 文の品質とエッセイ構造の両方が優れています！',
+                'vocabulary_only': '文法と構成の分析は一時的に利用できません。このスコアは語彙のみに基づいています。後でもう一度お試しください。'
             },
             'ko': {
                 'essay_structure_label': '에세이 구조',
@@ -503,14 +1210,15 @@ IMPORTANT:
                 'specific_issues_label': '해결해야 할 구체적인 문제',
                 'sentence_errors_label': '문장 수준 오류',
                 'common_error': '"{error_type}"이(가) {count}개 발견되었습니다',
-                'excellent': '전반적으로 훌륭합니다 - 문장 품질과 에세이 구조 모두 우수합니다!'
+                'excellent': '전반적으로 훌륭합니다 - 문장 품질과 에세이 구조 모두 우수합니다!',
+                'vocabulary_only': '문법 및 구조 분석을 일시적으로 사용할 수 없습니다. 이 점수는 어휘만 반영합니다. 나중에 다시 시도해 주세요.'
             },
         }
         
         return templates.get(language, templates['en'])
     
     def _extract_json(self, text: str) -> str:
-        """Extract JSON from GPT response"""
+        """Extract JSON from a reply that wraps it in a code fence or prose"""
         json_match = re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL)
         if json_match:
             return json_match.group(1)
@@ -536,20 +1244,52 @@ IMPORTANT:
             'output_language': 'en'
         }
     
+    def _vocabulary_only_result(
+        self,
+        sentences: List[str],
+        paragraphs: List[str],
+        language: str
+    ) -> Dict:
+        """
+        Result used while the model is unavailable (circuit breaker open)
+        
+        Has no sentence- or essay-level analysis; ai_analysis is flagged
+        vocabulary_only so the overall score is based on vocabulary alone.
+        """
+        templates = self._get_recommendation_templates(language)
+        return {
+            'sentence_count': len(sentences),
+            'paragraph_count': len(paragraphs),
+            'ai_analysis': {
+                'sentence_analysis': [],
+                'essay_analysis': {},
+                'overall_coherence': 0,
+                'analysis_unavailable': True,
+                'vocabulary_only': True
+            },
+            'quality_score': 0,
+            'recommendations': [templates['vocabulary_only']],
+            'output_language': language
+        }
+    
+    def _empty_sentence_result(self, sentence: str, index: int = 0) -> Dict:
+        """Return empty result for one sentence the AI did not analyze"""
+        return {
+            'index': index,
+            'original': sentence,
+            'grammar_score': 0,
+            'semantic_score': 0,
+            'collocation_score': 0,
+            'overall_quality': 0,
+            'issues': [],
+            'improvement_suggestion': 'Analysis unavailable'
+        }
+    
     def _empty_ai_result(self, sentences: List[str]) -> Dict:
         """Return empty AI result when API fails"""
         return {
             'sentence_analysis': [
-                {
-                    'index': i+1,
-                    'original': sent,
-                    'grammar_score': 0,
-                    'semantic_score': 0,
-                    'collocation_score': 0,
-                    'overall_quality': 0,
-                    'issues': [],
-                    'improvement_suggestion': 'Analysis unavailable'
-                }
+                self._empty_sentence_result(sent, i+1)
                 for i, sent in enumerate(sentences)
             ],
             'essay_analysis': {
@@ -560,7 +1300,8 @@ IMPORTANT:
                 'logic_score': 0,
                 'essay_issues': []
             },
-            'overall_coherence': 0
+            'overall_coherence': 0,
+            'analysis_unavailable': True
         }
 
 
@@ -0,0 +1,102 @@
+"""
+Authenticated-User Cache
+
+Every authenticated request resolves the JWT's user id to a User row; with
+draft autosaves that is several lookups per user per second. This cache
+keeps a snapshot of recently seen users' columns in memory (LRU, short TTL)
+so those requests skip the database.
+
+Endpoints that change a user (settings, password reset, login) invalidate
+the entry. The cache is per process, so a change made through another
+worker becomes visible here when the entry expires; keep the TTL short.
+
+Cached users are detached copies: read their columns, but load the row
+from a session before modifying it. The password hash is never cached.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import get_settings
+from app.metrics import counter
+from app.models import User
+
+USER_CACHE_REQUESTS = counter(
+    "user_cache_requests_total", "Authenticated-user cache lookups", labels=("result",)
+)
+USER_CACHE_INVALIDATIONS = counter(
+    "user_cache_invalidations_total", "Users dropped from the cache after a change"
+)
+
+# User columns kept in the cache
+FIELDS = tuple(
+    column.key for column in User.__table__.columns if column.key != 'hashed_password'
+)
+
+
+class UserCache:
+    """In-process LRU of user snapshots with a time-to-live"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        settings = get_settings()
+        self.ttl = ttl_seconds if ttl_seconds is not None else settings.user_cache_ttl_seconds
+        self.max_entries = max_entries if max_entries is not None else settings.user_cache_max_entries
+        self.enabled = self.ttl > 0 and self.max_entries > 0
+
+        # user id -> (expires at, column snapshot)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[User]:
+        """Return a detached copy of the cached user, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                snapshot = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[user_id]
+                snapshot = None
+
+        if snapshot is None:
+            USER_CACHE_REQUESTS.inc(result="miss")
+            return None
+
+        USER_CACHE_REQUESTS.inc(result="hit")
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, user: User) -> None:
+        """Cache a snapshot of a user loaded from the database"""
+        if not self.enabled:
+            return
+
+        snapshot = {field: getattr(user, field) for field in FIELDS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop a user whose row has changed"""
+        with self._lock:
+            removed = self._entries.pop(user_id, None)
+        if removed is not None:
+            USER_CACHE_INVALIDATIONS.inc()
+
+
+@lru_cache()
+def get_user_cache() -> UserCache:
+    """Get the process-wide user cache"""
+    return UserCache()
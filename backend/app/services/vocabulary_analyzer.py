@@ -1,67 +1,178 @@
 # backend/app/services/vocabulary_analyzer.py
 import jieba
-from pypinyin import lazy_pinyin
-from typing import Dict, List
-from collections import Counter
-import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 import os
 
+from app.config import get_settings
+from app.services.hsk_lexicon import HSKLexicon, load_hsk_vocabulary
+from app.metrics import ANALYSIS_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '../..')
+
+
+def initialize_jieba(cache_file: Optional[str] = None) -> None:
+    """
+    Load jieba's prefix dictionary, from its cache file when present
+    
+    Run in a background thread at startup so the first analysis does not
+    pay for building the dictionary. jieba initializes behind its own lock,
+    so segmentation calls made meanwhile simply wait for it.
+    """
+    if cache_file is None:
+        cache_file = get_settings().jieba_cache_file
+    if cache_file:
+        if not os.path.isabs(cache_file):
+            cache_file = os.path.normpath(os.path.join(BACKEND_DIR, cache_file))
+        jieba.dt.cache_file = cache_file
+    jieba.initialize()
+
+
+@lru_cache(maxsize=50000)
+def _pinyin(word: str) -> str:
+    """Pinyin for words not in the HSK list (cached, pypinyin is slow)"""
+    # Imported on first use: loading pypinyin's dictionaries slows startup
+    from pypinyin import lazy_pinyin
+    return ' '.join(lazy_pinyin(word))
+
+
+def _segment(text: str) -> List[str]:
+    """Segment text with jieba, keeping multi-character words"""
+    return [w for w in jieba.lcut(text) if len(w) > 1]
+
+
+def _segment_batch(texts: List[str]) -> List[List[str]]:
+    """Segment a batch of texts (runs in a worker process)"""
+    return [_segment(text) for text in texts]
+
+
 class VocabularyAnalyzer:
     """Analyze vocabulary in Chinese text"""
     
     def __init__(self):
         self.hsk_vocab = self._load_hsk_vocabulary()
-        print(f"✓ Loaded {len(self.hsk_vocab)} HSK vocabulary words")
+        # word -> (distribution key, level, pinyin, translation) or None.
+        # The compiled lexicon looks words up in its shared memory map; a
+        # JSON-loaded dict is turned into a tuple table once
+        if isinstance(self.hsk_vocab, HSKLexicon):
+            self._hsk_lookup = self.hsk_vocab.lookup
+            source = "compiled lexicon"
+        else:
+            self._hsk_lookup = self._build_lookup(self.hsk_vocab).get
+            source = "JSON"
+        logger.info("Loaded %s HSK vocabulary words (%s)", len(self.hsk_vocab), source)
     
-    def _load_hsk_vocabulary(self) -> Dict:
-        """Load HSK vocabulary from JSON file"""
-        vocab_path = os.path.join(
-            os.path.dirname(__file__), 
-            '../../data/hsk_vocabulary.json'
-        )
-        
-        try:
-            with open(vocab_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"⚠️  Warning: HSK vocabulary file not found at {vocab_path}")
-            return {}
+    def _load_hsk_vocabulary(self) -> Union[HSKLexicon, Dict]:
+        """Load HSK vocabulary (compiled lexicon if up to date, else JSON file)"""
+        return load_hsk_vocabulary()
+    
+    def _build_lookup(self, hsk_vocab: Dict) -> Dict[str, Tuple[str, int, str, str]]:
+        """Precompute per-word HSK details used by analyze()"""
+        return {
+            word: (
+                str(entry['level']),
+                entry['level'],
+                entry['pinyin'],
+                entry.get('translation', '')
+            )
+            for word, entry in hsk_vocab.items()
+        }
     
     def analyze(self, text: str) -> Dict:
         """Analyze text vocabulary"""
-        # Segment text
-        words = [w for w in jieba.lcut(text) if len(w) > 1]
+        with ANALYSIS_STAGE_SECONDS.time(stage="segmentation"):
+            words = _segment(text)
+        with ANALYSIS_STAGE_SECONDS.time(stage="hsk_lookup"):
+            return self._analyze_words(words)
+    
+    def analyze_many(
+        self,
+        texts: Iterable[str],
+        workers: Optional[int] = None,
+        batch_size: int = 32
+    ) -> Iterator[Dict]:
+        """
+        Analyze many texts, yielding one result per text in input order
         
+        Segmentation (the expensive part) runs in a process pool in batches
+        of batch_size texts; HSK lookups happen here in the parent process.
+        Only a bounded number of batches is in flight at a time, so `texts`
+        can be a lazy generator over a large table and memory stays flat.
+        
+        Args:
+            texts: Texts to analyze (any iterable, consumed lazily)
+            workers: Worker processes (defaults to CPU count; 1 disables the pool)
+            batch_size: Texts sent to a worker per task
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        if workers <= 1:
+            for text in texts:
+                yield self.analyze(text)
+            return
+        
+        # Load jieba's dictionary once here; forked workers inherit it
+        jieba.initialize()
+        
+        texts = iter(texts)
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=jieba.initialize) as pool:
+            pending = deque()
+            while True:
+                batch = list(islice(texts, batch_size))
+                if batch:
+                    pending.append(pool.submit(_segment_batch, batch))
+                if not pending:
+                    break
+                if batch and len(pending) < max_pending:
+                    continue
+                for words in pending.popleft().result():
+                    yield self._analyze_words(words)
+    
+    def _analyze_words(self, words: List[str]) -> Dict:
+        """Analyze already-segmented words"""
         if not words:
             return self._empty_result()
         
+        # Count every word in a single pass
+        counts = Counter(words)
+        
         # Basic stats
         total_words = len(words)
-        unique_words = set(words)
-        unique_count = len(unique_words)
+        unique_count = len(counts)
         ttr = unique_count / total_words if total_words > 0 else 0
         
         # HSK distribution
         hsk_dist = {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0, '6': 0, 'unknown': 0}
         word_details = {}
+        hsk_lookup = self._hsk_lookup
         
-        for word in unique_words:
-            if word in self.hsk_vocab:
-                level = str(self.hsk_vocab[word]['level'])
-                hsk_dist[level] += words.count(word)
+        for word, frequency in counts.items():
+            entry = hsk_lookup(word)
+            if entry is not None:
+                level_key, level, pinyin, translation = entry
+                hsk_dist[level_key] += frequency
                 word_details[word] = {
-                    'level': self.hsk_vocab[word]['level'],
-                    'pinyin': self.hsk_vocab[word]['pinyin'],
-                    'translation': self.hsk_vocab[word].get('translation', ''),
-                    'frequency': words.count(word)
+                    'level': level,
+                    'pinyin': pinyin,
+                    'translation': translation,
+                    'frequency': frequency
                 }
             else:
-                hsk_dist['unknown'] += words.count(word)
+                hsk_dist['unknown'] += frequency
                 word_details[word] = {
                     'level': 0,
-                    'pinyin': ' '.join(lazy_pinyin(word)),
+                    'pinyin': _pinyin(word),
                     'translation': '',
-                    'frequency': words.count(word)
+                    'frequency': frequency
                 }
         
         # Advanced vocab ratio
@@ -3,9 +3,21 @@ Complete Writing Analyzer
 
 Combines vocabulary and sentence analysis into a unified system.
 """
-from typing import Dict, List
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.config import get_settings
 from app.services.vocabulary_analyzer import VocabularyAnalyzer
 from app.services.sentence_analyzer import SentenceAnalyzer
+from app.services.analysis_cache import AnalysisCache
+from app.metrics import ANALYSIS_STAGE_SECONDS, counter
+
+logger = logging.getLogger(__name__)
+
+ANALYSES_COALESCED = counter(
+    "analyses_coalesced_total", "Essay analyses answered by joining an identical one already running"
+)
 
 
 class WritingAnalyzer:
@@ -18,12 +30,23 @@ class WritingAnalyzer:
     - Essay-level analysis (structure, coherence, transitions via AI)
     """
     
-    def __init__(self):
-        """Initialize all analyzers"""
-        print("🔧 Initializing Writing Analyzer...")
+    def __init__(self, cache: Optional[AnalysisCache] = None):
+        """
+        Initialize all analyzers
+
+        Args:
+            cache: Result cache for whole essays and single sentences
+                (defaults to a database-backed cache when
+                settings.analysis_cache_enabled is set)
+        """
+        if cache is None and get_settings().analysis_cache_enabled:
+            cache = AnalysisCache()
+        self.cache = cache
         self.vocab_analyzer = VocabularyAnalyzer()
-        self.sentence_analyzer = SentenceAnalyzer()
-        print("✓ Writing Analyzer ready\n")
+        self.sentence_analyzer = SentenceAnalyzer(cache=cache)
+        # Analyses running now, by cache key (see analyze_essay)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        logger.info("Writing analyzer ready (result cache %s)", 'enabled' if self.cache else 'disabled')
     
     async def analyze_essay(
         self, 
@@ -46,54 +69,171 @@ class WritingAnalyzer:
             - sentences: sentence and essay-level analysis from AI
             - scoring: overall scores
             - recommendations: actionable feedback
+        
+        Identical submissions (same cache key) made while one is being
+        analyzed share that analysis instead of starting their own. The
+        shared result dict must be treated as read-only.
         """
-        print(f"ANALYZING ESSAY")
-        print(f"Target HSK Level: {target_hsk_level}")
-        print(f"Output Language: {language}")
+        key = self._cache_key(text, target_hsk_level, language)
+        
+        task = self._in_flight.get(key)
+        if task is not None:
+            ANALYSES_COALESCED.inc()
+            logger.info("Joining an identical analysis already in progress")
+        else:
+            # Own task, so the waiters are not cancelled with the first caller
+            task = asyncio.ensure_future(self._analyze_essay(text, target_hsk_level, language, key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._flight_done(key, done))
+        
+        return await asyncio.shield(task)
+    
+    def _flight_done(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished analysis (its waiters already have the outcome)"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every waiter has gone
+    
+    async def _analyze_essay(
+        self,
+        text: str,
+        target_hsk_level: int,
+        language: str,
+        key: str
+    ) -> Dict:
+        """Run one essay analysis (see analyze_essay)"""
+        logger.debug("Analyzing essay (HSK %s, language %s)", target_hsk_level, language)
+        
+        # 0. Return a stored result for identical (normalized) submissions
+        cache_key = None
+        if self.cache is not None:
+            cache_key = key
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                logger.info("Essay analysis served from cache")
+                return cached
         
         # 1. Basic statistics
         basic_stats = self._calculate_basic_stats(text)
-        print(f"Basic stats calculated")
-        print(f" Characters: {basic_stats['char_count']}")
-        print(f" Paragraphs: {basic_stats['paragraph_count']}")
         
         # 2. Vocabulary analysis
-        print(f"\nAnalyzing vocabulary...")
         vocab_analysis = self.vocab_analyzer.analyze(text)
-        print(f"Vocabulary analysis complete")
-        print(f" Vocabulary score: {vocab_analysis['vocabulary_richness_score']}/100")
-        print(f" Total words: {vocab_analysis['total_words']}")
-        print(f" Unique words: {vocab_analysis['unique_words']}")
+        logger.debug(
+            "Vocabulary analyzed",
+            extra={
+                'char_count': basic_stats['char_count'],
+                'paragraph_count': basic_stats['paragraph_count'],
+                'vocabulary_score': vocab_analysis['vocabulary_richness_score'],
+                'total_words': vocab_analysis['total_words'],
+                'unique_words': vocab_analysis['unique_words']
+            }
+        )
         
         # 3. Sentence & Essay analysis (AI-powered)
-        print(f"\nAnalyzing sentences and essay structure with AI...")
         sentence_analysis = await self.sentence_analyzer.analyze(
             text, 
             target_hsk_level,
             language
         )
-        print(f"Sentence & essay analysis complete")
-        print(f" Sentence quality: {sentence_analysis['quality_score']}/100")
         
-        # 4. Calculate overall scoring
-        print(f"\nCalculating overall scores...")
-        scoring = self._calculate_overall_score(
+        result = self._build_result(
+            basic_stats,
             vocab_analysis,
-            sentence_analysis
+            sentence_analysis,
+            target_hsk_level,
+            language
         )
-        print(f"Scoring complete")
-        print(f" Overall score: {scoring['overall']}/100")
         
-        # 5. Generate recommendations
-        print(f"\nGenerating recommendations...")
-        recommendations = self._generate_recommendations(
+        # Only cache real AI results, never the fallback used when the API failed
+        if cache_key and not sentence_analysis['ai_analysis'].get('analysis_unavailable'):
+            await self._cache_set(cache_key, result)
+        
+        return result
+    
+    async def analyze_essay_stream(
+        self,
+        text: str,
+        target_hsk_level: int = 3,
+        language: str = "en"
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Analyze an essay, reporting each part as soon as it is ready
+        
+        The local parts come first (within milliseconds), then sentence
+        results as the model streams them.
+        
+        Yields (event, data) pairs:
+        - ('basic_stats', ...) and ('vocabulary', ...)
+        - ('sentence', item) per sentence and ('essay', essay_analysis)
+        - ('result', complete result), the same dict analyze_essay returns
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(text, target_hsk_level, language)
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                logger.info("Essay analysis served from cache")
+                yield 'result', cached
+                return
+        
+        basic_stats = self._calculate_basic_stats(text)
+        yield 'basic_stats', basic_stats
+        
+        vocab_analysis = self.vocab_analyzer.analyze(text)
+        yield 'vocabulary', vocab_analysis
+        
+        sentence_analysis = None
+        async for event, data in self.sentence_analyzer.analyze_stream(text, target_hsk_level, language):
+            if event == 'analysis':
+                sentence_analysis = data
+            else:
+                yield event, data
+        
+        result = self._build_result(
+            basic_stats,
             vocab_analysis,
             sentence_analysis,
-            target_hsk_level
+            target_hsk_level,
+            language
         )
-        print(f"✓ Generated {len(recommendations)} recommendation(s)")
         
-        print(f"✅ ANALYSIS COMPLETE")
+        if cache_key and not sentence_analysis['ai_analysis'].get('analysis_unavailable'):
+            await self._cache_set(cache_key, result)
+        
+        yield 'result', result
+    
+    def _build_result(
+        self,
+        basic_stats: Dict,
+        vocab_analysis: Dict,
+        sentence_analysis: Dict,
+        target_hsk_level: int,
+        language: str
+    ) -> Dict:
+        """Score the analyses and assemble the complete result"""
+        with ANALYSIS_STAGE_SECONDS.time(stage="scoring"):
+            # 4. Calculate overall scoring
+            scoring = self._calculate_overall_score(
+                vocab_analysis,
+                sentence_analysis
+            )
+            
+            # 5. Generate recommendations
+            recommendations = self._generate_recommendations(
+                vocab_analysis,
+                sentence_analysis,
+                target_hsk_level
+            )
+        
+        logger.info(
+            "Essay analysis complete",
+            extra={
+                'overall_score': scoring['overall'],
+                'sentence_quality': sentence_analysis['quality_score'],
+                'recommendations': len(recommendations)
+            }
+        )
         return {
             'basic_stats': basic_stats,
             'vocabulary': vocab_analysis,
@@ -104,6 +244,33 @@ class WritingAnalyzer:
             'output_language': language
         }
     
+    def _cache_key(self, text: str, target_hsk_level: int, language: str) -> str:
+        """Cache key: normalized text + everything that changes the result"""
+        return AnalysisCache.make_key(
+            'essay',
+            text,
+            target_hsk_level,
+            language,
+            self.sentence_analyzer.model,
+            SentenceAnalyzer.PROMPT_VERSION
+        )
+    
+    async def _cache_get(self, key: str) -> Optional[Dict]:
+        """Look up a cached result (cache errors are treated as misses)"""
+        try:
+            with ANALYSIS_STAGE_SECONDS.time(stage="cache_lookup"):
+                return await asyncio.to_thread(self.cache.get, 'essay', key)
+        except Exception as e:
+            logger.warning("Analysis cache lookup failed: %s", e)
+            return None
+    
+    async def _cache_set(self, key: str, result: Dict) -> None:
+        """Store a result (cache errors never fail the analysis)"""
+        try:
+            await asyncio.to_thread(self.cache.set, 'essay', key, result)
+        except Exception as e:
+            logger.warning("Analysis cache write failed: %s", e)
+    
     def _calculate_basic_stats(self, text: str) -> Dict:
         """Calculate basic text statistics"""
         import re
@@ -121,8 +288,8 @@ class WritingAnalyzer:
             'paragraph_count': paragraph_count
         }
     
+    @staticmethod
     def _calculate_overall_score(
-        self,
         vocab_analysis: Dict,
         sentence_analysis: Dict
     ) -> Dict:
@@ -140,7 +307,12 @@ class WritingAnalyzer:
         # Get essay-level scores if available
         essay_data = sentence_analysis.get('ai_analysis', {}).get('essay_analysis', {})
         
-        if essay_data:
+        if sentence_analysis.get('ai_analysis', {}).get('vocabulary_only'):
+            # Model unavailable: score what was analyzed rather than count
+            # the missing parts as zero
+            overall = vocab_score
+            essay_score = 0
+        elif essay_data:
             structure = essay_data.get('structure_score', 0)
             coherence = essay_data.get('coherence_score', 0)
             transition = essay_data.get('transition_score', 0)
@@ -210,8 +382,9 @@ class WritingAnalyzer:
         
         # Add vocabulary recommendations if needed
         vocab_recs = self._get_vocabulary_recommendations(vocab_analysis, target_level)
-        if vocab_recs and not sentence_recs:
-            # Only add vocab recs if no sentence/essay issues
+        vocabulary_only = sentence_analysis.get('ai_analysis', {}).get('vocabulary_only')
+        if vocab_recs and (not sentence_recs or vocabulary_only):
+            # Only add vocab recs if no sentence/essay issues (or no AI feedback)
             recommendations.extend(vocab_recs)
         
         # Default if no issues
@@ -245,6 +418,25 @@ class WritingAnalyzer:
         return recommendations
 
 
+
+_analyzer: Optional[WritingAnalyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_writing_analyzer() -> WritingAnalyzer:
+    """
+    Get the shared WritingAnalyzer, creating it on first use
+    
+    Keeps the HSK lexicon, OpenAI client and caches out of import time, so
+    the app (and anything importing the API modules) starts without them.
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = WritingAnalyzer()
+    return _analyzer
+
 # For testing
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,127 @@
+"""
+SQLite write-contention benchmark
+
+Simulates concurrent autosaves (each an UPDATE + COMMIT of one draft) while
+other threads keep reading the drafts list, once with SQLite's default
+settings and once with the "performance" profile from app.database
+(WAL, synchronous=NORMAL, busy timeout, mmap, cache size).
+
+Reports committed writes per second, commit latency percentiles, and how
+many writes failed with "database is locked".
+
+Run from backend/:
+    python -m benchmarks.bench_db_writes [--writers 8] [--readers 4] [--seconds 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Settings
+from app.database import Base, build_engine
+from app.models import Draft, User
+
+
+def setup(engine, drafts: int):
+    """Create the schema and one user with `drafts` drafts"""
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    user = User(email="bench@example.com", username="bench", hashed_password="x")
+    db.add(user)
+    db.flush()
+    ids = []
+    for i in range(drafts):
+        draft = Draft(user_id=user.id, title=f"Draft {i}", content="我喜欢学习中文。" * 50)
+        db.add(draft)
+        db.flush()
+        ids.append(draft.id)
+    user_id = user.id
+    db.commit()
+    db.close()
+    return user_id, ids
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    """Run the workload against a fresh database file with one profile"""
+    directory = tempfile.mkdtemp(prefix="bench_db_")
+    url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    # The default profile keeps Python's own 5 s lock wait
+    engine = build_engine(url, Settings(sqlite_profile=profile))
+    Session = sessionmaker(bind=engine)
+    user_id, draft_ids = setup(engine, drafts=writers * 4)
+
+    latencies = []
+    errors = [0]
+    reads = [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def writer(n: int):
+        own = draft_ids[n::writers]
+        i = 0
+        while time.perf_counter() < stop:
+            db = Session()
+            start = time.perf_counter()
+            try:
+                draft = db.get(Draft, own[i % len(own)])
+                draft.content = draft.content[1:] + draft.content[0]
+                db.commit()
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                db.rollback()
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+            i += 1
+
+    def reader():
+        while time.perf_counter() < stop:
+            db = Session()
+            try:
+                db.query(Draft.id, Draft.title, Draft.content).filter(Draft.user_id == user_id).all()
+                with lock:
+                    reads[0] += 1
+            except OperationalError:
+                pass
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        'writes_per_s': len(latencies) / seconds,
+        'reads_per_s': reads[0] / seconds,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'locked': errors[0]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite write-contention benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"\n{args.writers} writer(s), {args.readers} reader(s), {args.seconds:.0f}s per profile\n")
+    print(f"{'profile':>12} {'writes/s':>10} {'reads/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'locked':>7}")
+    for profile in ("default", "performance"):
+        r = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(f"{profile:>12} {r['writes_per_s']:>10.1f} {r['reads_per_s']:>10.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['locked']:>7}")
@@ -0,0 +1,78 @@
+"""
+Application cold-start benchmark
+
+Starts uvicorn in a fresh process per run, with OPENAI_API_KEY unset (the
+app must boot without it), and measures the time until GET /health
+answers. Reports the median and fails when it exceeds the target.
+
+Run from backend/:
+    python -m benchmarks.bench_startup [--runs 5] [--target 3.0]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def boot_once(timeout: float = 30.0) -> float:
+    """Seconds from process start to a successful /health response"""
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    port = free_port()
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise RuntimeError(f"Server not healthy after {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure application cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=3.0, help="Max median seconds from process start to healthy")
+    args = parser.parse_args()
+
+    boot_once()  # Warm the bytecode cache so runs measure startup, not compilation
+
+    timings = []
+    for i in range(args.runs):
+        elapsed = boot_once()
+        timings.append(elapsed)
+        print(f"  run {i + 1}: {elapsed:.2f}s")
+
+    median = statistics.median(timings)
+    print(f"\nMedian cold start: {median:.2f}s (target {args.target:.2f}s)")
+    if median > args.target:
+        print("❌ Startup is slower than the target")
+        sys.exit(1)
+    print("✓ Within target")
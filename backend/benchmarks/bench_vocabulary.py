@@ -0,0 +1,118 @@
+"""
+Vocabulary analyzer throughput benchmark
+
+Compares the current VocabularyAnalyzer.analyze against the previous
+implementation (one words.count() scan per unique word) on synthetic essays
+of 500, 5 000 and 50 000 characters.
+
+Run from backend/:
+    python -m benchmarks.bench_vocabulary
+"""
+import random
+import time
+
+import jieba
+from pypinyin import lazy_pinyin
+
+from app.services.vocabulary_analyzer import VocabularyAnalyzer
+
+SIZES = [500, 5000, 50000]
+MIN_SECONDS = 2.0  # Minimum measuring time per (implementation, size)
+
+# Common characters used to pad essays with non-HSK words
+FILLER_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处府研"
+
+
+def legacy_analyze(analyzer: VocabularyAnalyzer, text: str) -> dict:
+    """The original analyze(): words.count() for every unique word"""
+    words = [w for w in jieba.lcut(text) if len(w) > 1]
+    if not words:
+        return analyzer._empty_result()
+
+    total_words = len(words)
+    unique_words = set(words)
+    unique_count = len(unique_words)
+    ttr = unique_count / total_words if total_words > 0 else 0
+
+    hsk_dist = {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0, '6': 0, 'unknown': 0}
+    word_details = {}
+
+    for word in unique_words:
+        if word in analyzer.hsk_vocab:
+            level = str(analyzer.hsk_vocab[word]['level'])
+            hsk_dist[level] += words.count(word)
+            word_details[word] = {
+                'level': analyzer.hsk_vocab[word]['level'],
+                'pinyin': analyzer.hsk_vocab[word]['pinyin'],
+                'translation': analyzer.hsk_vocab[word].get('translation', ''),
+                'frequency': words.count(word)
+            }
+        else:
+            hsk_dist['unknown'] += words.count(word)
+            word_details[word] = {
+                'level': 0,
+                'pinyin': ' '.join(lazy_pinyin(word)),
+                'translation': '',
+                'frequency': words.count(word)
+            }
+
+    advanced_count = hsk_dist['4'] + hsk_dist['5'] + hsk_dist['6']
+    advanced_ratio = advanced_count / total_words if total_words > 0 else 0
+    richness_score = min(100, int(ttr * 60 + advanced_ratio * 40 * 100))
+
+    return {
+        'total_words': total_words,
+        'unique_words': unique_count,
+        'ttr': round(ttr, 3),
+        'hsk_distribution': hsk_dist,
+        'advanced_vocab_ratio': round(advanced_ratio, 3),
+        'vocabulary_richness_score': richness_score,
+        'word_details': word_details
+    }
+
+
+def make_essay(hsk_words: list, n_chars: int, seed: int) -> str:
+    """Synthetic essay: HSK words mixed with random character pairs"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < n_chars:
+        sentence = []
+        for _ in range(rng.randint(4, 10)):
+            if rng.random() < 0.7:
+                sentence.append(rng.choice(hsk_words))
+            else:
+                sentence.append(''.join(rng.choices(FILLER_CHARS, k=2)))
+        text = ''.join(sentence) + rng.choice('。，！？')
+        if rng.random() < 0.1:
+            text += '\n'
+        parts.append(text)
+        length += len(text)
+    return ''.join(parts)[:n_chars]
+
+
+def measure(fn, text: str) -> float:
+    """Essays per second for fn(text)"""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return runs / elapsed
+
+
+if __name__ == "__main__":
+    analyzer = VocabularyAnalyzer()
+    jieba.initialize()
+    hsk_words = list(analyzer.hsk_vocab)
+
+    print(f"\n{'chars':>8} {'before (essays/s)':>20} {'after (essays/s)':>20} {'speedup':>9}")
+    for size in SIZES:
+        text = make_essay(hsk_words, size, seed=size)
+        assert legacy_analyze(analyzer, text)['hsk_distribution'] == analyzer.analyze(text)['hsk_distribution']
+
+        before = measure(lambda t: legacy_analyze(analyzer, t), text)
+        after = measure(analyzer.analyze, text)
+        print(f"{size:>8} {before:>20.2f} {after:>20.2f} {after / before:>8.1f}x")
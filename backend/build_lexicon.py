@@ -0,0 +1,14 @@
+"""
+Compile data/hsk_vocabulary.json into the memory-mapped lexicon
+
+Run after every change to the JSON (the analyzer falls back to the slower
+JSON load until the compiled file matches it again).
+"""
+import os
+
+from app.services.hsk_lexicon import compile_lexicon, DEFAULT_JSON_PATH, DEFAULT_BIN_PATH
+
+if __name__ == "__main__":
+    count = compile_lexicon()
+    print(f"✓ Compiled {count} HSK words")
+    print(f"   {os.path.normpath(DEFAULT_JSON_PATH)} -> {os.path.normpath(DEFAULT_BIN_PATH)}")
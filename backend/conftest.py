@@ -0,0 +1,12 @@
+"""
+Test configuration
+
+Points the app at a throwaway SQLite database before anything imports
+app.database, so tests never touch chinese_writing.db.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="writing-coach-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
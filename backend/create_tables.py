@@ -1,10 +1,12 @@
 from app.database import init_db
+from app.logging_config import setup_logging
 
 if __name__ == "__main__":
     print("\n" + "="*60)
     print("DATABASE INITIALIZATION")
     print("="*60 + "\n")
     
+    setup_logging(log_format="text")
     init_db()
     
     print("\n" + "="*60)
@@ -0,0 +1,134 @@
+"""
+Re-score vocabulary for every stored essay
+
+Run after updating data/hsk_vocabulary.json. Re-runs the vocabulary analysis
+(no AI calls) over the essays table and updates the stored vocabulary
+fields and overall score of each analysis.
+
+Usage (from backend/):
+    python rescore_vocabulary.py [--workers N] [--batch-size N] [--dry-run]
+"""
+import argparse
+import time
+from collections import deque
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models import Essay, EssayAnalysis
+from app.services.vocabulary_analyzer import VocabularyAnalyzer
+from app.services.writing_analyzer import WritingAnalyzer
+
+
+def iter_analyses(page_size: int):
+    """
+    Yield (analysis, content) rows page by page (keyset on analysis id)
+
+    Each page is read in its own short session, so no read transaction is
+    held open while updates are being committed.
+    """
+    last_id = ""
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(
+                    EssayAnalysis.id,
+                    EssayAnalysis.sentence_quality_score,
+                    EssayAnalysis.sentence_details,
+                    EssayAnalysis.essay_analysis,
+                    Essay.content
+                )
+                .join(Essay, Essay.id == EssayAnalysis.essay_id)
+                .filter(EssayAnalysis.id > last_id)
+                .order_by(EssayAnalysis.id)
+                .limit(page_size)
+                .all()
+            )
+        finally:
+            db.close()
+
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def rescore(workers: int, batch_size: int, dry_run: bool) -> int:
+    """Re-score all essays, committing every batch_size updates"""
+    analyzer = VocabularyAnalyzer()
+
+    # analyze_many consumes texts ahead of the results it yields; rows are
+    # queued here in the same order so each result pairs with its row
+    queued = deque()
+
+    def texts():
+        for row in iter_analyses(page_size=batch_size * 4):
+            queued.append(row)
+            yield row.content
+
+    updates = []
+    total = 0
+    db = SessionLocal()
+    try:
+        for vocab in analyzer.analyze_many(texts(), workers=workers, batch_size=batch_size):
+            row = queued.popleft()
+            sentence_analysis = {
+                'quality_score': row.sentence_quality_score or 0,
+                'ai_analysis': {
+                    'sentence_analysis': row.sentence_details or [],
+                    'essay_analysis': row.essay_analysis or {}
+                }
+            }
+            scoring = WritingAnalyzer._calculate_overall_score(vocab, sentence_analysis)
+
+            updates.append({
+                'id': row.id,
+                'word_count': vocab['total_words'],
+                'unique_words': vocab['unique_words'],
+                'vocabulary_richness': vocab['ttr'],
+                'vocabulary_score': vocab['vocabulary_richness_score'],
+                'advanced_vocab_ratio': vocab['advanced_vocab_ratio'],
+                'vocabulary_details': vocab.get('word_details', {}),
+                'hsk_distribution': vocab.get('hsk_distribution', {}),
+                'overall_score': scoring['overall']
+            })
+
+            if len(updates) >= batch_size:
+                total += _flush(db, updates, dry_run)
+                updates = []
+
+        total += _flush(db, updates, dry_run)
+    finally:
+        db.close()
+
+    return total
+
+
+def _flush(db, updates: list, dry_run: bool) -> int:
+    """Write one batch of updates (bulk UPDATE by primary key)"""
+    if not updates:
+        return 0
+    if not dry_run:
+        db.execute(update(EssayAnalysis), updates)
+        db.commit()
+    print(f"   {'Checked' if dry_run else 'Updated'} {len(updates)} analyses")
+    return len(updates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score vocabulary for all stored essays")
+    parser.add_argument("--workers", type=int, default=None, help="Segmentation processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Essays per worker task and per commit")
+    parser.add_argument("--dry-run", action="store_true", help="Analyze without writing results")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("VOCABULARY RE-SCORING")
+    print("="*60 + "\n")
+
+    start = time.perf_counter()
+    count = rescore(args.workers, args.batch_size, args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    print(f"\nDone: {count} essay(s) in {elapsed:.1f}s")
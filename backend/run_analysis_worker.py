@@ -0,0 +1,38 @@
+"""
+Standalone analysis worker
+
+Drains the analysis job queue in its own process, so model concurrency can
+be sized independently of the web workers (run the API with
+ANALYSIS_WORKERS=0 and as many of these as needed).
+
+Usage (from backend/):
+    python run_analysis_worker.py [--workers N]
+"""
+import argparse
+import asyncio
+
+from app.logging_config import setup_logging
+from app.services.analysis_jobs import AnalysisJobQueue
+from app.services.vocabulary_analyzer import initialize_jieba
+
+
+async def main(workers: int):
+    queue = AnalysisJobQueue(workers=workers)
+    await queue.start()
+    try:
+        await asyncio.Event().wait()  # Run until interrupted
+    finally:
+        await queue.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run analysis job workers")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent analyses in this process")
+    args = parser.parse_args()
+
+    setup_logging()
+    initialize_jieba()
+    try:
+        asyncio.run(main(args.workers))
+    except KeyboardInterrupt:
+        print("\nStopped")
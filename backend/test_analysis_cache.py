@@ -0,0 +1,75 @@
+# backend/test_analysis_cache.py
+"""
+Tests for the persistent analysis cache: keying, lookups and eviction
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.services.analysis_cache import AnalysisCache
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def test_trivially_different_submissions_share_a_key():
+    key = AnalysisCache.make_key('essay', "我喜欢学习中文。\n\n今天天气很好。", 3, 'en')
+    variants = [
+        "  我喜欢 学习中文。\n今天天气很好。  ",     # Spaces and blank lines
+        "我喜欢学习中文。\r\n\n今天天气很好。",      # Line endings
+        "我喜欢学习中文。\n\n今天天气很好。",
+    ]
+    for text in variants:
+        assert AnalysisCache.make_key('essay', text, 3, 'en') == key
+
+
+def test_full_width_forms_are_normalized():
+    assert AnalysisCache.normalize_text("ＡＢＣ１２３") == "ABC123"
+
+
+def test_everything_that_changes_the_result_changes_the_key():
+    base = AnalysisCache.make_key('essay', "我喜欢中文。", 3, 'en')
+    assert AnalysisCache.make_key('essay', "我喜欢中文。", 4, 'en') != base
+    assert AnalysisCache.make_key('essay', "我喜欢中文。", 3, 'zh') != base
+    assert AnalysisCache.make_key('sentence', "我喜欢中文。", 3, 'en') != base
+    assert AnalysisCache.make_key('essay', "我喜欢中文。\n再见。", 3, 'en') != \
+        AnalysisCache.make_key('essay', "我喜欢中文。再见。", 3, 'en')  # Paragraphs matter
+
+
+def test_set_get_and_get_many(session_factory):
+    cache = AnalysisCache(max_entries=10, max_age_hours=1, session_factory=session_factory)
+    assert cache.get('essay', 'k1') is None
+
+    cache.set('essay', 'k1', {'score': 1})
+    cache.set_many('sentence', {'s1': {'i': 1}, 's2': {'i': 2}})
+    cache.set('essay', 'k1', {'score': 2})  # Replaces
+
+    assert cache.get('essay', 'k1') == {'score': 2}
+    assert cache.get('sentence', 'k1') is None  # Kinds are separate
+    assert cache.get_many('sentence', ['s1', 's2', 's3', 's1']) == {'s1': {'i': 1}, 's2': {'i': 2}}
+
+
+def test_least_recently_used_entries_are_evicted(session_factory):
+    cache = AnalysisCache(max_entries=2, max_age_hours=1, session_factory=session_factory)
+    cache.set('essay', 'a', {'n': 'a'})
+    cache.set('essay', 'b', {'n': 'b'})
+    cache.get('essay', 'a')  # b is now the least recently used
+    cache.set('essay', 'c', {'n': 'c'})
+
+    assert cache.get('essay', 'b') is None
+    assert cache.get('essay', 'a') == {'n': 'a'}
+    assert cache.get('essay', 'c') == {'n': 'c'}
+
+
+def test_expired_entries_are_misses(session_factory):
+    cache = AnalysisCache(max_entries=10, max_age_hours=0, session_factory=session_factory)
+    cache.set('essay', 'a', {'n': 'a'})
+    assert cache.get('essay', 'a') is None
@@ -0,0 +1,151 @@
+# backend/test_analysis_jobs.py
+"""
+Tests for the analysis job queue: claims, ownership of results, requeueing, retries
+"""
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import AnalysisJob, Essay, EssayAnalysis
+from app.services import analysis_jobs
+from app.services.analysis_jobs import AnalysisJobQueue
+from test_idempotency import RESULT
+
+UNAVAILABLE = dict(RESULT, sentences=dict(
+    RESULT['sentences'], ai_analysis={'analysis_unavailable': True, 'sentence_analysis': []}
+))
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def queue(session_factory):
+    return AnalysisJobQueue(
+        workers=0, poll_interval=1, max_attempts=2, job_timeout=60,
+        session_factory=session_factory
+    )
+
+
+@pytest.fixture
+def job_id(session_factory):
+    db = session_factory()
+    db.add(Essay(
+        id="essay-1", user_id="user-1", title="我的周末",
+        content="我周末喜欢去公园。", target_hsk_level=3
+    ))
+    db.add(AnalysisJob(id="job-1", essay_id="essay-1", user_id="user-1"))
+    db.commit()
+    db.close()
+    return "job-1"
+
+
+def stored(session_factory, job_id):
+    """(status, attempts, error, has analysis) of the job"""
+    db = session_factory()
+    try:
+        job = db.get(AnalysisJob, job_id)
+        analysis = db.query(EssayAnalysis).filter(EssayAnalysis.essay_id == job.essay_id).first()
+        return job.status, job.attempts, job.error, analysis is not None
+    finally:
+        db.close()
+
+
+def time_out(session_factory, job_id):
+    """Make the job's current run look older than the job timeout"""
+    db = session_factory()
+    db.execute(
+        update(AnalysisJob).where(AnalysisJob.id == job_id)
+        .values(started_at=datetime.now(timezone.utc) - timedelta(minutes=5))
+    )
+    db.commit()
+    db.close()
+
+
+class FakeAnalyzer:
+    def __init__(self, result):
+        self.result = result
+
+    async def analyze_essay(self, text, target_hsk_level=3, language="en"):
+        return self.result
+
+
+def test_claim_is_taken_once(queue, session_factory, job_id):
+    job = queue._claim_next()
+
+    assert job['id'] == job_id
+    assert job['content'] == "我周末喜欢去公园。"
+    assert queue._claim_next() is None
+    assert stored(session_factory, job_id) == ("running", 1, None, False)
+
+
+def test_timed_out_job_is_claimed_again(queue, session_factory, job_id):
+    first = queue._claim_next()
+    time_out(session_factory, job_id)
+
+    second = queue._claim_next()
+
+    assert second['id'] == job_id
+    assert second['attempts'] == 2
+    assert second['started_at'] != first['started_at']
+
+
+def test_late_run_result_is_dropped(queue, session_factory, job_id):
+    late = queue._claim_next()
+    time_out(session_factory, job_id)
+    current = queue._claim_next()
+
+    assert queue._record_success(late, RESULT) is False
+    queue._record_failure(late, "too late")
+    assert stored(session_factory, job_id) == ("running", 2, None, False)
+
+    assert queue._record_success(current, RESULT) is True
+    assert stored(session_factory, job_id) == ("completed", 2, None, True)
+
+
+def test_requeue_restores_attempts(queue, session_factory, job_id):
+    queue._claim_next()
+
+    queue._requeue([job_id])
+
+    assert stored(session_factory, job_id) == ("queued", 0, None, False)
+    assert queue._claim_next()['attempts'] == 1
+
+
+def test_missing_essay_fails_the_job(queue, session_factory):
+    db = session_factory()
+    db.add(AnalysisJob(id="job-2", essay_id="gone", user_id="user-1"))
+    db.commit()
+    db.close()
+
+    assert queue._claim_next() is None
+    assert stored(session_factory, "job-2")[:3] == ("failed", 1, "Essay not found")
+
+
+def test_unavailable_analysis_is_retried_then_fails(queue, session_factory, job_id, monkeypatch):
+    monkeypatch.setattr(analysis_jobs, "get_writing_analyzer", lambda: FakeAnalyzer(UNAVAILABLE))
+
+    asyncio.run(queue.run_job(queue._claim_next()))
+    assert stored(session_factory, job_id) == ("queued", 1, "Model analysis unavailable", False)
+
+    asyncio.run(queue.run_job(queue._claim_next()))
+    assert stored(session_factory, job_id) == ("failed", 2, "Model analysis unavailable", False)
+
+
+def test_available_analysis_completes_the_job(queue, session_factory, job_id, monkeypatch):
+    monkeypatch.setattr(analysis_jobs, "get_writing_analyzer", lambda: FakeAnalyzer(RESULT))
+
+    asyncio.run(queue.run_job(queue._claim_next()))
+
+    assert stored(session_factory, job_id) == ("completed", 1, None, True)
@@ -0,0 +1,169 @@
+# backend/test_draft_buffer.py
+"""
+Tests for the draft autosave write buffer: coalescing, revisions, conflicts
+"""
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import Settings
+from app.database import Base
+from app.models import Draft
+from app.schemas import DraftPatch
+from app.services import draft_buffer
+from app.services.draft_buffer import DraftConflictError, DraftWriteBuffer
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def draft_id(session_factory):
+    db = session_factory()
+    draft = Draft(id="draft-1", user_id="user-1", content="我喜欢", revision=0)
+    db.add(draft)
+    db.commit()
+    db.close()
+    return "draft-1"
+
+
+def stored(session_factory, draft_id):
+    db = session_factory()
+    try:
+        draft = db.get(Draft, draft_id)
+        return draft.content, draft.revision
+    finally:
+        db.close()
+
+
+def saved_elsewhere(session_factory, draft_id):
+    """Simulate a PUT (or another process) writing the draft"""
+    db = session_factory()
+    db.execute(
+        update(Draft).where(Draft.id == draft_id).values(content="别处", revision=Draft.revision + 1)
+    )
+    db.commit()
+    db.close()
+
+
+def patch(base_revision, insert, offset=None, save=False):
+    return DraftPatch(
+        base_revision=base_revision,
+        ops=[{'offset': offset if offset is not None else 0, 'insert': insert}],
+        save=save
+    )
+
+
+def make_buffer(session_factory, enabled=True):
+    return DraftWriteBuffer(window_seconds=60, enabled=enabled, session_factory=session_factory)
+
+
+def test_patches_are_coalesced_into_one_write(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    assert buffer.apply_patch(draft_id, "user-1", patch(0, "中文", offset=3))['revision'] == 1
+    assert buffer.apply_patch(draft_id, "user-1", patch(1, "。", offset=5))['revision'] == 2
+    assert stored(session_factory, draft_id) == ("我喜欢", 0)  # Nothing written yet
+
+    assert buffer.flush() == 1
+    assert stored(session_factory, draft_id) == ("我喜欢中文。", 2)
+
+
+def test_patch_against_an_old_revision_conflicts(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+    with pytest.raises(DraftConflictError):
+        buffer.apply_patch(draft_id, "user-1", patch(0, "b"))
+
+
+def test_other_users_and_missing_drafts(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    with pytest.raises(PermissionError):
+        buffer.apply_patch(draft_id, "user-2", patch(0, "a"))
+    with pytest.raises(LookupError):
+        buffer.apply_patch("missing", "user-1", patch(0, "a"))
+
+
+def test_save_writes_before_returning(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a", save=True))
+    assert stored(session_factory, draft_id) == ("a我喜欢", 1)
+
+
+def test_disabled_buffer_writes_through(session_factory, draft_id):
+    buffer = make_buffer(session_factory, enabled=False)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+    assert stored(session_factory, draft_id) == ("a我喜欢", 1)
+
+
+def test_conflicting_edits_are_kept_and_reported(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+    saved_elsewhere(session_factory, draft_id)
+
+    assert buffer.flush() == 0
+    assert stored(session_factory, draft_id) == ("别处", 1)  # Not overwritten
+    assert buffer.conflicted(draft_id)
+
+    # The next patch is told, even against the revision it was acknowledged
+    with pytest.raises(DraftConflictError, match="saved elsewhere"):
+        buffer.apply_patch(draft_id, "user-1", patch(1, "b"))
+
+    # A full save (PUT) discards the held-back copy
+    buffer.discard(draft_id)
+    assert not buffer.conflicted(draft_id)
+    assert buffer.apply_patch(draft_id, "user-1", patch(1, "c"))['revision'] == 2
+
+
+def test_save_reports_a_conflict_instead_of_succeeding(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+    saved_elsewhere(session_factory, draft_id)
+    with pytest.raises(DraftConflictError):
+        buffer.apply_patch(draft_id, "user-1", patch(1, "b", save=True))
+    assert stored(session_factory, draft_id) == ("别处", 1)
+
+
+def test_write_through_conflict_leaves_nothing_behind(session_factory, draft_id):
+    buffer = make_buffer(session_factory, enabled=False)
+    entry = buffer._entry(draft_id)  # Loaded before the other save lands
+    saved_elsewhere(session_factory, draft_id)
+    buffer._entry = lambda _draft_id: dict(entry)
+    with pytest.raises(DraftConflictError):
+        buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+    assert not buffer.conflicted(draft_id)
+
+
+def test_buffer_is_off_with_several_server_processes(monkeypatch):
+    monkeypatch.setattr(draft_buffer, "get_settings", lambda: Settings(web_concurrency=1))
+    assert DraftWriteBuffer().enabled
+    monkeypatch.setattr(draft_buffer, "get_settings", lambda: Settings(web_concurrency=4))
+    assert not DraftWriteBuffer().enabled
+
+
+def test_flush_between_load_and_apply_is_not_a_conflict(session_factory, draft_id):
+    buffer = make_buffer(session_factory)
+    buffer.apply_patch(draft_id, "user-1", patch(0, "a"))
+
+    # The background flush writes and drops the draft while the next patch
+    # is between loading its state and applying the edit
+    load = buffer._entry
+
+    def load_then_flush(draft_id):
+        entry = load(draft_id)
+        buffer.flush(reason="window")
+        return entry
+
+    buffer._entry = load_then_flush
+    assert buffer.apply_patch(draft_id, "user-1", patch(1, "b"))['revision'] == 2
+    buffer._entry = load
+
+    assert buffer.flush() == 1
+    assert not buffer.conflicted(draft_id)
+    assert stored(session_factory, draft_id) == ("ba我喜欢", 2)
@@ -0,0 +1,44 @@
+# backend/test_draft_edits.py
+"""
+Tests for applying autosave text edits
+"""
+import pytest
+
+from app.schemas import DraftTextOp
+from app.services.draft_edits import apply_text_ops
+
+
+def test_insert_delete_and_replace():
+    text = "我喜欢中文"
+    assert apply_text_ops(text, [{'offset': 3, 'insert': '学习'}]) == "我喜欢学习中文"
+    assert apply_text_ops(text, [{'offset': 1, 'delete': 2}]) == "我中文"
+    assert apply_text_ops(text, [{'offset': 3, 'delete': 2, 'insert': '汉语'}]) == "我喜欢汉语"
+
+
+def test_ops_apply_in_order_to_the_edited_text():
+    ops = [
+        {'offset': 0, 'insert': '今天'},        # 今天我喜欢中文
+        {'offset': 7, 'insert': '。'},          # offset counts the inserted text
+        {'offset': 2, 'delete': 1, 'insert': '你'},
+    ]
+    assert apply_text_ops("我喜欢中文", ops) == "今天你喜欢中文。"
+
+
+def test_offsets_count_code_points():
+    # Emoji outside the BMP are one character, not two UTF-16 units
+    assert apply_text_ops("a😀b", [{'offset': 2, 'delete': 1, 'insert': 'c'}]) == "a😀c"
+
+
+def test_schema_ops_and_empty_text():
+    assert apply_text_ops(None, [DraftTextOp(offset=0, insert="你好")]) == "你好"
+    assert apply_text_ops("不变", []) == "不变"
+
+
+@pytest.mark.parametrize("op", [
+    {'offset': 6},
+    {'offset': 4, 'delete': 2},
+    {'offset': -1},
+])
+def test_ops_outside_the_text_are_rejected(op):
+    with pytest.raises(ValueError, match="outside the text"):
+        apply_text_ops("我喜欢中文", [op])
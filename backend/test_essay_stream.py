@@ -0,0 +1,98 @@
+# backend/test_essay_stream.py
+"""
+Tests for POST /api/essays/submit-stream: the essay is kept only with its analysis
+"""
+import asyncio
+import types
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.essays import submit_essay_stream
+from app.database import AsyncSessionLocal, init_db
+from app.models import Essay, EssayAnalysis
+from app.schemas import EssaySubmit
+from test_idempotency import ESSAY, RESULT
+
+
+class FakeStreamAnalyzer:
+    """Streams a few events, then the result or an error"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def analyze_essay_stream(self, text, target_hsk_level=3, language="en"):
+        yield 'basic_stats', RESULT['basic_stats']
+        yield 'vocabulary', RESULT['vocabulary']
+        if self.fail:
+            raise RuntimeError("model failed")
+        yield 'result', RESULT
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+
+async def start_stream(analyzer):
+    """Call the endpoint directly; returns (user id, body iterator)"""
+    user = types.SimpleNamespace(id=str(uuid.uuid4()))
+    response = await submit_essay_stream(EssaySubmit(**ESSAY), current_user=user, analyzer=analyzer)
+    return user.id, response.body_iterator
+
+
+async def stored(user_id):
+    """Number of essays and analyses stored for the user"""
+    async with AsyncSessionLocal() as db:
+        essays = await db.scalar(
+            select(func.count()).select_from(Essay).where(Essay.user_id == user_id)
+        )
+        analyses = await db.scalar(
+            select(func.count()).select_from(EssayAnalysis)
+            .join(Essay, Essay.id == EssayAnalysis.essay_id)
+            .where(Essay.user_id == user_id)
+        )
+        return essays, analyses
+
+
+def test_completed_stream_stores_the_essay_with_its_analysis():
+    async def scenario():
+        user_id, body = await start_stream(FakeStreamAnalyzer())
+        events = [chunk async for chunk in body]
+        return events, await stored(user_id)
+
+    events, counts = asyncio.run(scenario())
+    assert events[-1].startswith('event: complete')
+    assert counts == (1, 1)
+
+
+def test_failed_stream_keeps_nothing():
+    async def scenario():
+        user_id, body = await start_stream(FakeStreamAnalyzer(fail=True))
+        events = [chunk async for chunk in body]
+        return events, await stored(user_id)
+
+    events, counts = asyncio.run(scenario())
+    assert events[-1].startswith('event: error')
+    assert counts == (0, 0)
+
+
+def test_client_disconnect_keeps_nothing():
+    async def scenario():
+        user_id, body = await start_stream(FakeStreamAnalyzer())
+        await body.__anext__()
+        # What Starlette does when the client goes away mid-stream
+        await body.aclose()
+        return await stored(user_id)
+
+    assert asyncio.run(scenario()) == (0, 0)
+
+
+def test_client_disconnect_before_streaming_keeps_nothing():
+    async def scenario():
+        user_id, body = await start_stream(FakeStreamAnalyzer())
+        await body.aclose()
+        return await stored(user_id)
+
+    assert asyncio.run(scenario()) == (0, 0)
@@ -0,0 +1,166 @@
+# backend/test_idempotency.py
+"""
+Tests for Idempotency-Key on POST /api/essays/submit
+"""
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.api.essays import get_analyzer
+from app.config import get_settings
+from app.database import init_db
+from app.main import app
+from app.services.user_cache import get_user_cache
+
+ESSAY = {
+    'title': '我的周末',
+    'content': '我周末喜欢去公园。公园里有很多人。我们一起跑步。',
+    'theme': 'Daily life',
+    'target_hsk_level': 3,
+    'language': 'en'
+}
+
+RESULT = {
+    'basic_stats': {'char_count': 22, 'paragraph_count': 1},
+    'vocabulary': {
+        'total_words': 14, 'unique_words': 12, 'ttr': 0.86,
+        'vocabulary_richness_score': 70, 'advanced_vocab_ratio': 0.1,
+        'word_details': {}, 'hsk_distribution': {}
+    },
+    'sentences': {
+        'sentence_count': 3, 'paragraph_count': 1, 'quality_score': 80,
+        'ai_analysis': {'sentence_analysis': [], 'essay_analysis': {}, 'overall_coherence': 80}
+    },
+    'scoring': {'overall': 75, 'breakdown': None},
+    'recommendations': []
+}
+
+
+class FakeAnalyzer:
+    """Returns RESULT after an optional delay, counting calls"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.failures = 0  # Calls left that fail (after the delay)
+
+    async def analyze_essay(self, text, target_hsk_level=3, language="en"):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("model failed")
+        return RESULT
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    init_db()
+
+
+@pytest.fixture
+def analyzer():
+    fake = FakeAnalyzer()
+    app.dependency_overrides[get_analyzer] = lambda: fake
+    yield fake
+    app.dependency_overrides.pop(get_analyzer, None)
+
+
+def with_client(fn):
+    """Run fn(client) with a freshly registered user's client"""
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            name = uuid.uuid4().hex[:12]
+            response = await client.post('/api/users/register', json={
+                'email': f'{name}@example.com', 'username': name, 'password': 'a-long-password'
+            })
+            client.headers['Authorization'] = f"Bearer {response.json()['access_token']}"
+            return await fn(client)
+    return asyncio.run(run())
+
+
+def submit(client, key, essay=ESSAY):
+    return client.post('/api/essays/submit', json=essay, headers={'Idempotency-Key': key})
+
+
+def test_retry_replays_the_stored_analysis(analyzer):
+    async def scenario(client):
+        first = await submit(client, 'key-1')
+        second = await submit(client, 'key-1')
+        return first, second
+
+    first, second = with_client(scenario)
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.headers.get('Idempotent-Replayed') == 'true'
+    assert second.json()['essay_id'] == first.json()['essay_id']
+    assert analyzer.calls == 1
+
+
+def test_key_reused_for_another_request_is_rejected(analyzer):
+    async def scenario(client):
+        await submit(client, 'key-2')
+        return await submit(client, 'key-2', dict(ESSAY, title='另一篇'))
+
+    response = with_client(scenario)
+    assert response.status_code == 422
+    assert analyzer.calls == 1
+
+
+def test_different_keys_are_separate_submissions(analyzer):
+    async def scenario(client):
+        return await submit(client, 'key-3'), await submit(client, 'key-4')
+
+    first, second = with_client(scenario)
+    assert first.json()['essay_id'] != second.json()['essay_id']
+    assert analyzer.calls == 2
+
+
+def test_without_a_key_nothing_is_replayed(analyzer):
+    async def scenario(client):
+        first = await client.post('/api/essays/submit', json=ESSAY)
+        second = await client.post('/api/essays/submit', json=ESSAY)
+        return first, second
+
+    first, second = with_client(scenario)
+    assert first.json()['essay_id'] != second.json()['essay_id']
+
+
+def test_retry_while_the_first_is_running_gets_409(analyzer, monkeypatch):
+    analyzer.delay = 1.0
+    monkeypatch.setattr(get_settings(), 'idempotency_wait_seconds', 0.2)
+
+    async def scenario(client):
+        first = asyncio.ensure_future(submit(client, 'key-5'))
+        await asyncio.sleep(0.2)
+        retry = await submit(client, 'key-5')
+        return await first, retry
+
+    first, retry = with_client(scenario)
+    assert first.status_code == 201
+    assert retry.status_code == 409
+    assert int(retry.headers['Retry-After']) >= 1
+    assert analyzer.calls == 1
+
+
+def test_retry_after_a_failed_first_attempt_without_the_user_cache(analyzer, monkeypatch):
+    # Users are then loaded into the request's session, where the rollbacks
+    # made while waiting expire them
+    monkeypatch.setattr(get_user_cache(), 'enabled', False)
+    analyzer.delay = 0.6
+    analyzer.failures = 1
+
+    async def scenario(client):
+        first = asyncio.ensure_future(submit(client, 'key-6'))
+        await asyncio.sleep(0.2)
+        retry = await submit(client, 'key-6')  # Waits, then finds the key freed
+        return await first, retry
+
+    first, retry = with_client(scenario)
+    assert first.status_code == 500
+    assert retry.status_code == 201
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert analyzer.calls == 2
@@ -0,0 +1,60 @@
+# backend/test_json_stream.py
+"""
+Tests for incremental JSON parsing of streamed model replies
+"""
+from app.services.json_stream import ArrayItemParser, parse_array_items
+
+REPLY = (
+    '```json\n'
+    '{"sentence_analysis": [{"index": 1, "note": "a } in a string"}, '
+    '{"index": 2, "issues": [{"type": "grammar"}]}], "overall_coherence": 80}\n'
+    '```'
+)
+
+
+def test_items_arrive_as_soon_as_they_close():
+    parser = ArrayItemParser('sentence_analysis')
+    seen = []
+    for char in REPLY:
+        for item in parser.feed(char):
+            seen.append(item['index'])
+        if seen == [1]:
+            # The second item is still open at this point
+            assert not parser.done
+    assert seen == [1, 2]
+    assert parser.done
+    assert parser.items_found == 2
+
+
+def test_whole_reply_in_one_chunk():
+    items = parse_array_items(REPLY, 'sentence_analysis')
+    assert [item['index'] for item in items] == [1, 2]
+    assert items[0]['note'] == "a } in a string"
+    assert items[1]['issues'] == [{"type": "grammar"}]
+
+
+def test_key_split_across_chunks():
+    parser = ArrayItemParser('sentence_analysis')
+    assert parser.feed('{"sentence_ana') == []
+    assert parser.feed('lysis": [{"index": 1}]}') == [{"index": 1}]
+
+
+def test_truncated_reply_keeps_complete_items():
+    truncated = '{"sentence_analysis": [{"index": 1}, {"index": 2, "note": "cut of'
+    assert parse_array_items(truncated, 'sentence_analysis') == [{"index": 1}]
+
+
+def test_escaped_quotes_and_other_keys():
+    text = '{"essay": [{"x": 1}], "sentence_analysis": [{"note": "say \\"hi\\" }"}]}'
+    assert parse_array_items(text, 'sentence_analysis') == [{"note": 'say "hi" }'}]
+
+
+def test_non_object_and_invalid_items_are_skipped():
+    text = '{"sentence_analysis": [1, "two", {"index": 3,}, {"index": 4}]}'
+    assert parse_array_items(text, 'sentence_analysis') == [{"index": 4}]
+
+
+def test_missing_key_yields_nothing():
+    parser = ArrayItemParser('sentence_analysis')
+    assert parser.feed('{"other": [{"index": 1}]}') == []
+    assert not parser.done
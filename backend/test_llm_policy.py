@@ -0,0 +1,209 @@
+# backend/test_llm_policy.py
+"""
+Tests for the model call policy: retries, deadlines and the circuit breaker
+"""
+import asyncio
+
+import pytest
+
+from app.services.llm_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMCallPolicy,
+    failure_reason,
+    retry_after_seconds,
+)
+
+
+class ProviderError(Exception):
+    """Stands in for an SDK error carrying an HTTP status and response"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+def make_policy(**kwargs):
+    options = dict(
+        timeout_seconds=1.0,
+        deadline_seconds=5.0,
+        max_retries=2,
+        retry_base_seconds=0.0,
+        retry_max_seconds=0.0,
+        breaker=CircuitBreaker(window=10, min_calls=3, error_rate=0.5, cooldown_seconds=60),
+    )
+    options.update(kwargs)
+    return LLMCallPolicy(**options)
+
+
+def flaky(*outcomes):
+    """fn() that raises or returns the given outcomes in turn; counts calls"""
+    calls = []
+
+    async def fn():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return fn, calls
+
+
+# FAILURE CLASSIFICATION
+
+def test_failure_reason():
+    assert failure_reason(TimeoutError()) == "timeout"
+    assert failure_reason(ConnectionError()) == "connection_error"
+    assert failure_reason(ProviderError(429)) == "rate_limited"
+    assert failure_reason(ProviderError(503)) == "server_error"
+    assert failure_reason(ProviderError(400)) is None
+    assert failure_reason(ProviderError(401)) is None
+    assert failure_reason(ValueError("bad reply")) is None
+
+
+def test_retry_after_header():
+    assert retry_after_seconds(ProviderError(429, {"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(ProviderError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(ProviderError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after_seconds(ProviderError(429)) is None
+
+
+# CIRCUIT BREAKER
+
+def test_breaker_opens_at_error_rate_after_min_calls():
+    breaker = CircuitBreaker(window=10, min_calls=4, error_rate=0.5, cooldown_seconds=60)
+    for failed in (True, False, True):
+        breaker.acquire()
+        breaker.record(failed)
+    assert breaker.state == "closed"  # Fewer than min_calls
+
+    breaker.acquire()
+    breaker.record(True)
+    assert breaker.state == "open"
+    assert not breaker.available
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+def test_breaker_success_never_opens_it():
+    breaker = CircuitBreaker(window=4, min_calls=2, error_rate=0.5, cooldown_seconds=60)
+    for failed in (True, False):
+        breaker.acquire()
+        breaker.record(failed)
+    assert breaker.state == "closed"  # 1 of 2 failed, but the last call succeeded
+
+    breaker.acquire()
+    breaker.record(True)
+    assert breaker.state == "open"
+
+
+def test_breaker_half_open_trial():
+    breaker = CircuitBreaker(window=2, min_calls=1, error_rate=1.0, cooldown_seconds=0)
+    breaker.acquire()
+    breaker.record(True)
+    assert breaker.state == "open"
+
+    # Cooldown over: one trial call at a time
+    breaker.acquire()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    breaker.record(True)
+    assert breaker.state == "open"
+
+    breaker.acquire()
+    breaker.record(False)
+    assert breaker.state == "closed"
+    assert breaker.available
+
+
+def test_breaker_release_frees_the_trial():
+    breaker = CircuitBreaker(window=2, min_calls=1, error_rate=1.0, cooldown_seconds=0)
+    breaker.acquire()
+    breaker.record(True)
+    breaker.acquire()
+    breaker.release()
+    assert breaker.state == "half_open"
+    breaker.acquire()  # Not rejected: the previous trial gave its slot back
+
+
+# CALL POLICY
+
+def test_transient_errors_are_retried():
+    policy = make_policy()
+    fn, calls = flaky(ProviderError(503), TimeoutError(), "ok")
+    assert asyncio.run(policy.call(fn, "test")) == "ok"
+    assert len(calls) == 3
+
+
+def test_retries_run_out():
+    policy = make_policy(max_retries=1)
+    fn, calls = flaky(ProviderError(429), ProviderError(429), "never")
+    with pytest.raises(ProviderError):
+        asyncio.run(policy.call(fn, "test"))
+    assert len(calls) == 2
+
+
+def test_client_errors_fail_at_once_without_counting_against_the_breaker():
+    policy = make_policy()
+    fn, calls = flaky(ProviderError(400), "never")
+    with pytest.raises(ProviderError):
+        asyncio.run(policy.call(fn, "test"))
+    assert len(calls) == 1
+    assert list(policy.breaker._outcomes) == []
+
+
+def test_attempt_timeout():
+    policy = make_policy(timeout_seconds=0.05, max_retries=0)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(policy.call(slow, "test"))
+
+
+def test_no_retry_past_the_deadline():
+    # Backoff of 1s would overrun the 0.5s deadline, so the first error is final
+    policy = make_policy(deadline_seconds=0.5, retry_base_seconds=1.0, retry_max_seconds=1.0)
+    fn, calls = flaky(ProviderError(503, {"retry-after": "1"}), "never")
+    with pytest.raises(ProviderError):
+        asyncio.run(policy.call(fn, "test"))
+    assert len(calls) == 1
+
+
+def test_open_breaker_rejects_without_calling():
+    policy = make_policy(max_retries=0)
+    for _ in range(3):
+        fn, _calls = flaky(ProviderError(503))
+        with pytest.raises(ProviderError):
+            asyncio.run(policy.call(fn, "test"))
+    assert not policy.available
+
+    fn, calls = flaky("never")
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(policy.call(fn, "test"))
+    assert calls == []
+
+
+def test_iterate_fails_on_a_stalled_stream():
+    policy = make_policy(timeout_seconds=0.05)
+
+    async def stream():
+        yield "first"
+        await asyncio.sleep(1)
+        yield "late"
+
+    received = []
+
+    async def run():
+        async for chunk in policy.iterate(stream(), "test"):
+            received.append(chunk)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+    assert received == ["first"]
+    assert list(policy.breaker._outcomes) == [True]
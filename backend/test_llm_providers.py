@@ -0,0 +1,135 @@
+# backend/test_llm_providers.py
+"""
+Tests for routing model calls across providers: failover and hedging
+"""
+import asyncio
+
+import pytest
+
+from app.services.llm_policy import CircuitBreaker, CircuitOpenError, LLMCallPolicy
+from app.services.llm_providers import LLMProvider, LLMReply, LLMRouter, ProviderError
+
+
+class FakeProvider(LLMProvider):
+    """Answers after a delay, or fails with the given error"""
+
+    def __init__(self, name, delay=0.0, error=None, pieces=("hello", " world")):
+        self.name = name
+        super().__init__(
+            model=f"{name}-model",
+            policy=LLMCallPolicy(
+                timeout_seconds=5, deadline_seconds=5, max_retries=0,
+                breaker=CircuitBreaker(window=10, min_calls=1, error_rate=1.0, cooldown_seconds=60)
+            )
+        )
+        self.delay = delay
+        self.error = error
+        self.pieces = pieces
+        self.calls = 0
+        self.cancelled = False
+
+    async def complete(self, system_instruction, prompt, max_tokens, response_format=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return LLMReply(text=f"from {self.name}")
+
+    async def open_stream(self, system_instruction, prompt, max_tokens, response_format=None):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+
+        async def pieces():
+            for piece in self.pieces:
+                yield LLMReply(text=piece)
+
+        return pieces()
+
+
+def complete(router):
+    return asyncio.run(router.complete("system", "prompt", 100, call="test"))
+
+
+def test_first_provider_answers():
+    primary, backup = FakeProvider("primary"), FakeProvider("backup")
+    reply = complete(LLMRouter([primary, backup], hedge=False))
+    assert reply.text == "from primary"
+    assert backup.calls == 0
+
+
+def test_fails_over_to_the_next_provider():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    backup = FakeProvider("backup")
+    reply = complete(LLMRouter([primary, backup], hedge=False))
+    assert reply.text == "from backup"
+    assert primary.stats.error_rate == 1.0
+
+
+def test_last_error_is_raised_when_every_provider_fails():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    backup = FakeProvider("backup", error=ProviderError("overloaded", 529))
+    with pytest.raises(ProviderError, match="overloaded"):
+        complete(LLMRouter([primary, backup], hedge=False))
+
+
+def test_providers_with_open_breakers_are_skipped():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    backup = FakeProvider("backup")
+    router = LLMRouter([primary, backup], hedge=False)
+    complete(router)  # Opens the primary's breaker (min_calls=1)
+    assert not primary.policy.available
+
+    primary.calls = 0
+    assert complete(router).text == "from backup"
+    assert primary.calls == 0
+    assert router.available
+
+
+def test_every_breaker_open():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    router = LLMRouter([primary], hedge=False)
+    with pytest.raises(ProviderError):
+        complete(router)
+    assert not router.available
+    with pytest.raises(CircuitOpenError):
+        complete(router)
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled():
+    primary = FakeProvider("primary", delay=1.0)
+    backup = FakeProvider("backup", delay=0.0)
+    router = LLMRouter([primary, backup], hedge=True, hedge_min_seconds=0.05)
+    assert complete(router).text == "from backup"
+    assert primary.cancelled
+
+
+def test_fast_call_is_not_hedged():
+    primary = FakeProvider("primary", delay=0.0)
+    backup = FakeProvider("backup")
+    router = LLMRouter([primary, backup], hedge=True, hedge_min_seconds=0.5)
+    assert complete(router).text == "from primary"
+    assert backup.calls == 0
+
+
+def test_hedged_call_fails_over_on_error():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    backup = FakeProvider("backup")
+    router = LLMRouter([primary, backup], hedge=True, hedge_min_seconds=5)
+    assert complete(router).text == "from backup"
+
+
+def test_stream_fails_over_while_opening():
+    primary = FakeProvider("primary", error=ProviderError("down", 503))
+    backup = FakeProvider("backup")
+    router = LLMRouter([primary, backup], hedge=False)
+
+    async def collect():
+        return [piece.text async for piece in router.stream("system", "prompt", 100, call="test")]
+
+    assert asyncio.run(collect()) == ["hello", " world"]
+    assert backup.stats.error_rate == 0.0
@@ -0,0 +1,61 @@
+# backend/test_pagination.py
+"""
+Tests for cursor (keyset) pagination
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, DateTime, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from app.pagination import decode_cursor, encode_cursor, page_result, paginate_desc
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(String(8), primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+def test_cursor_round_trip():
+    when = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(when, "abc-123")
+    assert "=" not in cursor  # URL-safe, unpadded
+    assert decode_cursor(cursor) == (when, "abc-123")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor(datetime(2024, 1, 1), "x")[:-3]])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as caught:
+        decode_cursor(cursor)
+    assert caught.value.status_code == 400
+
+
+def test_pages_cover_every_row_once_in_order():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as db:
+        # Pairs of rows share a timestamp, so the id breaks the tie
+        db.add_all(Row(id=f"r{i:02d}", created_at=start + timedelta(minutes=i // 2)) for i in range(11))
+        db.commit()
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            statement = paginate_desc(select(Row), Row.created_at, Row.id, 3, cursor)
+            rows, cursor = page_result(db.scalars(statement).all(), Row.created_at, Row.id, 3)
+            seen.extend(row.id for row in rows)
+            pages += 1
+            if cursor is None:
+                break
+
+    assert seen == [f"r{i:02d}" for i in reversed(range(11))]
+    assert pages == 4
+
+
+def test_last_page_has_no_cursor():
+    rows = [Row(id="a", created_at=datetime(2024, 1, 1))]
+    assert page_result(rows, Row.created_at, Row.id, 1) == (rows, None)
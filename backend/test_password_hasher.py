@@ -0,0 +1,60 @@
+# backend/test_password_hasher.py
+"""
+Tests for the bounded bcrypt pool
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy, build_context
+
+# The lowest cost bcrypt allows, to keep the tests fast
+ROUNDS = 4
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=ROUNDS)
+
+    async def run():
+        hashed = await hasher.hash("correct horse")
+        return (
+            hashed,
+            await hasher.verify_and_update("correct horse", hashed),
+            await hasher.verify_and_update("wrong", hashed),
+        )
+
+    hashed, right, wrong = asyncio.run(run())
+    assert hashed.startswith("$2b$04$")
+    assert right == (True, None)
+    assert wrong == (False, None)
+
+
+def test_hash_with_another_cost_is_upgraded():
+    old_hash = build_context(5).hash("correct horse")
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=ROUNDS)
+    matches, new_hash = asyncio.run(hasher.verify_and_update("correct horse", old_hash))
+    assert matches
+    assert new_hash is not None and new_hash.startswith("$2b$04$")
+    assert build_context(ROUNDS).verify("correct horse", new_hash)
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=ROUNDS)
+    release = threading.Event()
+
+    def blocked(_password):
+        release.wait(5)
+        return "done"
+
+    async def run():
+        running = [asyncio.ensure_future(hasher._run("hash", blocked, "x")) for _ in range(2)]
+        await asyncio.sleep(0)  # Both slots taken (one running, one queued)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("one too many")
+        release.set()
+        assert await asyncio.gather(*running) == ["done", "done"]
+        # Slots are given back once the work finishes
+        assert (await hasher.verify_and_update("x", await hasher.hash("x")))[0]
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+# backend/test_user_cache.py
+"""
+Tests for the authenticated-user cache
+"""
+import time
+
+from sqlalchemy import inspect
+
+from app.models import User
+from app.services.user_cache import UserCache
+
+
+def make_user(user_id="user-1", username="learner"):
+    return User(
+        id=user_id,
+        email=f"{username}@example.com",
+        username=username,
+        hashed_password="$2b$12$secret",
+        target_hsk_level=3,
+        preferred_language="en"
+    )
+
+
+def test_hit_returns_a_detached_copy_without_the_password_hash():
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    user = make_user()
+    cache.set(user)
+
+    cached = cache.get("user-1")
+    assert cached is not user
+    assert (cached.id, cached.username, cached.target_hsk_level) == ("user-1", "learner", 3)
+    assert 'hashed_password' not in inspect(cached).dict
+    assert inspect(cached).detached
+
+
+def test_miss_and_invalidate():
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    assert cache.get("user-1") is None
+    cache.set(make_user())
+    cache.invalidate("user-1")
+    assert cache.get("user-1") is None
+
+
+def test_entries_expire():
+    cache = UserCache(ttl_seconds=0.05, max_entries=10)
+    cache.set(make_user())
+    time.sleep(0.1)
+    assert cache.get("user-1") is None
+
+
+def test_least_recently_used_user_is_evicted():
+    cache = UserCache(ttl_seconds=60, max_entries=2)
+    cache.set(make_user("a", "a"))
+    cache.set(make_user("b", "b"))
+    cache.get("a")  # b is now the least recently used
+    cache.set(make_user("c", "c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_snapshot_is_not_affected_by_later_changes():
+    cache = UserCache(ttl_seconds=60, max_entries=10)
+    user = make_user()
+    cache.set(user)
+    user.target_hsk_level = 6
+    assert cache.get("user-1").target_hsk_level == 3
+
+
+def test_disabled_cache_stores_nothing():
+    cache = UserCache(ttl_seconds=0, max_entries=10)
+    cache.set(make_user())
+    assert cache.get("user-1") is None
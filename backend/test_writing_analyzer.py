@@ -0,0 +1,95 @@
+# backend/test_writing_analyzer.py
+"""
+Tests for coalescing identical essay analyses (single-flight)
+"""
+import asyncio
+
+import pytest
+
+from app.services.writing_analyzer import WritingAnalyzer
+
+
+class CountingAnalyzer(WritingAnalyzer):
+    """WritingAnalyzer whose analysis is a slow stub, counting runs"""
+
+    def __init__(self, fail=False):
+        # Skips the real analyzers: only the coalescing logic is under test
+        self._in_flight = {}
+        self.runs = 0
+        self.fail = fail
+
+    def _cache_key(self, text, target_hsk_level, language):
+        return f"{text}|{target_hsk_level}|{language}"
+
+    async def _analyze_essay(self, text, target_hsk_level, language, key):
+        self.runs += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("model failed")
+        return {'text': text, 'run': self.runs}
+
+
+def test_identical_concurrent_analyses_run_once():
+    analyzer = CountingAnalyzer()
+
+    async def run():
+        return await asyncio.gather(*(analyzer.analyze_essay("我喜欢中文。") for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert analyzer.runs == 1
+    assert all(result is results[0] for result in results)
+    assert analyzer._in_flight == {}
+
+
+def test_different_inputs_are_not_coalesced():
+    analyzer = CountingAnalyzer()
+
+    async def run():
+        await asyncio.gather(
+            analyzer.analyze_essay("我喜欢中文。", 3),
+            analyzer.analyze_essay("我喜欢中文。", 4),
+            analyzer.analyze_essay("我喜欢中文。", 3, "zh"),
+        )
+
+    asyncio.run(run())
+    assert analyzer.runs == 3
+
+
+def test_later_submissions_start_a_new_analysis():
+    analyzer = CountingAnalyzer()
+
+    async def run():
+        await analyzer.analyze_essay("我喜欢中文。")
+        await analyzer.analyze_essay("我喜欢中文。")
+
+    asyncio.run(run())
+    assert analyzer.runs == 2
+
+
+def test_every_waiter_gets_the_error():
+    analyzer = CountingAnalyzer(fail=True)
+
+    async def run():
+        return await asyncio.gather(
+            *(analyzer.analyze_essay("我喜欢中文。") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert analyzer.runs == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    analyzer = CountingAnalyzer()
+
+    async def run():
+        first = asyncio.ensure_future(analyzer.analyze_essay("我喜欢中文。"))
+        second = asyncio.ensure_future(analyzer.analyze_essay("我喜欢中文。"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run())['run'] == 1
+    assert analyzer.runs == 1
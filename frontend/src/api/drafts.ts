@@ -1,4 +1,5 @@
 import apiClient from './client';
+import type { CursorPage } from '@/types';
 
 export interface Draft {
   id: string;
@@ -8,6 +9,7 @@ export interface Draft {
   theme: string;
   hsk_level: number;
   char_count: number;
+  revision: number;
   created_at: string;
   updated_at: string;
 }
@@ -28,6 +30,46 @@ export interface DraftUpdate {
   char_count?: number;
 }
 
+// Text edit: delete `delete` characters at `offset`, then insert `insert`
+// (offsets in Unicode code points, not UTF-16 units)
+export interface DraftTextOp {
+  offset: number;
+  delete: number;
+  insert: string;
+}
+
+export interface DraftPatch {
+  base_revision: number;
+  ops: DraftTextOp[];
+  title?: string;
+  theme?: string;
+  hsk_level?: number;
+  save?: boolean; // Write now instead of after the server's autosave window
+}
+
+export interface DraftPatchResult {
+  id: string;
+  revision: number;
+  char_count: number;
+  updated_at: string;
+}
+
+// Edit turning `before` into `after`: the span between their common prefix and suffix
+export const diffText = (before: string, after: string): DraftTextOp[] => {
+  const a = Array.from(before);
+  const b = Array.from(after);
+  let start = 0;
+  while (start < a.length && start < b.length && a[start] === b[start]) start++;
+  let endA = a.length;
+  let endB = b.length;
+  while (endA > start && endB > start && a[endA - 1] === b[endB - 1]) {
+    endA--;
+    endB--;
+  }
+  if (start === endA && start === endB) return [];
+  return [{ offset: start, delete: endA - start, insert: b.slice(start, endB).join('') }];
+};
+
 export const draftsApi = {
   // Create draft
   create: async (data: DraftCreate): Promise<Draft> => {
@@ -35,9 +77,9 @@ export const draftsApi = {
     return response.data;
   },
 
-  // Get all drafts
-  getAll: async (): Promise<Draft[]> => {
-    const response = await apiClient.get('/api/drafts');
+  // Get a page of drafts (most recently updated first)
+  getAll: async (limit = 20, cursor?: string): Promise<CursorPage<Draft>> => {
+    const response = await apiClient.get('/api/drafts', { params: { limit, cursor } });
     return response.data;
   },
 
@@ -53,6 +95,12 @@ export const draftsApi = {
     return response.data;
   },
 
+  // Apply edits made since base_revision (autosave); rejects with 409 on conflict
+  patch: async (draftId: string, data: DraftPatch): Promise<DraftPatchResult> => {
+    const response = await apiClient.patch(`/api/drafts/${draftId}`, data);
+    return response.data;
+  },
+
   // Delete draft
   delete: async (draftId: string): Promise<void> => {
     await apiClient.delete(`/api/drafts/${draftId}`);
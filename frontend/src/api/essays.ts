@@ -1,5 +1,13 @@
 import apiClient from './client';
-import type { Essay, EssayListItem, EssaySubmit, Analysis } from '@/types';
+import { useUserStore } from '@/store/userStore';
+import type { Essay, EssayListItem, EssaySubmit, Analysis, CursorPage } from '@/types';
+
+// Server-Sent Event from /api/essays/submit-stream
+// (basic_stats, vocabulary, sentence, essay, complete or error)
+export interface AnalysisStreamEvent {
+  event: string;
+  data: any;
+}
 
 export const essaysApi = {
   // Submit essay for analysis
@@ -8,9 +16,51 @@ export const essaysApi = {
     return response.data;
   },
 
-  // Get user's essays
-  getAll: async (limit = 10, offset = 0): Promise<EssayListItem[]> => {
-    const response = await apiClient.get(`/api/essays?limit=${limit}&offset=${offset}`);
+  // Submit essay and receive the analysis progressively; resolves with the stored analysis
+  submitStream: async (
+    data: EssaySubmit,
+    onEvent: (event: AnalysisStreamEvent) => void
+  ): Promise<Analysis> => {
+    const token = useUserStore.getState().token;
+    const response = await fetch(`${apiClient.defaults.baseURL}/api/essays/submit-stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify(data),
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Analysis request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const event = block.match(/^event: (.*)$/m)?.[1] ?? 'message';
+        const payload = block.match(/^data: (.*)$/m)?.[1];
+        const parsed = { event, data: payload ? JSON.parse(payload) : null };
+
+        if (event === 'error') throw new Error(parsed.data?.detail ?? 'Analysis failed');
+        onEvent(parsed);
+        if (event === 'complete') return parsed.data;
+      }
+    }
+    throw new Error('Analysis stream ended before completion');
+  },
+
+  // Get a page of the user's essays (newest first)
+  getAll: async (limit = 10, cursor?: string): Promise<CursorPage<EssayListItem>> => {
+    const response = await apiClient.get('/api/essays', { params: { limit, cursor } });
     return response.data;
   },
 
@@ -8,6 +8,7 @@ interface WritingEditorProps {
   theme: string;
   onSubmit: (data: { title: string; content: string }) => void;
   onSaveDraft: (data: { title: string; content: string }) => void;
+  onAutoSave?: (data: { title: string; content: string }) => void;
   onBack: () => void;
   isSubmitting?: boolean;
   isSavingDraft?: boolean;
@@ -25,6 +26,7 @@ export default function WritingEditor({
   theme,
   onSubmit,
   onSaveDraft,
+  onAutoSave,
   onBack,
   isSubmitting = false,
   isSavingDraft = false,
@@ -59,6 +61,15 @@ export default function WritingEditor({
     return () => clearTimeout(timer);
   }, [title, content, level, theme]);
 
+  // Auto-save to the server once typing pauses
+  useEffect(() => {
+    if (!onAutoSave || (title === initialTitle && content === initialContent)) return;
+    const timer = setTimeout(() => onAutoSave({ title, content }), 3000);
+
+    return () => clearTimeout(timer);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [title, content]);
+
   // Load from localStorage backup (only once on mount)
   useEffect(() => {
     if (!initialTitle && !initialContent) {
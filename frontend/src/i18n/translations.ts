@@ -97,6 +97,7 @@ interface TranslationStrings {
   drafts: string;
   recentEssays: string;
   noEssays: string;
+  loadMore: string;
   writeFirst: string;
   delete: string;
   editingDraft: string;
@@ -253,6 +254,7 @@ const enTranslations: TranslationStrings = {
   drafts: 'Drafts',
   recentEssays: 'Recent Essays',
   noEssays: "You haven't written any essays yet!",
+  loadMore: 'Load more',
   writeFirst: 'Write Your First Essay',
   delete: 'Delete',
   editingDraft: 'Editing saved draft',
@@ -409,6 +411,7 @@ const zhTranslations: TranslationStrings = {
   drafts: '草稿',
   recentEssays: '最近的作文',
   noEssays: '你还没有写任何作文！',
+  loadMore: '加载更多',
   writeFirst: '写你的第一篇作文',
   delete: '删除',
   editingDraft: '正在编辑已保存的草稿',
@@ -565,6 +568,7 @@ const esTranslations: TranslationStrings = {
   drafts: 'Borradores',
   recentEssays: 'Ensayos Recientes',
   noEssays: '¡Aún no has escrito ningún ensayo!',
+  loadMore: 'Cargar más',
   writeFirst: 'Escribe tu Primer Ensayo',
   delete: 'Eliminar',
   editingDraft: 'Editando borrador guardado',
@@ -721,6 +725,7 @@ const frTranslations: TranslationStrings = {
   drafts: 'Brouillons',
   recentEssays: 'Essais Récents',
   noEssays: 'Vous n\'avez pas encore écrit d\'essais !',
+  loadMore: 'Charger plus',
   writeFirst: 'Écrire Votre Premier Essai',
   delete: 'Supprimer',
   editingDraft: 'Modification du brouillon enregistré',
@@ -1,12 +1,12 @@
 // src/pages/PracticePage.tsx
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import { useLanguage } from '@/i18n/LanguageContext';
 import LevelThemeSelector from '@/components/practice/LevelThemeSelector';
 import WritingEditor from '@/components/practice/WritingEditor';
 import WritingTips from '@/components/practice/WritingTips';
 import { essaysApi } from '@/api/essays';
-import { draftsApi } from '@/api/drafts';
+import { draftsApi, diffText } from '@/api/drafts';
 import type { Draft } from '@/types';
 
 export default function PracticePage() {
@@ -22,6 +22,11 @@ export default function PracticePage() {
   const [currentDraftId, setCurrentDraftId] = useState<string | null>(null);
   const [initialTitle, setInitialTitle] = useState('');
   const [initialContent, setInitialContent] = useState('');
+  // Last saved content and its revision, so updates only send the edit
+  // (a ref, so a save queued behind an autosave sees the autosave's result)
+  const saved = useRef({ content: '', revision: 0 });
+  // Server save in flight, so autosaves don't race each other or an explicit save
+  const savingRef = useRef<Promise<void> | null>(null);
 
   // Check if we're loading a draft
   useEffect(() => {
@@ -33,6 +38,7 @@ export default function PracticePage() {
       setSelectedTheme(draftToLoad.theme || '');
       setInitialTitle(draftToLoad.title || '');
       setInitialContent(draftToLoad.content || '');
+      saved.current = { content: draftToLoad.content || '', revision: draftToLoad.revision ?? 0 };
       setCurrentDraftId(draftToLoad.id);
       setStep('write');
       
@@ -57,18 +63,55 @@ export default function PracticePage() {
     setInitialContent('');
   };
 
+  // Update the existing draft: send only the edit since the last save, or
+  // the full content if the draft changed elsewhere meanwhile. Autosaves
+  // (save=false) are buffered by the server; explicit saves are written at once.
+  const updateDraft = async (draftId: string, data: { title: string; content: string }, save: boolean) => {
+    try {
+      const result = await draftsApi.patch(draftId, {
+        base_revision: saved.current.revision,
+        ops: diffText(saved.current.content, data.content),
+        title: data.title,
+        theme: selectedTheme,
+        hsk_level: selectedLevel,
+        save,
+      });
+      saved.current = { content: data.content, revision: result.revision };
+    } catch (error: any) {
+      if (error.response?.status !== 409) throw error;
+      const draft = await draftsApi.update(draftId, {
+        title: data.title,
+        content: data.content,
+        theme: selectedTheme,
+        hsk_level: selectedLevel,
+      });
+      saved.current = { content: data.content, revision: draft.revision };
+    }
+  };
+
+  const handleAutoSave = async (data: { title: string; content: string }) => {
+    if (!currentDraftId || savingRef.current) return;
+
+    const saving = updateDraft(currentDraftId, data, false);
+    savingRef.current = saving;
+    try {
+      await saving;
+    } catch (error) {
+      // The explicit save reports failures; the local backup still has the text
+      console.error('Failed to autosave draft:', error);
+    } finally {
+      savingRef.current = null;
+    }
+  };
+
   const handleSaveDraft = async (data: { title: string; content: string }) => {
     setIsSavingDraft(true);
 
     try {
       if (currentDraftId) {
-        // Update existing draft
-        await draftsApi.update(currentDraftId, {
-          title: data.title,
-          content: data.content,
-          theme: selectedTheme,
-          hsk_level: selectedLevel,
-        });
+        // Let a running autosave finish so this one patches its revision
+        await savingRef.current?.catch(() => undefined);
+        await updateDraft(currentDraftId, data, true);
         alert('Draft updated! 💾');
       } else {
         // Create new draft
@@ -80,6 +123,7 @@ export default function PracticePage() {
           char_count: data.content.match(/[\u4e00-\u9fa5]/g)?.length || 0,
         });
         setCurrentDraftId(draft.id);
+        saved.current = { content: data.content, revision: draft.revision };
         alert('Draft saved! 💾');
       }
 
@@ -165,6 +209,7 @@ export default function PracticePage() {
                 theme={selectedTheme}
                 onSubmit={handleSubmit}
                 onSaveDraft={handleSaveDraft}
+                onAutoSave={handleAutoSave}
                 onBack={handleBack}
                 isSubmitting={isSubmitting}
                 isSavingDraft={isSavingDraft}
@@ -20,6 +20,10 @@ export default function ProfilePage() {
   const [loading, setLoading] = useState(true);
   const [essays, setEssays] = useState<EssayListItem[]>([]);
   const [drafts, setDrafts] = useState<Draft[]>([]);
+  // Cursors for the next page of each list (null = everything is loaded)
+  const [essayCursor, setEssayCursor] = useState<string | null>(null);
+  const [draftCursor, setDraftCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState<'essays' | 'drafts' | null>(null);
   const [stats, setStats] = useState({
     username: user?.username || 'User',
     totalEssays: 0,
@@ -43,35 +47,14 @@ export default function ProfilePage() {
     const fetchData = async () => {
       try {
         setLoading(true);
-        const [essayList, draftList] = await Promise.all([
-          essaysApi.getAll(50, 0),
-          draftsApi.getAll(),
+        const [essayPage, draftPage] = await Promise.all([
+          essaysApi.getAll(50),
+          draftsApi.getAll(50),
         ]);
-        
-        setEssays(essayList);
-        setDrafts(draftList);
-
-        // Calculate stats from essays
-        if (essayList.length > 0) {
-          const scores = essayList
-            .map(e => e.overall_score)
-            .filter((score): score is number => score !== undefined);
-
-          const averageScore = scores.length > 0
-            ? Math.round(scores.reduce((a, b) => a + b, 0) / scores.length)
-            : 0;
-
-          const bestScore = scores.length > 0
-            ? Math.max(...scores)
-            : 0;
-
-          setStats(prev => ({
-            ...prev,
-            totalEssays: essayList.length,
-            averageScore,
-            bestScore,
-          }));
-        }
+        setEssays(essayPage.items);
+        setEssayCursor(essayPage.next_cursor);
+        setDrafts(draftPage.items);
+        setDraftCursor(draftPage.next_cursor);
       } catch (error) {
         console.error('Failed to fetch data:', error);
       } finally {
@@ -82,6 +65,50 @@ export default function ProfilePage() {
     fetchData();
   }, []);
 
+  // Calculate stats from the essays loaded so far
+  useEffect(() => {
+    if (essays.length === 0) return;
+
+    const scores = essays
+      .map(e => e.overall_score)
+      .filter((score): score is number => score !== undefined);
+
+    const averageScore = scores.length > 0
+      ? Math.round(scores.reduce((a, b) => a + b, 0) / scores.length)
+      : 0;
+
+    const bestScore = scores.length > 0
+      ? Math.max(...scores)
+      : 0;
+
+    setStats(prev => ({
+      ...prev,
+      totalEssays: essays.length,
+      averageScore,
+      bestScore,
+    }));
+  }, [essays]);
+
+  // Append the next page of essays or drafts
+  const handleLoadMore = async (list: 'essays' | 'drafts') => {
+    setLoadingMore(list);
+    try {
+      if (list === 'essays' && essayCursor) {
+        const page = await essaysApi.getAll(50, essayCursor);
+        setEssays(prev => [...prev, ...page.items]);
+        setEssayCursor(page.next_cursor);
+      } else if (list === 'drafts' && draftCursor) {
+        const page = await draftsApi.getAll(50, draftCursor);
+        setDrafts(prev => [...prev, ...page.items]);
+        setDraftCursor(page.next_cursor);
+      }
+    } catch (error) {
+      console.error(`Failed to load more ${list}:`, error);
+    } finally {
+      setLoadingMore(null);
+    }
+  };
+
   const handleDeleteDraft = async (draftId: string, e: React.MouseEvent) => {
     e.stopPropagation();
     
@@ -322,6 +349,16 @@ export default function ProfilePage() {
               </div>
             ))}
           </div>
+          {draftCursor && (
+            <button
+              onClick={() => handleLoadMore('drafts')}
+              disabled={loadingMore !== null}
+              className="mt-4 w-full flex items-center justify-center gap-2 px-4 py-2 text-sm text-gray-700 border border-gray-200 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+            >
+              {loadingMore === 'drafts' && <Loader2 className="w-4 h-4 animate-spin" />}
+              {t('loadMore')}
+            </button>
+          )}
         </div>
       )}
 
@@ -393,6 +430,16 @@ export default function ProfilePage() {
             ))}
           </div>
         )}
+        {essayCursor && (
+          <button
+            onClick={() => handleLoadMore('essays')}
+            disabled={loadingMore !== null}
+            className="mt-4 w-full flex items-center justify-center gap-2 px-4 py-2 text-sm text-gray-700 border border-gray-200 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+          >
+            {loadingMore === 'essays' && <Loader2 className="w-4 h-4 animate-spin" />}
+            {t('loadMore')}
+          </button>
+        )}
       </div>
 
       {/* Logout Button */}
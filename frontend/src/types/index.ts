@@ -22,6 +22,12 @@ export interface Essay {
   char_count: number;
 }
 
+// One page of a cursor-paginated list (pass next_cursor to get the next page)
+export interface CursorPage<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface EssayListItem {
   id: string;
   title: string;
@@ -40,6 +46,7 @@ export interface Draft {
   theme?: string;
   hsk_level?: number;
   char_count: number;
+  revision: number;
   created_at: string;
   updated_at: string;
 }